@@ -0,0 +1 @@
+"""Benchmarks of the Higgs Audio TTS client."""
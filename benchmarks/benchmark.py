@@ -0,0 +1,452 @@
+"""Benchmark the Higgs Audio TTS client against a local mock server.
+
+Runs the integration's real provider, speak service and sensors inside a
+bare Home Assistant instance, so client overhead and regressions can be
+measured on a machine without a GPU or a Higgs Audio server. Reports
+throughput, latency percentiles, event loop blocking and memory use.
+
+Run from the repository root with homeassistant installed:
+
+    python -m benchmarks.benchmark --scenario tts stream --requests 200 --concurrency 8
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import math
+import tempfile
+import time
+import tracemalloc
+from types import MappingProxyType
+from urllib.parse import urlparse
+
+from homeassistant.config_entries import ConfigEntries, ConfigEntry
+from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.core import HomeAssistant
+
+from custom_components.ha_chatterbox.cache import AudioCache
+from custom_components.ha_chatterbox.client import HiggsAudioClient
+from custom_components.ha_chatterbox.const import (
+    CACHE_DIR,
+    CONF_CHUNK_SIZE,
+    CONF_MAX_IN_FLIGHT,
+    CONF_OUTPUT_FORMAT,
+    CONF_SYNTHESIS_CONCURRENCY,
+    CONF_VOICE,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_SYNTHESIS_CONCURRENCY,
+    DOMAIN,
+    OUTPUT_FORMAT_WAV,
+)
+from custom_components.ha_chatterbox.coordinator import HiggsAudioDataUpdateCoordinator
+from custom_components.ha_chatterbox.references import ReferenceManager
+from custom_components.ha_chatterbox.sensor import (
+    HiggsAudioTTSLatencySensor,
+    HiggsAudioTTSQueueSensor,
+    HiggsAudioTTSRequestsSensor,
+    HiggsAudioTTSStatusSensor,
+)
+from custom_components.ha_chatterbox.services import (
+    SERVICE_INTERRUPT,
+    SERVICE_SPEAK,
+    async_setup_services,
+)
+from custom_components.ha_chatterbox.tts import HiggsAudioTTSProvider
+from custom_components.ha_chatterbox.voices import VoiceCatalog
+from custom_components.ha_chatterbox.warmup import RequestHistory
+
+from .mock_server import MockHiggsAudioServer, MockServerConfig
+
+_LOGGER = logging.getLogger(__name__)
+
+SCENARIOS = ("tts", "stream", "speak", "interrupt", "sensors")
+# How often the event loop monitor wakes up, in seconds
+LOOP_MONITOR_INTERVAL = 0.005
+# Lag above this counts as the loop being blocked, in seconds
+LOOP_BLOCKED_THRESHOLD = 0.01
+FILLER = "The quick brown fox jumps over the lazy dog. "
+
+
+def _percentile(values, quantile):
+    """Return the nearest-rank percentile of values, or None if empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(1, math.ceil(quantile * len(values))) - 1]
+
+
+def _milliseconds(values):
+    return {
+        name: round(value * 1000, 2) if value is not None else None
+        for name, value in (
+            ("p50", _percentile(values, 0.5)),
+            ("p95", _percentile(values, 0.95)),
+            ("p99", _percentile(values, 0.99)),
+            ("max", max(values) if values else None),
+        )
+    }
+
+
+def _config_entry(**kwargs):
+    """Create a ConfigEntry, filling in arguments newer Home Assistant versions require."""
+    defaults = {
+        "source": "user",
+        "version": 1,
+        "minor_version": 1,
+        "unique_id": None,
+        "discovery_keys": MappingProxyType({}),
+        "subentries_data": None,
+    }
+    parameters = inspect.signature(ConfigEntry).parameters
+    for key, value in defaults.items():
+        if key in parameters:
+            kwargs.setdefault(key, value)
+    return ConfigEntry(**kwargs)
+
+
+def _messages(args):
+    """Return the messages to send, unique unless --repeat is given."""
+    body = (FILLER * (args.message_length // len(FILLER) + 1))[: args.message_length]
+    if args.repeat:
+        return [body] * args.requests
+    return [f"Request {index}. {body}" for index in range(args.requests)]
+
+
+class LoopMonitor:
+    """Measure how late the event loop wakes up a sleeping task."""
+
+    def __init__(self, interval=LOOP_MONITOR_INTERVAL):
+        """Initialize the monitor."""
+        self._interval = interval
+        self._task = None
+        self.lags = []
+
+    async def _async_run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self._interval)
+            self.lags.append(max(0.0, loop.time() - started - self._interval))
+
+    def start(self):
+        """Start sampling."""
+        self.lags = []
+        self._task = asyncio.get_running_loop().create_task(self._async_run())
+
+    async def async_stop(self):
+        """Stop sampling."""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    @property
+    def report(self):
+        """Return lag percentiles and the total time spent blocked."""
+        blocked = [lag for lag in self.lags if lag > LOOP_BLOCKED_THRESHOLD]
+        return {
+            "lag_ms": _milliseconds(self.lags),
+            "blocked_ms": round(sum(blocked) * 1000, 2),
+            "blocked_count": len(blocked),
+        }
+
+
+class SensorProbe:
+    """Recompute sensor states whenever the metrics change, as state writes would."""
+
+    def __init__(self, metric_sensors, coordinator_sensors):
+        """Initialize the probe."""
+        self._metric_sensors = metric_sensors
+        self._coordinator_sensors = coordinator_sensors
+        self.durations = []
+
+    def _render(self, sensors, value):
+        started = time.perf_counter()
+        for sensor in sensors:
+            # Read the properties only to time rendering the sensor state
+            _ = getattr(sensor, value)
+            _ = sensor.extra_state_attributes
+        self.durations.append(time.perf_counter() - started)
+
+    def async_update_metrics(self):
+        """Render the request metric sensors."""
+        self._render(self._metric_sensors, "native_value")
+
+    def async_update_coordinator(self):
+        """Render the server status sensors."""
+        self._render(self._coordinator_sensors, "state")
+
+
+class Benchmark:
+    """The integration's objects, wired up like async_setup_entry does."""
+
+    def __init__(self, hass, base_url, args):
+        """Initialize the benchmark."""
+        self.hass = hass
+        self._base_url = base_url
+        self._args = args
+        self.entry = None
+        self.data = None
+        self.provider = None
+        self.probe = None
+
+    async def async_setup(self):
+        """Create the client, provider, services and sensors."""
+        hass = self.hass
+        args = self._args
+        url = urlparse(self._base_url)
+        self.entry = _config_entry(
+            domain=DOMAIN,
+            title="Higgs Audio TTS benchmark",
+            data={CONF_HOST: url.hostname, CONF_PORT: url.port},
+            options={
+                CONF_VOICE: "Emily.wav",
+                CONF_CHUNK_SIZE: args.chunk_size,
+                CONF_MAX_IN_FLIGHT: args.max_in_flight,
+                CONF_SYNTHESIS_CONCURRENCY: args.synthesis_concurrency,
+                CONF_OUTPUT_FORMAT: OUTPUT_FORMAT_WAV,
+            },
+        )
+        # Same as MockConfigEntry.add_to_hass() in Home Assistant's test helpers
+        hass.config_entries._entries[self.entry.entry_id] = self.entry
+        entry_id = self.entry.entry_id
+
+        client = HiggsAudioClient(hass, [self._base_url], args.max_in_flight)
+        cache = None
+        if args.cache:
+            cache = AudioCache(hass, hass.config.path(CACHE_DIR, entry_id))
+            await cache.async_load()
+        history = RequestHistory(hass, entry_id)
+        voices = VoiceCatalog(hass, client, entry_id)
+        await voices.async_refresh()
+        self.data = {
+            "host": url.hostname,
+            "port": url.port,
+            "base_url": self._base_url,
+            "client": client,
+            "cache": cache,
+            "history": history,
+            "voices": voices,
+            "references": ReferenceManager(hass, client, voices, entry_id),
+            "coordinator": HiggsAudioDataUpdateCoordinator(hass, client, self.entry),
+            "metrics_endpoint": False,
+            "config_entry": self.entry,
+        }
+        hass.data.setdefault(DOMAIN, {})[entry_id] = self.data
+
+        self.provider = HiggsAudioTTSProvider(
+            hass=hass,
+            host=url.hostname,
+            port=url.port,
+            base_url=self._base_url,
+            config_entry=self.entry,
+            client=client,
+            cache=cache,
+            history=history,
+            voices=voices,
+        )
+        hass.data[DOMAIN][f"{entry_id}_provider"] = self.provider
+        async_setup_services(hass)
+
+        coordinator = self.data["coordinator"]
+        self.probe = SensorProbe(
+            [HiggsAudioTTSRequestsSensor(self.entry, self.data), HiggsAudioTTSLatencySensor(self.entry, self.data)],
+            [HiggsAudioTTSQueueSensor(coordinator), HiggsAudioTTSStatusSensor(coordinator)],
+        )
+        client.metrics.async_add_listener(self.probe.async_update_metrics)
+
+    async def _async_tts(self, message):
+        _, audio = await self.provider.async_get_tts_audio(message, "en-US", {})
+        return bool(audio)
+
+    async def _async_stream(self, message):
+        size = 0
+        async for chunk in self.provider.async_stream_audio(message, {}):
+            size += len(chunk)
+        return size > 0
+
+    async def _async_speak(self, message):
+        # The service logs failures instead of raising; they show in the client metrics
+        await self.hass.services.async_call(DOMAIN, SERVICE_SPEAK, {"message": message}, blocking=True)
+        return None
+
+    async def _async_interrupt(self, message):
+        await self.hass.services.async_call(DOMAIN, SERVICE_INTERRUPT, {}, blocking=True)
+        return None
+
+    async def _async_sensors(self, message):
+        coordinator = self.data["coordinator"]
+        await coordinator.async_refresh()
+        self.probe.async_update_coordinator()
+        return coordinator.last_update_success
+
+    async def async_run(self, scenario, messages, concurrency, memory=True):
+        """Send messages through a scenario with concurrent workers and return a report."""
+        operation = getattr(self, f"_async_{scenario}")
+        client = self.data["client"]
+        failures_before = client.metrics.failures
+        requests_before = client.metrics.requests
+        self.probe.durations = []
+        latencies = []
+        failures = 0
+        pending = iter(messages)
+
+        async def worker():
+            nonlocal failures
+            for message in pending:
+                started = time.perf_counter()
+                try:
+                    success = await operation(message)
+                except Exception as ex:  # counted, the benchmark keeps going
+                    _LOGGER.debug("Benchmark request failed: %s", ex)
+                    success = False
+                latencies.append(time.perf_counter() - started)
+                if success is False:
+                    failures += 1
+
+        monitor = LoopMonitor()
+        if memory:
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+        monitor.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+        await monitor.async_stop()
+
+        report = {
+            "scenario": scenario,
+            "requests": len(latencies),
+            "concurrency": concurrency,
+            "wall_seconds": round(wall, 3),
+            "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+            "failures": failures if scenario != "speak" else client.metrics.failures - failures_before,
+            "server_requests": client.metrics.requests - requests_before,
+            "latency_ms": _milliseconds(latencies),
+            "event_loop": monitor.report,
+            "sensor_update_ms": {
+                "count": len(self.probe.durations),
+                "mean": round(sum(self.probe.durations) / len(self.probe.durations) * 1000, 3)
+                if self.probe.durations else None,
+                "max": round(max(self.probe.durations) * 1000, 3) if self.probe.durations else None,
+            },
+        }
+        if memory:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            in_flight = max(1, min(concurrency, len(latencies)))
+            report["memory"] = {
+                "peak_kib": round((peak - baseline) / 1024, 1),
+                "peak_kib_per_in_flight_request": round((peak - baseline) / in_flight / 1024, 1),
+                "retained_bytes_per_request": round((current - baseline) / max(1, len(latencies))),
+            }
+        return report
+
+
+async def async_main(args):
+    """Start the mock server and Home Assistant, then run every scenario."""
+    server = MockHiggsAudioServer(
+        MockServerConfig(
+            latency=args.latency,
+            per_character=args.per_character,
+            audio_per_character=args.audio_per_character,
+            chunk_size=args.response_chunk_size,
+            chunk_interval=args.chunk_interval,
+            concurrency=args.server_concurrency,
+            failure_rate=args.failure_rate,
+            seed=args.seed,
+        )
+    )
+    base_url = server.start()
+    reports = []
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = HomeAssistant(config_dir)
+            hass.config_entries = ConfigEntries(hass, {})
+            try:
+                benchmark = Benchmark(hass, base_url, args)
+                await benchmark.async_setup()
+                for scenario in args.scenario:
+                    if args.warmup:
+                        await benchmark.async_run(scenario, _messages(args)[: args.warmup], 1, memory=False)
+                    report = await benchmark.async_run(
+                        scenario, _messages(args), args.concurrency, memory=not args.no_memory
+                    )
+                    report["server"] = server.stats
+                    reports.append(report)
+            finally:
+                await hass.async_stop(force=True)
+    finally:
+        server.stop()
+    return reports
+
+
+def _print_report(report):
+    latency = report["latency_ms"]
+    loop = report["event_loop"]
+    print(f"== {report['scenario']} ({report['requests']} requests, concurrency {report['concurrency']})")
+    print(f"  throughput      {report['throughput_rps']} req/s over {report['wall_seconds']} s")
+    print(f"  failures        {report['failures']} (server requests: {report['server_requests']})")
+    print(
+        f"  latency ms      p50 {latency['p50']}  p95 {latency['p95']}  "
+        f"p99 {latency['p99']}  max {latency['max']}"
+    )
+    print(
+        f"  loop lag ms     p99 {loop['lag_ms']['p99']}  max {loop['lag_ms']['max']}  "
+        f"blocked {loop['blocked_ms']} ms in {loop['blocked_count']} stalls"
+    )
+    sensors = report["sensor_update_ms"]
+    print(f"  sensor update   {sensors['count']} renders, mean {sensors['mean']} ms, max {sensors['max']} ms")
+    if "memory" in report:
+        memory = report["memory"]
+        print(
+            f"  memory          peak {memory['peak_kib']} KiB, "
+            f"{memory['peak_kib_per_in_flight_request']} KiB per in-flight request, "
+            f"{memory['retained_bytes_per_request']} B retained per request"
+        )
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=["tts"])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent callers")
+    parser.add_argument("--warmup", type=int, default=5, help="requests sent before measuring")
+    parser.add_argument("--message-length", type=int, default=120, help="characters per message")
+    parser.add_argument("--repeat", action="store_true", help="send the same message every time")
+    parser.add_argument("--cache", action="store_true", help="enable the audio cache")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="client text chunk size")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT)
+    parser.add_argument("--synthesis-concurrency", type=int, default=DEFAULT_SYNTHESIS_CONCURRENCY)
+    server = parser.add_argument_group("mock server")
+    server.add_argument("--latency", type=float, default=0.05, help="seconds per /tts request")
+    server.add_argument("--per-character", type=float, default=0.0, help="extra seconds per character")
+    server.add_argument("--audio-per-character", type=float, default=0.06, help="seconds of audio per character")
+    server.add_argument("--response-chunk-size", type=int, default=0, help="send /tts bodies in chunks of N bytes")
+    server.add_argument("--chunk-interval", type=float, default=0.0, help="seconds between response chunks")
+    server.add_argument("--server-concurrency", type=int, default=4, help="requests generated at once")
+    server.add_argument("--failure-rate", type=float, default=0.0, help="fraction of /tts requests that fail")
+    server.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc, which slows the client")
+    parser.add_argument("--json", action="store_true", help="print the reports as JSON")
+    parser.add_argument("--debug", action="store_true", help="show the integration's debug logs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the benchmark from the command line."""
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING)
+    reports = asyncio.run(async_main(args))
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    for report in reports:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Local stand-in for the Higgs Audio TTS server, used by the benchmarks.
+
+The server runs on its own event loop in a background thread, so its
+work does not show up in the client's event loop measurements.
+"""
+import asyncio
+import os
+import random
+import struct
+import threading
+
+from aiohttp import web
+
+
+def _wav(seconds, sample_rate=24000):
+    """Return a silent 16-bit mono WAV of the given length."""
+    data_size = int(seconds * sample_rate) * 2
+    fmt = struct.pack("<HHIIHH", 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    header = (
+        b"RIFF" + struct.pack("<I", 4 + 8 + len(fmt) + 8 + data_size) + b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"data" + struct.pack("<I", data_size)
+    )
+    return header + bytes(data_size)
+
+
+class MockServerConfig:
+    """Behaviour of the mock server."""
+
+    def __init__(
+        self,
+        latency=0.05,
+        per_character=0.0,
+        audio_per_character=0.06,
+        sample_rate=24000,
+        chunk_size=0,
+        chunk_interval=0.0,
+        concurrency=1,
+        failure_rate=0.0,
+        failure_status=500,
+        voices=("Emily.wav", "Thomas.wav"),
+        seed=0,
+    ):
+        """Initialize the configuration.
+
+        latency and per_character set the generation time of /tts,
+        audio_per_character the length of the returned audio. With a
+        chunk_size the body is sent in chunks, chunk_interval apart.
+        concurrency is the number of requests generated at once (GPU
+        slots); others wait in the queue reported by /queue/status.
+        failure_rate is the fraction of /tts requests answered with
+        failure_status.
+        """
+        self.latency = latency
+        self.per_character = per_character
+        self.audio_per_character = audio_per_character
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.chunk_interval = chunk_interval
+        self.concurrency = concurrency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.voices = list(voices)
+        self.seed = seed
+
+
+class MockHiggsAudioServer:
+    """Serve /tts, /health, /queue/status, /interrupt and the voice lists."""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        """Initialize the server."""
+        self.config = config or MockServerConfig()
+        self._host = host
+        self._port = port
+        self._random = random.Random(self.config.seed)
+        self._loop = None
+        self._runner = None
+        self._thread = None
+        self._slots = None
+        self.base_url = None
+        self.requests = 0
+        self.failures = 0
+        self.interrupts = 0
+        self.bytes_sent = 0
+        self.waiting = 0
+        self.max_waiting = 0
+
+    @property
+    def stats(self):
+        """Return request counters."""
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "interrupts": self.interrupts,
+            "bytes_sent": self.bytes_sent,
+            "max_queue_size": self.max_waiting,
+        }
+
+    def _app(self):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/tts", self._handle_tts)
+        app.router.add_get("/health", self._handle_health)
+        app.router.add_get("/queue/status", self._handle_queue)
+        app.router.add_post("/interrupt", self._handle_interrupt)
+        app.router.add_get("/get_predefined_voices", self._handle_voices)
+        app.router.add_get("/get_reference_files", self._handle_references)
+        return app
+
+    async def _handle_tts(self, request):
+        config = self.config
+        payload = await request.json()
+        text = payload.get("text", "")
+        self.requests += 1
+
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        async with self._slots:
+            self.waiting -= 1
+            await asyncio.sleep(config.latency + config.per_character * len(text))
+
+        if self._random.random() < config.failure_rate:
+            self.failures += 1
+            return web.json_response({"detail": "Injected failure"}, status=config.failure_status)
+
+        body = _wav(config.audio_per_character * len(text), config.sample_rate)
+        self.bytes_sent += len(body)
+        if not config.chunk_size:
+            return web.Response(body=body, content_type="audio/wav")
+
+        response = web.StreamResponse(headers={"Content-Type": "audio/wav"})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        view = memoryview(body)
+        for offset in range(0, len(body), config.chunk_size):
+            await response.write(view[offset:offset + config.chunk_size])
+            if config.chunk_interval:
+                await asyncio.sleep(config.chunk_interval)
+        await response.write_eof()
+        return response
+
+    async def _handle_health(self, request):
+        return web.json_response(
+            {
+                "status": "healthy",
+                "message": "Mock Higgs Audio TTS server",
+                "version": "mock",
+                "character": "",
+                "components": {},
+            }
+        )
+
+    async def _handle_queue(self, request):
+        return web.json_response({"queue_size": self.waiting, "is_playing": False})
+
+    async def _handle_interrupt(self, request):
+        self.interrupts += 1
+        return web.json_response({"status": "interrupted"})
+
+    async def _handle_voices(self, request):
+        return web.json_response(
+            [
+                {"filename": voice, "display_name": os.path.splitext(voice)[0]}
+                for voice in self.config.voices
+            ]
+        )
+
+    async def _handle_references(self, request):
+        return web.json_response([])
+
+    async def _async_start(self):
+        self._slots = asyncio.Semaphore(max(1, self.config.concurrency))
+        self._runner = web.AppRunner(self._app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}"
+
+    def start(self):
+        """Start serving in a background thread and return the base URL."""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self._async_start())
+            except Exception as ex:  # reported to the caller of start()
+                errors.append(ex)
+                started.set()
+                return
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="mock-higgs-audio", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self.base_url
+
+    def stop(self):
+        """Stop the server and wait for its thread."""
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join()
@@ -1,57 +1,164 @@
 """The Higgs Audio TTS integration."""
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import functools
 import logging
+from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN, DEFAULT_HOST, DEFAULT_PORT
+from .cache import AudioCache
+from .client import HiggsAudioClient
+from .coordinator import HiggsAudioDataUpdateCoordinator
+from .const import (
+    DOMAIN,
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    CACHE_DIR,
+    CONF_DEBUG_INSTRUMENTATION,
+    CONF_LOAD_BALANCING,
+    CONF_MAX_IN_FLIGHT,
+    CONF_METRICS_ENDPOINT,
+    CONF_SERVERS,
+    DEFAULT_MAX_IN_FLIGHT,
+    HEALTH_CHECK_INTERVAL,
+    LOAD_BALANCING_LEAST_OUTSTANDING,
+    VOICE_CATALOG_TTL,
+)
+from .pool import parse_servers
+from .references import ReferenceManager
+from .voices import VoiceCatalog
+from .warmup import RequestHistory
 
 _LOGGER = logging.getLogger(__name__)
 
+# Time spent importing the integration's modules, for the startup benchmark
+IMPORT_DURATION = time.perf_counter() - _IMPORT_STARTED
+
+PLATFORMS = ["tts", "sensor"]
+
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the Higgs Audio TTS component."""
+    from .services import async_setup_services
+
     hass.data.setdefault(DOMAIN, {})
+    async_setup_services(hass)
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up Higgs Audio TTS config entry."""
+    """Set up Higgs Audio TTS config entry.
+
+    Nothing here waits on the network: stored state is loaded from disk and
+    the server is contacted in the background once the platforms are up.
+    """
+    setup_started = time.perf_counter()
     host = entry.data.get(CONF_HOST, DEFAULT_HOST)
     port = entry.data.get(CONF_PORT, DEFAULT_PORT)
+    base_url = f"http://{host}:{port}"
+    max_in_flight = entry.options.get(CONF_MAX_IN_FLIGHT, entry.data.get(CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT))
+    strategy = entry.options.get(
+        CONF_LOAD_BALANCING, entry.data.get(CONF_LOAD_BALANCING, LOAD_BALANCING_LEAST_OUTSTANDING)
+    )
+    # Additional servers share the load of the primary host/port
+    base_urls = [base_url] + [
+        url for url in parse_servers(entry.options.get(CONF_SERVERS, entry.data.get(CONF_SERVERS, "")))
+        if url != base_url
+    ]
+    client = HiggsAudioClient(hass, base_urls, max_in_flight, strategy, timed=True)
+    cache = AudioCache(hass, hass.config.path(CACHE_DIR, entry.entry_id))
+    history = RequestHistory(hass, entry.entry_id)
+    await history.async_load()
+    voices = VoiceCatalog(hass, client, entry.entry_id)
+    await voices.async_load()
+    references = ReferenceManager(hass, client, voices, entry.entry_id)
+    await references.async_load()
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
         "host": host,
         "port": port,
-        "base_url": f"http://{host}:{port}",
+        "base_url": base_url,
+        "client": client,
+        "cache": cache,
+        "history": history,
+        "voices": voices,
+        "references": references,
+        "coordinator": HiggsAudioDataUpdateCoordinator(hass, client, entry),
+        "metrics_endpoint": entry.options.get(CONF_METRICS_ENDPOINT, False),
         "config_entry": entry
     }
 
     _LOGGER.info("Setting up Higgs Audio TTS with host: %s, port: %s", host, port)
+    if len(base_urls) > 1:
+        _LOGGER.info("Higgs Audio TTS server pool: %s", ", ".join(base_urls))
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass, client.async_refresh_health, timedelta(seconds=HEALTH_CHECK_INTERVAL)
+            )
+        )
 
-    # Test connection to server
-    try:
-        import requests
-        url = f"http://{host}:{port}/health"
-        response = await hass.async_add_executor_job(
-            requests.get, url, {"timeout": 10}
+    if hass.data[DOMAIN][entry.entry_id]["metrics_endpoint"] and not hass.data[DOMAIN].get("metrics_view"):
+        from .views import HiggsAudioMetricsView
+
+        hass.http.register_view(HiggsAudioMetricsView())
+        hass.data[DOMAIN]["metrics_view"] = True
+
+    if entry.options.get(CONF_DEBUG_INSTRUMENTATION, False):
+        from .profiling import INSTRUMENTATION
+
+        entry.async_on_unload(INSTRUMENTATION.async_enable(hass))
+
+    # Index the audio cache and revalidate the stored voice lists without delaying setup
+    entry.async_create_background_task(hass, cache.async_load(), f"{DOMAIN} cache index")
+    entry.async_create_background_task(hass, voices.async_refresh(), f"{DOMAIN} voice catalog")
+    # The timer fires once per TTL, so it must not be skipped as still fresh
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            functools.partial(voices.async_refresh, force=True),
+            timedelta(seconds=VOICE_CATALOG_TTL),
         )
-        if response.status_code != 200:
-            _LOGGER.warning("Higgs Audio TTS server not responding at %s, but continuing setup", url)
-    except Exception as ex:
-        _LOGGER.warning("Failed to connect to Higgs Audio TTS server: %s, but continuing setup", ex)
-
-    # Forward setup to TTS platform
-    await hass.config_entries.async_forward_entry_setups(entry, ["tts"])
-    
-    _LOGGER.info("Chatterbox TTS setup complete for entry: %s", entry.entry_id)
+    )
+
+    # Forward setup to TTS and sensor platforms
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    # Test connection to server
+    entry.async_create_background_task(
+        hass, _async_check_connection(client, base_url), f"{DOMAIN} connection check"
+    )
+
+    setup_duration = time.perf_counter() - setup_started
+    hass.data[DOMAIN][entry.entry_id]["startup"] = {
+        "import_seconds": round(IMPORT_DURATION, 4),
+        "setup_seconds": round(setup_duration, 4),
+    }
+    _LOGGER.info(
+        "Chatterbox TTS setup complete for entry: %s (setup %.3f s, imports %.3f s)",
+        entry.entry_id, setup_duration, IMPORT_DURATION,
+    )
     return True
 
+async def _async_check_connection(client, base_url):
+    """Warn if no server answers, without holding up setup."""
+    if not await client.async_check_connection():
+        _LOGGER.warning("Higgs Audio TTS server not responding at %s, but continuing setup", base_url)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    # Unload TTS platform
-    await hass.config_entries.async_unload_platforms(entry, ["tts"])
-    
+    # Unload TTS and sensor platforms
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if not unload_ok:
+        return False
+
     # Clean up data
-    hass.data[DOMAIN].pop(entry.entry_id, None)
+    hass.data[DOMAIN].pop(f"{entry.entry_id}_provider", None)
+    data = hass.data[DOMAIN].pop(entry.entry_id, None)
+    if data:
+        await data["client"].async_close()
     return True
@@ -0,0 +1,139 @@
+"""Memory-bounded reading of server response bodies."""
+import asyncio
+import collections
+
+from .const import MAX_RESPONSE_BYTES, RESPONSE_BUFFER_BUDGET, RESPONSE_RESERVATION
+from .errors import HiggsAudioResponseTooLargeError
+
+
+class ByteBudget:
+    """Bound the bytes of response bodies being received at once.
+
+    A reader reserves the size of a body before reading it and waits, in
+    arrival order, while the budget is used up. Waiting readers leave the
+    body in the socket, so TCP flow control holds the server back instead
+    of memory growing. A body larger than the whole budget is admitted
+    once nothing else is being received.
+    """
+
+    def __init__(self, limit=RESPONSE_BUFFER_BUDGET):
+        """Initialize the budget."""
+        self.limit = limit
+        self.in_use = 0
+        self.peak = 0
+        self.waits = 0
+        self._waiters = collections.deque()
+
+    @property
+    def stats(self):
+        """Return budget counters."""
+        return {
+            "in_use": self.in_use,
+            "limit": self.limit,
+            "peak": self.peak,
+            "waiting": sum(1 for _, waiter in self._waiters if not waiter.done()),
+            "waits": self.waits,
+        }
+
+    def _fits(self, size):
+        return not self.in_use or self.in_use + size <= self.limit
+
+    def grow(self, size):
+        """Take size more bytes without waiting."""
+        self.in_use += size
+        if self.in_use > self.peak:
+            self.peak = self.in_use
+
+    async def async_acquire(self, size):
+        """Wait until size bytes can be taken from the budget."""
+        if not self._waiters and self._fits(size):
+            self.grow(size)
+            return
+        self.waits += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append((size, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the caller went away
+                self.release(size)
+            else:
+                self._wake()
+            raise
+
+    def release(self, size):
+        """Return size bytes to the budget."""
+        self.in_use -= size
+        self._wake()
+
+    def _wake(self):
+        """Admit waiting readers in order while their bodies fit."""
+        while self._waiters:
+            size, waiter = self._waiters[0]
+            if waiter.done():
+                self._waiters.popleft()
+                continue
+            if not self._fits(size):
+                break
+            self._waiters.popleft()
+            self.grow(size)
+            waiter.set_result(None)
+
+
+RESPONSE_BUDGET = ByteBudget()
+
+
+def body_length(response):
+    """Return the length of the body as it will be read, or None if unknown.
+
+    With a Content-Encoding such as gzip, aiohttp decompresses the body, so
+    Content-Length gives the compressed size and says nothing useful.
+    """
+    if response.headers.get("Content-Encoding", "identity").lower() != "identity":
+        return None
+    return response.content_length
+
+
+async def async_read_body(response, max_bytes=MAX_RESPONSE_BYTES, budget=None):
+    """Read an aiohttp response body into a single bytearray.
+
+    With a Content-Length the buffer is allocated once and filled chunk by
+    chunk, so the body never exists twice in memory as with read(). Bodies
+    over max_bytes raise HiggsAudioResponseTooLargeError, before reading
+    when the length is announced. With a budget, the body's size (or
+    RESPONSE_RESERVATION when unknown) is reserved while it is read.
+    """
+    length = body_length(response)
+    if length is not None and length > max_bytes:
+        raise HiggsAudioResponseTooLargeError(length, max_bytes)
+    reserved = length if length is not None else RESPONSE_RESERVATION
+    if budget is not None:
+        await budget.async_acquire(reserved)
+    try:
+        if length is not None:
+            buffer = bytearray(length)
+            offset = 0
+            with memoryview(buffer) as view:
+                async for chunk in response.content.iter_any():
+                    end = offset + len(chunk)
+                    if end > length:
+                        raise HiggsAudioResponseTooLargeError(end, length)
+                    view[offset:end] = chunk
+                    offset = end
+            del buffer[offset:]
+            return buffer
+
+        buffer = bytearray()
+        async for chunk in response.content.iter_any():
+            if len(buffer) + len(chunk) > max_bytes:
+                raise HiggsAudioResponseTooLargeError(len(buffer) + len(chunk), max_bytes)
+            buffer += chunk
+            if budget is not None and len(buffer) > reserved:
+                # Already admitted; growing past the estimate must not deadlock
+                budget.grow(len(buffer) - reserved)
+                reserved = len(buffer)
+        return buffer
+    finally:
+        if budget is not None:
+            budget.release(reserved)
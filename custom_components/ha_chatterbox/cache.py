@@ -0,0 +1,245 @@
+"""Persistent on-disk cache for synthesized Higgs Audio TTS audio."""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import zlib
+from collections import OrderedDict
+
+from homeassistant.core import HomeAssistant
+
+from .const import DEFAULT_CACHE_MAX_AGE, DEFAULT_CACHE_MAX_BYTES
+from .profiling import instrumented
+
+_LOGGER = logging.getLogger(__name__)
+
+# Payload fields that determine the generated audio
+CACHE_KEY_FIELDS = (
+    "text",
+    "predefined_voice_id",
+    "temperature",
+    "exaggeration",
+    "cfg_weight",
+    "seed",
+    "speed_factor",
+)
+
+CACHE_FILE_SUFFIX = ".cache"
+# PCM is deflated on disk; compressed formats are stored as received
+WAV_MAGIC = b"RIFF"
+DEFLATE_LEVEL = 6
+
+
+def cache_material(payload):
+    """Return the payload fields that determine the generated audio."""
+    material = {field: payload.get(field) for field in CACHE_KEY_FIELDS}
+    # Keep the keys of existing predefined voice WAV entries stable
+    output_format = payload.get("output_format", "wav")
+    if output_format != "wav":
+        material["output_format"] = output_format
+    if payload.get("reference_audio_filename"):
+        material["reference_audio_filename"] = payload["reference_audio_filename"]
+    return material
+
+
+def encode_material(material):
+    """Serialize cache key material; "text" sorts last among the fields."""
+    return json.dumps(material, sort_keys=True, separators=(",", ":"))
+
+
+def make_cache_key(payload):
+    """Return the content-addressed key for a /tts payload.
+
+    Returns None when the request is not deterministic (seed 0 means a
+    random seed on the server), as such audio must never be reused.
+    Payloads built from a preset template reuse its precomputed hash.
+    """
+    if not payload.get("seed"):
+        return None
+    template = getattr(payload, "template", None)
+    if template is not None:
+        return template.cache_key(payload["text"], payload.get("output_format", "wav"))
+    encoded = encode_material(cache_material(payload))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Size- and age-bounded LRU cache of audio files on disk.
+
+    The index lives in memory and is only touched from the event loop;
+    all file system access runs in the executor. Files are written to a
+    temporary name and renamed into place so readers never see a partial
+    entry. WAV audio is deflated on disk and sizes count stored bytes.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        directory,
+        max_bytes=DEFAULT_CACHE_MAX_BYTES,
+        max_age=DEFAULT_CACHE_MAX_AGE,
+    ):
+        """Initialize the cache."""
+        self.hass = hass
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        # key -> (size, last access timestamp), least recently used first
+        self._index = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self):
+        """Return cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._index),
+            "bytes": self._total_bytes,
+        }
+
+    def __contains__(self, key):
+        """Return True if a live entry exists for key."""
+        entry = self._index.get(key)
+        return entry is not None and not self._expired(entry[1], time.time())
+
+    def _path(self, key):
+        return os.path.join(self._directory, f"{key}{CACHE_FILE_SUFFIX}")
+
+    def _scan(self):
+        """Create the cache directory and list existing entries."""
+        os.makedirs(self._directory, exist_ok=True)
+        entries = []
+        now = time.time()
+        with os.scandir(self._directory) as it:
+            for entry in it:
+                if not entry.name.endswith(CACHE_FILE_SUFFIX):
+                    # Leftover temporary file from an interrupted write, not one in progress
+                    if entry.name.startswith(".tmp") and now - entry.stat().st_mtime > 3600:
+                        os.unlink(entry.path)
+                    continue
+                stat = entry.stat()
+                key = entry.name[: -len(CACHE_FILE_SUFFIX)]
+                entries.append((stat.st_mtime, key, stat.st_size))
+        entries.sort()
+        return entries
+
+    async def async_load(self):
+        """Rebuild the in-memory index from the cache directory.
+
+        Entries stored while the directory was being scanned are kept, so
+        the load can run in the background while the cache is in use.
+        """
+        try:
+            entries = await self.hass.async_add_executor_job(self._scan)
+        except OSError as ex:
+            _LOGGER.warning("Could not load Higgs Audio TTS cache from %s: %s", self._directory, ex)
+            return
+        live = self._index
+        self._index = OrderedDict()
+        self._total_bytes = 0
+        for mtime, key, size in entries:
+            if key not in live:
+                self._index[key] = (size, mtime)
+                self._total_bytes += size
+        for key, entry in live.items():
+            self._index[key] = entry
+            self._total_bytes += entry[0]
+        _LOGGER.debug(
+            "Loaded %d cached clips (%d bytes) from %s",
+            len(self._index), self._total_bytes, self._directory,
+        )
+        await self._async_evict()
+
+    def _read(self, key):
+        path = self._path(key)
+        with open(path, "rb") as f:
+            data = f.read()
+        # Record the access so LRU order survives a restart
+        os.utime(path)
+        if data[:4] != WAV_MAGIC and data[:1] == b"\x78":
+            data = zlib.decompress(data)
+        return data
+
+    @instrumented
+    async def async_get(self, key):
+        """Return cached audio for key, or None on a miss."""
+        entry = self._index.get(key)
+        if entry is None or self._expired(entry[1], time.time()):
+            self.misses += 1
+            return None
+        try:
+            data = await self.hass.async_add_executor_job(self._read, key)
+        except OSError as ex:
+            _LOGGER.debug("Dropping unreadable cache entry %s: %s", key, ex)
+            self._drop(key)
+            self.misses += 1
+            return None
+        if key in self._index:
+            self._index[key] = (entry[0], time.time())
+            self._index.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def _write(self, key, data):
+        if data[:4] == WAV_MAGIC:
+            data = zlib.compress(data, DEFLATE_LEVEL)
+        os.makedirs(self._directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, prefix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return len(data)
+
+    @instrumented
+    async def async_put(self, key, data):
+        """Store audio for key and evict entries over the limits."""
+        if not data or len(data) > self._max_bytes:
+            return
+        try:
+            size = await self.hass.async_add_executor_job(self._write, key, data)
+        except OSError as ex:
+            _LOGGER.warning("Could not write Higgs Audio TTS cache entry: %s", ex)
+            return
+        self._drop(key)
+        self._index[key] = (size, time.time())
+        self._total_bytes += size
+        await self._async_evict()
+
+    def _expired(self, accessed, now):
+        return self._max_age is not None and now - accessed > self._max_age
+
+    def _drop(self, key):
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[0]
+
+    def _unlink(self, keys):
+        for key in keys:
+            try:
+                os.unlink(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    async def _async_evict(self):
+        """Remove expired entries, then least recently used ones over the size limit."""
+        now = time.time()
+        victims = [key for key, (_, accessed) in self._index.items() if self._expired(accessed, now)]
+        for key in victims:
+            self._drop(key)
+        for key in list(self._index):
+            if self._total_bytes <= self._max_bytes:
+                break
+            victims.append(key)
+            self._drop(key)
+        if victims:
+            _LOGGER.debug("Evicting %d Higgs Audio TTS cache entries", len(victims))
+            await self.hass.async_add_executor_job(self._unlink, victims)
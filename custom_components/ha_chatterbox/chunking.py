@@ -0,0 +1,88 @@
+"""Client-side text segmentation and pipelined chunk synthesis."""
+import asyncio
+import re
+from collections import deque
+
+# Split after sentence punctuation (and any closing quotes or brackets)
+_SENTENCE_RE = re.compile(r"(?<=[.!?…])[\"')\]”’]*\s+")
+# Split after clause punctuation
+_CLAUSE_RE = re.compile(r"(?<=[,;:–—])\s+")
+
+
+def _split_long(piece, chunk_size):
+    """Break a piece longer than chunk_size on clauses, then on words."""
+    result = []
+    for clause in _CLAUSE_RE.split(piece):
+        if len(clause) <= chunk_size:
+            result.append(clause)
+            continue
+        current = ""
+        for word in clause.split():
+            if current and len(current) + 1 + len(word) > chunk_size:
+                result.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        if current:
+            result.append(current)
+    return result
+
+
+def split_text(text, chunk_size):
+    """Split text into chunks of at most chunk_size characters.
+
+    Chunks end on sentence boundaries where possible and fall back to
+    clause and word boundaries for very long sentences. A single word
+    longer than chunk_size is kept whole.
+    """
+    text = text.strip()
+    if len(text) <= chunk_size:
+        return [text]
+
+    pieces = []
+    for sentence in _SENTENCE_RE.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= chunk_size:
+            pieces.append(sentence)
+        else:
+            pieces.extend(_split_long(sentence, chunk_size))
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > chunk_size:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks or [text]
+
+
+async def async_pipeline(synthesize, payloads, concurrency):
+    """Synthesize payloads with bounded look-ahead and yield results in order.
+
+    Up to ``concurrency`` requests are in flight at once, so chunk N+1 is
+    being generated while chunk N is played back.
+    """
+    remaining = iter(payloads)
+    pending = deque()
+
+    def _schedule_next():
+        payload = next(remaining, None)
+        if payload is not None:
+            pending.append(asyncio.ensure_future(synthesize(payload)))
+
+    try:
+        for _ in range(max(1, concurrency)):
+            _schedule_next()
+        while pending:
+            result = await pending.popleft()
+            _schedule_next()
+            yield result
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,539 @@
+"""Async HTTP client for the Higgs Audio TTS server."""
+import asyncio
+import json
+import logging
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .buffers import RESPONSE_BUDGET, async_read_body, body_length
+from .coalesce import RequestCoalescer, make_request_key
+from .const import (
+    DEFAULT_MAX_IN_FLIGHT,
+    LOAD_BALANCING_LEAST_OUTSTANDING,
+    MAX_RESPONSE_BYTES,
+    PRIORITY_NORMAL,
+    RESPONSE_RESERVATION,
+)
+from .errors import (
+    HiggsAudioCircuitOpenError,
+    HiggsAudioConnectionError,
+    HiggsAudioError,
+    HiggsAudioResponseError,
+    HiggsAudioResponseTooLargeError,
+)
+from .metrics import RequestTiming, SynthesisMetrics, audio_duration
+from .pool import ServerPool
+from .presets import PresetPayload
+from .profiling import instrumented
+from .scheduler import SynthesisScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+TTS_TIMEOUT = 30
+INTERRUPT_TIMEOUT = 10
+HEALTH_TIMEOUT = 10
+QUEUE_TIMEOUT = 10
+VOICES_TIMEOUT = 10
+UPLOAD_TIMEOUT = 60
+STREAM_CHUNK_SIZE = 8192
+
+# /tts timeouts adapt to the observed time per character once enough
+# requests were timed, with a safety margin and fixed bounds
+ADAPTIVE_TIMEOUT_MIN_SAMPLES = 20
+ADAPTIVE_TIMEOUT_MARGIN = 3
+ADAPTIVE_TIMEOUT_MIN = 5
+ADAPTIVE_TIMEOUT_MAX = 120
+
+
+def _tts_body(payload):
+    """Return the request arguments sending a /tts payload as JSON."""
+    if isinstance(payload, PresetPayload):
+        return {"data": payload.body, "headers": {"Content-Type": "application/json"}}
+    return {"json": payload}
+
+
+def _timing_trace_config():
+    """Return a trace config recording connection setup time of timed requests."""
+
+    async def on_connection_create_start(session, context, params):
+        if isinstance(context.trace_request_ctx, RequestTiming):
+            context.trace_request_ctx.mark_connect_start()
+
+    async def on_connection_create_end(session, context, params):
+        if isinstance(context.trace_request_ctx, RequestTiming):
+            context.trace_request_ctx.mark_connect_end()
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    return trace_config
+
+
+class HiggsAudioClient:
+    """Shared async client for one or more Higgs Audio TTS servers.
+
+    Uses Home Assistant's pooled aiohttp connector so connections are kept
+    alive between requests and no call ever blocks the executor. With
+    several servers, each request goes to the least loaded healthy server
+    and fails over to the next one on connection errors or 5xx answers.
+    Synthesized audio is read within a byte budget shared by all clients.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        base_urls,
+        max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+        strategy=LOAD_BALANCING_LEAST_OUTSTANDING,
+        budget=RESPONSE_BUDGET,
+        timed=False,
+    ):
+        """Initialize the client.
+
+        A timed client records connection setup in its request timings. It
+        owns a session for the trace config, which async_close releases.
+        """
+        if isinstance(base_urls, str):
+            base_urls = [base_urls]
+        self.hass = hass
+        self._session = async_get_clientsession(hass)
+        self._owns_session = timed
+        if timed:
+            # Home Assistant's sessions may not be closed, so the timed one
+            # is a plain session sharing their connection pool
+            self._session = aiohttp.ClientSession(
+                connector=self._session.connector,
+                connector_owner=False,
+                headers=self._session.headers,
+                trace_configs=[_timing_trace_config()],
+            )
+        self._pool = ServerPool(base_urls, strategy)
+        self._coalescer = RequestCoalescer()
+        # The in-flight limit applies per server
+        self._scheduler = SynthesisScheduler(max_in_flight * len(self._pool))
+        self._budget = budget
+        self.metrics = SynthesisMetrics()
+
+    async def async_close(self):
+        """Close the client's own session, if it has one."""
+        if self._owns_session:
+            await self._session.close()
+
+    @property
+    def base_url(self):
+        """Return the base URL of the primary server."""
+        return self._pool.nodes[0].base_url
+
+    @property
+    def server_stats(self):
+        """Return the state of every server in the pool."""
+        return self._pool.stats
+
+    @property
+    def coalescing_stats(self):
+        """Return counters of requests shared with identical in-flight calls."""
+        return self._coalescer.stats
+
+    @property
+    def scheduler_stats(self):
+        """Return counters of the synthesis queue."""
+        return self._scheduler.stats
+
+    @property
+    def budget(self):
+        """Return the byte budget bounding response bodies held in memory."""
+        return self._budget
+
+    @property
+    def buffer_stats(self):
+        """Return counters of the response byte budget."""
+        return self._budget.stats
+
+    @property
+    def available(self):
+        """Return True unless every server's circuit is open."""
+        return self._pool.available
+
+    def tts_timeout(self, payload):
+        """Return the /tts timeout for a payload.
+
+        Uses the p99 server time per character seen so far, scaled by the
+        message length; until enough requests were timed the fixed
+        TTS_TIMEOUT applies.
+        """
+        if self.metrics.count("per_character") < ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+            return TTS_TIMEOUT
+        per_character = self.metrics.percentiles(field="per_character")[0.99]
+        estimate = per_character * max(len(payload.get("text", "")), 1)
+        return min(max(ADAPTIVE_TIMEOUT_MARGIN * estimate, ADAPTIVE_TIMEOUT_MIN), ADAPTIVE_TIMEOUT_MAX)
+
+    def _check_available(self):
+        """Fail fast while every server's circuit is open."""
+        if not self._pool.available:
+            raise HiggsAudioCircuitOpenError(self._pool.retry_after())
+
+    def cancel_pending(self):
+        """Cancel queued and in-flight synthesis requests."""
+        return self._scheduler.cancel_all()
+
+    async def _request(self, node, method, path, timeout, timing=None, budget=None, **kwargs):
+        """Perform a request and return the (status, body) of the response."""
+        url = f"{node.base_url}{path}"
+        try:
+            async with self._session.request(
+                method,
+                url,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                trace_request_ctx=timing,
+                **kwargs,
+            ) as response:
+                if timing is not None:
+                    timing.mark_first_byte()
+                body = await async_read_body(response, budget=budget)
+                return response.status, body
+        except asyncio.TimeoutError as ex:
+            raise HiggsAudioConnectionError(f"Timeout calling {url}") from ex
+        except aiohttp.ClientError as ex:
+            raise HiggsAudioConnectionError(f"Error calling {url}: {ex}") from ex
+
+    async def _request_ok(self, node, method, path, timeout, timing=None, budget=None, **kwargs):
+        """Perform a request and raise unless the server answered 200."""
+        status, body = await self._request(node, method, path, timeout, timing, budget, **kwargs)
+        if status != 200:
+            raise HiggsAudioResponseError(status, body.decode("utf-8", "replace"))
+        return body
+
+    @staticmethod
+    def _should_fail_over(ex):
+        """Return True if another server might succeed where this one failed."""
+        if isinstance(ex, HiggsAudioResponseError):
+            return ex.status >= 500
+        return isinstance(ex, HiggsAudioConnectionError)
+
+    async def _dispatch(self, method, path, timeout, timing=None, budget=None, **kwargs):
+        """Send a request to the best server, failing over on server errors."""
+        last_error = None
+        for node in self._pool.candidates():
+            probe = self._pool.acquire(node)
+            if probe is None:
+                continue
+            try:
+                body = await self._request_ok(node, method, path, timeout, timing, budget, **kwargs)
+            except HiggsAudioError as ex:
+                if not self._should_fail_over(ex):
+                    raise
+                self._pool.mark_failure(node)
+                last_error = ex
+                _LOGGER.debug("Higgs Audio TTS server %s failed: %s", node.base_url, ex)
+                continue
+            finally:
+                self._pool.release(node, probe)
+            self._pool.mark_success(node)
+            return body
+        raise last_error or HiggsAudioCircuitOpenError(self._pool.retry_after())
+
+    async def _dispatch_json(self, path, timeout):
+        """GET a JSON document from the best server."""
+        body = await self._dispatch("GET", path, timeout)
+        try:
+            return json.loads(body)
+        except ValueError as ex:
+            raise HiggsAudioError(f"Invalid JSON from {path}: {ex}") from ex
+
+    async def _conditional_get(self, node, path, headers, timeout):
+        """GET path from one server, returning (status, body, headers)."""
+        url = f"{node.base_url}{path}"
+        try:
+            async with self._session.get(
+                url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                body = await async_read_body(response)
+                if response.status not in (200, 304):
+                    raise HiggsAudioResponseError(response.status, body.decode("utf-8", "replace"))
+                return response.status, body, response.headers
+        except asyncio.TimeoutError as ex:
+            raise HiggsAudioConnectionError(f"Timeout calling {url}") from ex
+        except aiohttp.ClientError as ex:
+            raise HiggsAudioConnectionError(f"Error calling {url}: {ex}") from ex
+
+    async def async_get_conditional(self, path, etag=None, last_modified=None, timeout=VOICES_TIMEOUT):
+        """GET a JSON document unless it is unchanged since the last fetch.
+
+        Returns (document, etag, last_modified); the document is None when
+        the server answered 304 Not Modified.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        last_error = None
+        for node in self._pool.candidates():
+            try:
+                status, body, response_headers = await self._conditional_get(node, path, headers, timeout)
+            except HiggsAudioError as ex:
+                if not self._should_fail_over(ex):
+                    raise
+                self._pool.mark_failure(node)
+                last_error = ex
+                continue
+            self._pool.mark_success(node)
+            if status == 304:
+                return None, etag, last_modified
+            try:
+                document = json.loads(body)
+            except ValueError as ex:
+                raise HiggsAudioError(f"Invalid JSON from {path}: {ex}") from ex
+            return document, response_headers.get("ETag"), response_headers.get("Last-Modified")
+        raise last_error or HiggsAudioCircuitOpenError(self._pool.retry_after())
+
+    async def _async_list_references(self, node):
+        """Return the clone reference filenames one server holds."""
+        body = await self._request_ok(node, "GET", "/get_reference_files", VOICES_TIMEOUT)
+        try:
+            files = json.loads(body)
+        except ValueError as ex:
+            raise HiggsAudioError(f"Invalid JSON from /get_reference_files: {ex}") from ex
+        return {item["filename"] if isinstance(item, dict) else item for item in files}
+
+    async def _async_upload_node(self, node, filename, data):
+        """Upload a reference clip to one server unless it already holds it."""
+        if node.references is None:
+            node.references = await self._async_list_references(node)
+        if filename in node.references:
+            return False
+        form = aiohttp.FormData()
+        form.add_field("files", data, filename=filename)
+        await self._request_ok(node, "POST", "/upload_reference", UPLOAD_TIMEOUT, data=form)
+        node.references.add(filename)
+        return True
+
+    async def async_upload_reference(self, filename, data):
+        """Make a clone reference available on every server.
+
+        Servers known to hold the file are skipped. Returns the number of
+        servers the clip was sent to.
+        """
+        results = await asyncio.gather(
+            *(self._async_upload_node(node, filename, data) for node in self._pool.nodes),
+            return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, Exception)]
+        for result in errors:
+            if not isinstance(result, HiggsAudioError):
+                raise result
+        if len(errors) == len(results):
+            raise errors[0]
+        for node, result in zip(self._pool.nodes, results, strict=True):
+            if isinstance(result, HiggsAudioError):
+                _LOGGER.warning("Could not upload %s to %s: %s", filename, node.base_url, result)
+        return sum(1 for result in results if result is True)
+
+    @instrumented
+    async def async_synthesize(
+        self, payload, priority=PRIORITY_NORMAL, deadline=None, timeout=None
+    ) -> bytes:
+        """Synthesize speech for a /tts payload and return the audio bytes.
+
+        Identical requests issued while one is already in flight share its
+        result instead of triggering another synthesis on the server. New
+        requests wait in the priority queue for a free server slot and are
+        dropped if their deadline (seconds) passes first. While every
+        server's circuit is open the call fails at once without queueing.
+        The body is read into one buffer once the byte budget allows it.
+        """
+        self._check_available()
+        if timeout is None:
+            timeout = self.tts_timeout(payload)
+        timing = RequestTiming(payload)
+
+        async def _timed_request():
+            timing.mark_started()
+            try:
+                body = await self._dispatch(
+                    "POST", "/tts", timeout, timing, self._budget, **_tts_body(payload)
+                )
+            except HiggsAudioError:
+                timing.mark_finished(0, success=False)
+                self.metrics.async_record(timing)
+                raise
+            timing.mark_finished(len(body), audio_duration(body))
+            self.metrics.async_record(timing)
+            return body
+
+        return await self._coalescer.async_call(
+            make_request_key(payload),
+            lambda: self._scheduler.async_run(_timed_request, priority, deadline),
+        )
+
+    async def async_stream_synthesize(
+        self,
+        payload,
+        priority=PRIORITY_NORMAL,
+        deadline=None,
+        timeout=None,
+        chunk_size=STREAM_CHUNK_SIZE,
+    ):
+        """Synthesize speech and yield the audio bytes as they arrive.
+
+        Identical streams running at the same time share one server call,
+        and a stream reuses the bytes of an identical full request already
+        in flight. The timeout bounds the wait for the response headers and
+        each read, not the whole transfer, so long messages can keep
+        streaming. Bodies over MAX_RESPONSE_BYTES are cut off with an error.
+        """
+        key = make_request_key(payload)
+        inflight = self._coalescer.join_inflight(key)
+        if inflight is not None:
+            # An identical full request is already running; reuse its bytes
+            yield await asyncio.shield(inflight)
+            return
+
+        stream = self._coalescer.async_stream(
+            key, lambda: self._timed_stream(payload, priority, deadline, timeout, chunk_size)
+        )
+        async for chunk in stream:
+            yield chunk
+
+    async def _timed_stream(self, payload, priority, deadline, timeout, chunk_size):
+        """Stream one /tts call through the scheduler, recording its metrics."""
+        self._check_available()
+        if timeout is None:
+            timeout = self.tts_timeout(payload)
+        timing = RequestTiming(payload)
+        stream = self._scheduler.async_stream(
+            lambda: self._stream_tts(payload, timeout, chunk_size, timing), priority, deadline
+        )
+        first_chunk = None
+        size = 0
+        try:
+            async for chunk in stream:
+                if first_chunk is None:
+                    timing.mark_first_byte()
+                    first_chunk = chunk
+                size += len(chunk)
+                yield chunk
+        except HiggsAudioError:
+            timing.mark_finished(size, success=False)
+            self.metrics.async_record(timing)
+            raise
+        timing.mark_finished(size, audio_duration(first_chunk, size) if first_chunk else None)
+        self.metrics.async_record(timing)
+
+    async def _stream_tts(self, payload, timeout, chunk_size, timing=None):
+        """Stream /tts from the best server, failing over before the first byte."""
+        if timing is not None:
+            timing.mark_started()
+        last_error = None
+        for node in self._pool.candidates():
+            probe = self._pool.acquire(node)
+            if probe is None:
+                continue
+            started = False
+            try:
+                async for chunk in self._stream_node(node, payload, timeout, chunk_size, timing):
+                    started = True
+                    yield chunk
+            except HiggsAudioError as ex:
+                if self._should_fail_over(ex):
+                    self._pool.mark_failure(node)
+                if started or not self._should_fail_over(ex):
+                    raise
+                last_error = ex
+                _LOGGER.debug("Higgs Audio TTS server %s failed: %s", node.base_url, ex)
+                continue
+            finally:
+                self._pool.release(node, probe)
+            self._pool.mark_success(node)
+            return
+        raise last_error or HiggsAudioCircuitOpenError(self._pool.retry_after())
+
+    async def _stream_node(self, node, payload, timeout, chunk_size, timing=None):
+        """Yield the raw /tts response body of one server in chunks.
+
+        The body's size is reserved from the byte budget until it has been
+        received, as for full reads.
+        """
+        url = f"{node.base_url}/tts"
+        client_timeout = aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout)
+        try:
+            async with self._session.post(
+                url, timeout=client_timeout, trace_request_ctx=timing, **_tts_body(payload)
+            ) as response:
+                if response.status != 200:
+                    text = await response.text(errors="replace")
+                    raise HiggsAudioResponseError(response.status, text)
+                length = body_length(response)
+                if length is not None and length > MAX_RESPONSE_BYTES:
+                    raise HiggsAudioResponseTooLargeError(length, MAX_RESPONSE_BYTES)
+                # Admitted like a full read; the body stays in the socket until then
+                reserved = length if length is not None else RESPONSE_RESERVATION
+                await self._budget.async_acquire(reserved)
+                try:
+                    size = 0
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        size += len(chunk)
+                        if size > MAX_RESPONSE_BYTES:
+                            raise HiggsAudioResponseTooLargeError(size, MAX_RESPONSE_BYTES)
+                        if size > reserved:
+                            self._budget.grow(size - reserved)
+                            reserved = size
+                        yield chunk
+                finally:
+                    self._budget.release(reserved)
+        except asyncio.TimeoutError as ex:
+            raise HiggsAudioConnectionError(f"Timeout calling {url}") from ex
+        except aiohttp.ClientError as ex:
+            raise HiggsAudioConnectionError(f"Error calling {url}: {ex}") from ex
+
+    async def async_interrupt(self) -> None:
+        """Interrupt the current playback on every server."""
+        results = await asyncio.gather(
+            *(
+                self._request_ok(node, "POST", "/interrupt", INTERRUPT_TIMEOUT)
+                for node in self._pool.nodes
+            ),
+            return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, Exception)]
+        if len(errors) == len(results):
+            raise errors[0]
+
+    async def async_health(self, timeout=HEALTH_TIMEOUT) -> dict:
+        """Return the health document of the best server."""
+        return await self._dispatch_json("/health", timeout)
+
+    async def async_queue_status(self) -> dict:
+        """Return the queue status document of the best server."""
+        return await self._dispatch_json("/queue/status", QUEUE_TIMEOUT)
+
+    async def _async_refresh_node(self, node):
+        try:
+            await self._request_ok(node, "GET", "/health", HEALTH_TIMEOUT)
+            status, body = await self._request(node, "GET", "/queue/status", QUEUE_TIMEOUT)
+        except HiggsAudioError as ex:
+            _LOGGER.debug("Higgs Audio TTS health check of %s failed: %s", node.base_url, ex)
+            self._pool.mark_failure(node)
+            return
+        self._pool.mark_success(node)
+        if status == 200:
+            try:
+                node.queue_size = int(json.loads(body).get("queue_size", 0))
+            except (ValueError, TypeError, AttributeError):
+                node.queue_size = 0
+
+    async def async_refresh_health(self, *_):
+        """Probe every server, ejecting failing ones and re-admitting recovered ones."""
+        await asyncio.gather(*(self._async_refresh_node(node) for node in self._pool.nodes))
+
+    async def async_check_connection(self) -> bool:
+        """Return True if any server answers its health endpoint."""
+        try:
+            await self._dispatch("GET", "/health", HEALTH_TIMEOUT)
+        except HiggsAudioError as ex:
+            _LOGGER.debug("Higgs Audio TTS health check failed: %s", ex)
+            return False
+        return True
@@ -0,0 +1,206 @@
+"""Single-flight coalescing of identical in-flight synthesis requests."""
+import asyncio
+import json
+import logging
+
+from .const import COALESCE_REPLAY_BYTES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def make_request_key(payload):
+    """Return a normalized key for a /tts payload."""
+    body = getattr(payload, "body", None)
+    if body is not None:
+        # Preset payloads are serialized once in a fixed field order
+        return body
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+class SharedStream:
+    """One streaming server call whose chunks are replayed to every caller.
+
+    The chunks are kept so callers joining late start from the beginning,
+    until more than replay_limit bytes have arrived. After that nobody can
+    join, chunks every caller has passed are dropped and reading pauses
+    while the slowest caller is more than replay_limit bytes behind, so a
+    long stream is not held in memory. The call is cancelled when its
+    last caller goes away.
+    """
+
+    def __init__(self, source, replay_limit, on_closed):
+        """Start reading source; on_closed is called once joining ends."""
+        self._chunks = []
+        # Index of the first kept chunk among all chunks received
+        self._offset = 0
+        self._positions = {}
+        self._size = 0
+        # Bytes of the kept chunks
+        self._kept = 0
+        self._drained = None
+        self._finished = False
+        self._error = None
+        self._waiters = []
+        self._replay_limit = replay_limit
+        self._on_closed = on_closed
+        self.joinable = True
+        self._task = asyncio.ensure_future(self._pump(source))
+
+    def _close(self):
+        if self.joinable:
+            self.joinable = False
+            self._on_closed()
+
+    def _wake(self):
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._waiters.clear()
+
+    def _trim(self):
+        """Drop chunks every caller has passed, once nobody can join."""
+        if self.joinable or not self._positions:
+            return
+        passed = min(self._positions.values()) - self._offset
+        if passed > 0:
+            self._kept -= sum(len(chunk) for chunk in self._chunks[:passed])
+            del self._chunks[:passed]
+            self._offset += passed
+            if self._drained is not None and not self._drained.done():
+                self._drained.set_result(None)
+
+    async def _pump(self, source):
+        try:
+            async for chunk in source:
+                self._chunks.append(chunk)
+                self._size += len(chunk)
+                self._kept += len(chunk)
+                if self._size > self._replay_limit:
+                    self._close()
+                    self._trim()
+                self._wake()
+                while not self.joinable and self._kept > self._replay_limit:
+                    # Let the slowest caller catch up before reading on
+                    self._drained = asyncio.get_running_loop().create_future()
+                    await self._drained
+        except Exception as ex:  # handed to every caller
+            self._error = ex
+        finally:
+            self._finished = True
+            self._close()
+            self._wake()
+            await source.aclose()
+
+    def subscribe(self):
+        """Return an iterator over all chunks; must be called while joinable."""
+        token = object()
+        self._positions[token] = 0
+        return self._iterate(token)
+
+    async def _iterate(self, token):
+        try:
+            while True:
+                index = self._positions[token] - self._offset
+                if index < len(self._chunks):
+                    chunk = self._chunks[index]
+                    self._positions[token] += 1
+                    self._trim()
+                    yield chunk
+                    continue
+                if self._finished:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+                await waiter
+        finally:
+            del self._positions[token]
+            if not self._positions and not self._finished:
+                self._close()
+                self._task.cancel()
+            else:
+                self._trim()
+
+
+class RequestCoalescer:
+    """Share one server call between identical concurrent requests.
+
+    The first caller for a key starts the call; callers arriving while it
+    is still running await the same task and receive the same bytes. A
+    caller being cancelled does not cancel the shared call for the others.
+    Streaming calls are shared the same way through SharedStream, and a
+    full request joins a stream already running for its key.
+    """
+
+    def __init__(self, replay_limit=COALESCE_REPLAY_BYTES):
+        """Initialize the coalescer."""
+        self._inflight = {}
+        self._streams = {}
+        self._replay_limit = replay_limit
+        self.requests = 0
+        self.server_calls = 0
+
+    @property
+    def stats(self):
+        """Return coalescing counters."""
+        return {
+            "requests": self.requests,
+            "server_calls": self.server_calls,
+            "saved_calls": self.requests - self.server_calls,
+            "in_flight": len(self._inflight) + len(self._streams),
+        }
+
+    def join_inflight(self, key):
+        """Return the running full call for key to share, or None.
+
+        A returned task counts as a coalesced request; await it through
+        asyncio.shield so the caller's cancellation does not reach it.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.requests += 1
+            _LOGGER.debug("Joining in-flight Higgs Audio TTS request")
+        return task
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    async def async_call(self, key, factory):
+        """Return the result of factory(), sharing it with identical calls."""
+        self.requests += 1
+        stream = self._streams.get(key)
+        if stream is not None:
+            _LOGGER.debug("Joining in-flight Higgs Audio TTS stream")
+            return b"".join([chunk async for chunk in stream.subscribe()])
+        task = self._inflight.get(key)
+        if task is None:
+            self.server_calls += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            _LOGGER.debug("Joining in-flight Higgs Audio TTS request")
+        return await asyncio.shield(task)
+
+    async def async_stream(self, key, factory):
+        """Yield the chunks of factory(), sharing them with identical streams."""
+        self.requests += 1
+        stream = self._streams.get(key)
+        if stream is None:
+            self.server_calls += 1
+
+            def closed():
+                if self._streams.get(key) is stream:
+                    del self._streams[key]
+
+            stream = SharedStream(factory(), self._replay_limit, closed)
+            self._streams[key] = stream
+        else:
+            _LOGGER.debug("Joining in-flight Higgs Audio TTS stream")
+        async for chunk in stream.subscribe():
+            yield chunk
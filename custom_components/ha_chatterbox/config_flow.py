@@ -1,15 +1,17 @@
 """Config flow for HA Higgs Audio TTS integration."""
 import logging
 import asyncio
-import voluptuous as vol
-import requests
 import json
-import os
+import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_NAME
+from homeassistant.helpers import entity_registry as er, selector
 
+from .client import HiggsAudioClient
+from .phrase_templates import parse_phrase_templates
+from .presets import SEED_VALIDATOR, param_validator, parse_presets
 from .const import (
     DOMAIN, 
     DEFAULT_HOST, 
@@ -26,27 +28,42 @@ from .const import (
     CONF_CFG_WEIGHT,
     CONF_SEED,
     CONF_SPEED_FACTOR,
+    CONF_CHUNK_SIZE,
+    CONF_SYNTHESIS_CONCURRENCY,
+    CONF_MAX_IN_FLIGHT,
+    CONF_SERVERS,
+    CONF_LOAD_BALANCING,
+    CONF_WARMUP_PHRASES,
+    CONF_WARMUP_TOP_N,
+    CONF_METRICS_ENDPOINT,
+    CONF_OUTPUT_FORMAT,
+    CONF_FALLBACK_ENGINE,
+    CONF_PRESETS,
+    CONF_TRIM_SILENCE,
+    CONF_NORMALIZE_LOUDNESS,
+    CONF_LOCAL_SPEED,
+    CONF_NORMALIZE_TEXT,
+    CONF_PHRASE_TEMPLATES,
+    CONF_DEBUG_INSTRUMENTATION,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_SYNTHESIS_CONCURRENCY,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_WARMUP_TOP_N,
+    DEFAULT_OUTPUT_FORMAT,
+    DEFAULT_PRESETS,
+    OUTPUT_FORMATS,
+    LOAD_BALANCING_LEAST_OUTSTANDING,
+    LOAD_BALANCING_STRATEGIES,
     AVAILABLE_VOICES
 )
 
 _LOGGER = logging.getLogger(__name__)
 
-def _load_voices_from_strings():
-    """Load voice options from strings.json file."""
-    try:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        strings_path = os.path.join(current_dir, "strings.json")
-        if os.path.exists(strings_path):
-            with open(strings_path, 'r', encoding='utf-8') as f:
-                strings_data = json.load(f)
-                voices = strings_data.get("voices", {})
-                if voices:
-                    voice_list = list(voices.keys())
-                    _LOGGER.debug("Config flow loaded %d voices from strings.json: %s", len(voice_list), voice_list)
-                    return voice_list
-    except Exception as ex:
-        _LOGGER.warning("Config flow could not load voices from strings.json: %s", ex)
-    _LOGGER.debug("Config flow using fallback voices from const.py")
+def _available_voices(hass, entry_id=None):
+    """Return the voices of an entry's catalog, or the built-in list."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry_id) if entry_id else None
+    if entry_data and "voices" in entry_data:
+        return entry_data["voices"].voices
     return AVAILABLE_VOICES
 
 class HaHiggsAudioConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -80,18 +97,16 @@ class HaHiggsAudioConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                             CONF_CFG_WEIGHT: user_input.get(CONF_CFG_WEIGHT, DEFAULT_CFG_WEIGHT),
                             CONF_SEED: user_input.get(CONF_SEED, DEFAULT_SEED),
                             CONF_SPEED_FACTOR: user_input.get(CONF_SPEED_FACTOR, DEFAULT_SPEED_FACTOR),
+                            CONF_SERVERS: user_input.get(CONF_SERVERS, ""),
                         }
                     )
                 else:
                     errors["base"] = "cannot_connect"
-            except requests.RequestException:
-                _LOGGER.error("Connection error to HA Higgs Audio TTS server")
-                errors["base"] = "cannot_connect"
             except Exception as ex:
                 _LOGGER.error("Unexpected error connecting to HA Higgs Audio TTS: %s", ex)
                 errors["base"] = "unknown"
 
-        available_voices = _load_voices_from_strings()
+        available_voices = _available_voices(self.hass)
         return self.async_show_form(
             step_id="user",
             data_schema=vol.Schema(
@@ -100,34 +115,20 @@ class HaHiggsAudioConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     vol.Required(CONF_PORT, default=DEFAULT_PORT): vol.Coerce(int),
                     vol.Optional(CONF_NAME, default="HA Higgs Audio TTS"): str,
                     vol.Optional(CONF_VOICE, default=DEFAULT_VOICE): vol.In(available_voices),
-                    vol.Optional(CONF_TEMPERATURE, default=DEFAULT_TEMPERATURE): vol.All(
-                        vol.Coerce(float), vol.Range(min=0.0, max=1.0)
-                    ),
-                    vol.Optional(CONF_EXAGGERATION, default=DEFAULT_EXAGGERATION): vol.All(
-                        vol.Coerce(float), vol.Range(min=0.0, max=2.0)
-                    ),
-                    vol.Optional(CONF_CFG_WEIGHT, default=DEFAULT_CFG_WEIGHT): vol.All(
-                        vol.Coerce(float), vol.Range(min=0.0, max=1.0)
-                    ),
-                    vol.Optional(CONF_SEED, default=DEFAULT_SEED): vol.Coerce(int),
-                    vol.Optional(CONF_SPEED_FACTOR, default=DEFAULT_SPEED_FACTOR): vol.All(
-                        vol.Coerce(float), vol.Range(min=0.5, max=2.0)
-                    ),
+                    vol.Optional(CONF_TEMPERATURE, default=DEFAULT_TEMPERATURE): param_validator(CONF_TEMPERATURE),
+                    vol.Optional(CONF_EXAGGERATION, default=DEFAULT_EXAGGERATION): param_validator(CONF_EXAGGERATION),
+                    vol.Optional(CONF_CFG_WEIGHT, default=DEFAULT_CFG_WEIGHT): param_validator(CONF_CFG_WEIGHT),
+                    vol.Optional(CONF_SEED, default=DEFAULT_SEED): SEED_VALIDATOR,
+                    vol.Optional(CONF_SPEED_FACTOR, default=DEFAULT_SPEED_FACTOR): param_validator(CONF_SPEED_FACTOR),
+                    vol.Optional(CONF_SERVERS, default=""): str,
                 }
             ),
             errors=errors,
         )
 
     async def _test_connection(self, host: str, port: int) -> bool:
-        url = f"http://{host}:{port}/health"
-        def _make_request():
-            try:
-                response = requests.get(url, timeout=10)
-                return response.status_code == 200
-            except requests.RequestException as ex:
-                _LOGGER.error("Connection test failed: %s", ex)
-                raise
-        return await self.hass.async_add_executor_job(_make_request)
+        client = HiggsAudioClient(self.hass, f"http://{host}:{port}")
+        return await client.async_check_connection()
 
     @staticmethod
     @callback
@@ -139,9 +140,31 @@ class HAChatterboxOptionsFlowHandler(config_entries.OptionsFlow):
         self.config_entry = config_entry
     async def async_step_init(self, user_input=None):
         return await self.async_step_tts_options(user_input)
+    @callback
+    def _own_engines(self):
+        """Return this integration's TTS entities, which cannot be their own fallback."""
+        return [
+            entry.entity_id
+            for entry in er.async_get(self.hass).entities.values()
+            if entry.platform == DOMAIN and entry.domain == "tts"
+        ]
     async def async_step_tts_options(self, user_input=None):
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            try:
+                parse_presets(user_input.get(CONF_PRESETS))
+            except vol.Invalid as ex:
+                _LOGGER.debug("Invalid Higgs Audio TTS presets: %s", ex)
+                errors[CONF_PRESETS] = "invalid_presets"
+            try:
+                parse_phrase_templates(user_input.get(CONF_PHRASE_TEMPLATES))
+            except vol.Invalid as ex:
+                _LOGGER.debug("Invalid Higgs Audio TTS phrase templates: %s", ex)
+                errors[CONF_PHRASE_TEMPLATES] = "invalid_phrase_templates"
+            if user_input.get(CONF_FALLBACK_ENGINE) in self._own_engines():
+                errors[CONF_FALLBACK_ENGINE] = "invalid_fallback_engine"
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
         options = self.config_entry.options
         data = self.config_entry.data
         current_voice = options.get(CONF_VOICE, data.get(CONF_VOICE, DEFAULT_VOICE))
@@ -150,25 +173,87 @@ class HAChatterboxOptionsFlowHandler(config_entries.OptionsFlow):
         current_cfg_weight = options.get(CONF_CFG_WEIGHT, data.get(CONF_CFG_WEIGHT, DEFAULT_CFG_WEIGHT))
         current_seed = options.get(CONF_SEED, data.get(CONF_SEED, DEFAULT_SEED))
         current_speed = options.get(CONF_SPEED_FACTOR, data.get(CONF_SPEED_FACTOR, DEFAULT_SPEED_FACTOR))
-        available_voices = _load_voices_from_strings()
+        current_output_format = options.get(
+            CONF_OUTPUT_FORMAT, data.get(CONF_OUTPUT_FORMAT, DEFAULT_OUTPUT_FORMAT)
+        )
+        current_chunk_size = options.get(CONF_CHUNK_SIZE, data.get(CONF_CHUNK_SIZE, DEFAULT_CHUNK_SIZE))
+        current_concurrency = options.get(
+            CONF_SYNTHESIS_CONCURRENCY, data.get(CONF_SYNTHESIS_CONCURRENCY, DEFAULT_SYNTHESIS_CONCURRENCY)
+        )
+        current_max_in_flight = options.get(
+            CONF_MAX_IN_FLIGHT, data.get(CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT)
+        )
+        current_servers = options.get(CONF_SERVERS, data.get(CONF_SERVERS, ""))
+        current_load_balancing = options.get(
+            CONF_LOAD_BALANCING, data.get(CONF_LOAD_BALANCING, LOAD_BALANCING_LEAST_OUTSTANDING)
+        )
+        current_warmup_phrases = options.get(CONF_WARMUP_PHRASES, data.get(CONF_WARMUP_PHRASES, ""))
+        current_warmup_top_n = options.get(CONF_WARMUP_TOP_N, data.get(CONF_WARMUP_TOP_N, DEFAULT_WARMUP_TOP_N))
+        current_metrics_endpoint = options.get(CONF_METRICS_ENDPOINT, False)
+        current_fallback_engine = options.get(CONF_FALLBACK_ENGINE, data.get(CONF_FALLBACK_ENGINE))
+        current_presets = options.get(CONF_PRESETS) or json.dumps(DEFAULT_PRESETS)
+        current_trim_silence = options.get(CONF_TRIM_SILENCE, False)
+        current_normalize_loudness = options.get(CONF_NORMALIZE_LOUDNESS, False)
+        current_local_speed = options.get(CONF_LOCAL_SPEED, False)
+        current_normalize_text = options.get(CONF_NORMALIZE_TEXT, False)
+        current_phrase_templates = options.get(CONF_PHRASE_TEMPLATES, "")
+        current_debug_instrumentation = options.get(CONF_DEBUG_INSTRUMENTATION, False)
+        if user_input is not None:
+            current_presets = user_input.get(CONF_PRESETS, current_presets)
+            current_phrase_templates = user_input.get(CONF_PHRASE_TEMPLATES, current_phrase_templates)
+        available_voices = _available_voices(self.hass, self.config_entry.entry_id)
+        if current_voice not in available_voices:
+            available_voices = [current_voice, *available_voices]
         return self.async_show_form(
             step_id="tts_options",
             data_schema=vol.Schema(
                 {
                     vol.Optional(CONF_VOICE, default=current_voice): vol.In(available_voices),
-                    vol.Optional(CONF_TEMPERATURE, default=current_temperature): vol.All(
-                        vol.Coerce(float), vol.Range(min=0.0, max=1.0)
+                    vol.Optional(CONF_TEMPERATURE, default=current_temperature): param_validator(CONF_TEMPERATURE),
+                    vol.Optional(CONF_EXAGGERATION, default=current_exaggeration): param_validator(CONF_EXAGGERATION),
+                    vol.Optional(CONF_CFG_WEIGHT, default=current_cfg_weight): param_validator(CONF_CFG_WEIGHT),
+                    vol.Optional(CONF_SEED, default=current_seed): SEED_VALIDATOR,
+                    vol.Optional(CONF_SPEED_FACTOR, default=current_speed): param_validator(CONF_SPEED_FACTOR),
+                    vol.Optional(CONF_OUTPUT_FORMAT, default=current_output_format): vol.In(
+                        OUTPUT_FORMATS
                     ),
-                    vol.Optional(CONF_EXAGGERATION, default=current_exaggeration): vol.All(
-                        vol.Coerce(float), vol.Range(min=0.0, max=2.0)
+                    vol.Optional(CONF_CHUNK_SIZE, default=current_chunk_size): vol.All(
+                        vol.Coerce(int), vol.Range(min=50, max=500)
                     ),
-                    vol.Optional(CONF_CFG_WEIGHT, default=current_cfg_weight): vol.All(
-                        vol.Coerce(float), vol.Range(min=0.0, max=1.0)
+                    vol.Optional(CONF_SYNTHESIS_CONCURRENCY, default=current_concurrency): vol.All(
+                        vol.Coerce(int), vol.Range(min=1, max=8)
                     ),
-                    vol.Optional(CONF_SEED, default=current_seed): vol.Coerce(int),
-                    vol.Optional(CONF_SPEED_FACTOR, default=current_speed): vol.All(
-                        vol.Coerce(float), vol.Range(min=0.5, max=2.0)
+                    vol.Optional(CONF_MAX_IN_FLIGHT, default=current_max_in_flight): vol.All(
+                        vol.Coerce(int), vol.Range(min=1, max=16)
                     ),
+                    vol.Optional(CONF_SERVERS, default=current_servers): str,
+                    vol.Optional(CONF_LOAD_BALANCING, default=current_load_balancing): vol.In(
+                        LOAD_BALANCING_STRATEGIES
+                    ),
+                    vol.Optional(CONF_WARMUP_PHRASES, default=current_warmup_phrases): str,
+                    vol.Optional(CONF_WARMUP_TOP_N, default=current_warmup_top_n): vol.All(
+                        vol.Coerce(int), vol.Range(min=0, max=100)
+                    ),
+                    vol.Optional(CONF_METRICS_ENDPOINT, default=current_metrics_endpoint): bool,
+                    vol.Optional(
+                        CONF_FALLBACK_ENGINE, description={"suggested_value": current_fallback_engine}
+                    ): selector.EntitySelector(
+                        selector.EntitySelectorConfig(domain="tts", exclude_entities=self._own_engines())
+                    ),
+                    vol.Optional(CONF_PRESETS, default=current_presets): selector.TextSelector(
+                        selector.TextSelectorConfig(multiline=True)
+                    ),
+                    vol.Optional(CONF_TRIM_SILENCE, default=current_trim_silence): bool,
+                    vol.Optional(CONF_NORMALIZE_LOUDNESS, default=current_normalize_loudness): bool,
+                    vol.Optional(CONF_LOCAL_SPEED, default=current_local_speed): bool,
+                    vol.Optional(CONF_NORMALIZE_TEXT, default=current_normalize_text): bool,
+                    vol.Optional(
+                        CONF_PHRASE_TEMPLATES, default=current_phrase_templates
+                    ): selector.TextSelector(selector.TextSelectorConfig(multiline=True)),
+                    vol.Optional(
+                        CONF_DEBUG_INSTRUMENTATION, default=current_debug_instrumentation
+                    ): bool,
                 }
             ),
+            errors=errors,
         )
@@ -13,6 +13,14 @@ DEFAULT_EXAGGERATION = 1.0
 DEFAULT_CFG_WEIGHT = 0.5
 DEFAULT_SEED = 101
 DEFAULT_SPEED_FACTOR = 1.0
+DEFAULT_CHUNK_SIZE = 120
+DEFAULT_SYNTHESIS_CONCURRENCY = 2
+DEFAULT_MAX_IN_FLIGHT = 2
+# Segments of a dialogue script requested ahead at once; the client's
+# in-flight limit still bounds what reaches the server
+DIALOGUE_CONCURRENCY = 8
+DEFAULT_DEADLINE = 60
+DEFAULT_OUTPUT_FORMAT = "wav"
 
 # Configuration keys
 CONF_VOICE = "voice"
@@ -21,8 +29,111 @@ CONF_EXAGGERATION = "exaggeration"
 CONF_CFG_WEIGHT = "cfg_weight"
 CONF_SEED = "seed"
 CONF_SPEED_FACTOR = "speed_factor"
+CONF_CHUNK_SIZE = "chunk_size"
+CONF_SYNTHESIS_CONCURRENCY = "synthesis_concurrency"
+CONF_MAX_IN_FLIGHT = "max_in_flight"
+CONF_SERVERS = "servers"
+CONF_LOAD_BALANCING = "load_balancing"
+CONF_WARMUP_PHRASES = "warmup_phrases"
+CONF_WARMUP_TOP_N = "warmup_top_n"
+CONF_METRICS_ENDPOINT = "metrics_endpoint"
+CONF_OUTPUT_FORMAT = "output_format"
+CONF_MEDIA_PLAYER = "media_player"
+CONF_FALLBACK_ENGINE = "fallback_engine"
+CONF_PRESET = "preset"
+CONF_PRESETS = "presets"
+CONF_TRIM_SILENCE = "trim_silence"
+CONF_NORMALIZE_LOUDNESS = "normalize_loudness"
+CONF_LOCAL_SPEED = "local_speed"
+CONF_NORMALIZE_TEXT = "normalize_text"
+CONF_PHRASE_TEMPLATES = "phrase_templates"
+CONF_DEBUG_INSTRUMENTATION = "debug_instrumentation"
+CONF_PRIORITY = "priority"
+CONF_DEADLINE = "deadline"
 
-# Available voices (fallback if strings.json not available)
+# Named generation presets, editable in the options
+DEFAULT_PRESETS = {
+    "alert": {"temperature": 0.6, "exaggeration": 1.4, "cfg_weight": 0.6, "speed_factor": 1.1},
+    "bedtime": {"temperature": 0.7, "exaggeration": 0.5, "cfg_weight": 0.4, "speed_factor": 0.85},
+    "briefing": {"temperature": 0.8, "exaggeration": 1.0, "cfg_weight": 0.5, "speed_factor": 1.05},
+}
+
+# Request priorities, lower values are served first
+PRIORITY_CRITICAL = 0
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 2
+PRIORITY_LOW = 3
+PRIORITIES = {
+    "critical": PRIORITY_CRITICAL,
+    "high": PRIORITY_HIGH,
+    "normal": PRIORITY_NORMAL,
+    "low": PRIORITY_LOW,
+}
+
+# Audio output formats
+OUTPUT_FORMAT_AUTO = "auto"
+OUTPUT_FORMAT_WAV = "wav"
+OUTPUT_FORMAT_MP3 = "mp3"
+OUTPUT_FORMAT_OPUS = "opus"
+OUTPUT_FORMATS = [OUTPUT_FORMAT_AUTO, OUTPUT_FORMAT_WAV, OUTPUT_FORMAT_MP3, OUTPUT_FORMAT_OPUS]
+# Messages at least this long are requested compressed in auto mode
+AUTO_FORMAT_MIN_CHARS = 200
+
+# Server pool load balancing strategies
+LOAD_BALANCING_LEAST_OUTSTANDING = "least_outstanding"
+LOAD_BALANCING_QUEUE_SIZE = "queue_size"
+LOAD_BALANCING_STRATEGIES = [LOAD_BALANCING_LEAST_OUTSTANDING, LOAD_BALANCING_QUEUE_SIZE]
+HEALTH_CHECK_INTERVAL = 30
+
+# Phrase warmup
+DEFAULT_WARMUP_TOP_N = 10
+WARMUP_INTERVAL = 6 * 3600
+WARMUP_REQUEST_INTERVAL = 5
+WARMUP_IDLE_POLL = 2
+WARMUP_MAX_IDLE_WAIT = 300
+
+# Request instrumentation
+METRICS_WINDOW = 500
+METRICS_URL = "/api/ha_higgs_audio/metrics"
+
+# Synthesized audio cache
+CACHE_DIR = "higgs_audio_cache"
+DEFAULT_CACHE_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_CACHE_MAX_AGE = 30 * 24 * 3600
+
+# Response bodies: hard size limit (about 20 minutes of 24 kHz WAV), the
+# bytes all requests may be receiving at once, and the reservation used
+# when the server does not announce a length
+MAX_RESPONSE_BYTES = 64 * 1024 * 1024
+RESPONSE_BUFFER_BUDGET = 32 * 1024 * 1024
+RESPONSE_RESERVATION = 1024 * 1024
+# Identical streams can join a running one until it has received this much
+COALESCE_REPLAY_BYTES = 2 * 1024 * 1024
+
+# Speak service audio files, kept under www/. Audio longer than the spool
+# threshold is written to a temporary file while it downloads, by at most
+# OUTPUT_SPOOL_WRITERS downloads at a time. Finished audio waits in a queue
+# of OUTPUT_QUEUE_SIZE entries for the background writer.
+OUTPUT_DIR = "higgs_audio_tts"
+OUTPUT_QUEUE_SIZE = 16
+OUTPUT_SPOOL_WRITERS = 2
+OUTPUT_SPOOL_THRESHOLD = 1024 * 1024
+OUTPUT_SPOOL_WRITE_SIZE = 256 * 1024
+OUTPUT_MAX_FILES = 200
+OUTPUT_MAX_BYTES = 100 * 1024 * 1024
+OUTPUT_MAX_AGE = 7 * 24 * 3600
+
+# Voice catalog refresh interval
+VOICE_CATALOG_TTL = 3600
+
+# Debug instrumentation: stalls longer than this (s) are logged with a stack sample
+LOOP_BLOCK_THRESHOLD = 0.1
+# Profile captures, written under the config directory
+PROFILE_DIR = "higgs_audio_profiles"
+PROFILE_MAX_DURATION = 300
+PROFILE_SAMPLE_INTERVAL = 0.01
+
+# Built-in voices, used until the server's voice list has been fetched
 AVAILABLE_VOICES = [
     "Abigail.wav", "Adrian.wav", "Alexander.wav", "Alice.wav", "Austin.wav",
     "Axel.wav", "Connor.wav", "Cora.wav", "Elena.wav", "Eli.wav",
@@ -0,0 +1,67 @@
+"""Shared poller for the Higgs Audio TTS server status and queue."""
+import asyncio
+import logging
+from datetime import timedelta
+
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import DOMAIN
+from .errors import HiggsAudioError
+from .profiling import instrumented
+
+_LOGGER = logging.getLogger(__name__)
+
+# Poll quickly while the server has work queued, slowly when idle
+FAST_UPDATE_INTERVAL = timedelta(seconds=5)
+SLOW_UPDATE_INTERVAL = timedelta(seconds=60)
+
+
+class HiggsAudioDataUpdateCoordinator(DataUpdateCoordinator):
+    """Fetch /health and /queue/status together and share them with all sensors.
+
+    The data is a dict with "health" and "queue" documents; an endpoint
+    that failed is reported as None with its exception under
+    "health_error" or "queue_error".
+    """
+
+    def __init__(self, hass, client, config_entry=None, slow_interval=SLOW_UPDATE_INTERVAL):
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=config_entry,
+            name=DOMAIN,
+            update_interval=slow_interval,
+        )
+        self.client = client
+        self._slow_interval = slow_interval
+
+    @instrumented
+    async def _async_update_data(self):
+        """Fetch both endpoints concurrently."""
+        health, queue = await asyncio.gather(
+            self.client.async_health(timeout=15),
+            self.client.async_queue_status(),
+            return_exceptions=True,
+        )
+        for result in (health, queue):
+            if isinstance(result, Exception) and not isinstance(result, HiggsAudioError):
+                raise result
+        if isinstance(health, HiggsAudioError) and isinstance(queue, HiggsAudioError):
+            self.update_interval = self._slow_interval
+            raise UpdateFailed(f"Could not reach Higgs Audio TTS server: {health}")
+
+        data = {"health": None, "health_error": None, "queue": None, "queue_error": None}
+        if isinstance(health, HiggsAudioError):
+            data["health_error"] = health
+        else:
+            data["health"] = health
+        if isinstance(queue, HiggsAudioError):
+            data["queue_error"] = queue
+        else:
+            data["queue"] = queue
+
+        queue = data["queue"]
+        busy = bool(queue and (queue.get("queue_size", 0) or queue.get("is_playing")))
+        self.update_interval = FAST_UPDATE_INTERVAL if busy else self._slow_interval
+        return data
@@ -0,0 +1,71 @@
+"""Parsing of multi-voice dialogue scripts with inline pauses."""
+import re
+from collections import namedtuple
+
+# Pause used by a bare [pause]
+DEFAULT_PAUSE = 0.5
+# Longest pause honoured, in seconds
+MAX_PAUSE = 10.0
+
+Segment = namedtuple("Segment", ["voice", "text"])
+Pause = namedtuple("Pause", ["seconds"])
+
+# "Name:" at the start of a line, after sentence punctuation and whitespace
+# or after a pause tag, [pause 500ms] / [pause 1.5s], or the SSML
+# <break time="500ms"/>
+_TOKEN_RE = re.compile(
+    r"(?:^[ \t]*|(?<=[.!?])\s+|(?<=[\]>])\s*)(?P<speaker>[A-Z][\w'-]*):\s+"
+    r"|(?i:\[\s*pause(?:\s+(?P<pause>\d+(?:\.\d+)?)\s*(?P<pause_unit>ms|s)?)?\s*\])"
+    r"|(?i:<break\s+time\s*=\s*[\"'](?P<break>\d+(?:\.\d+)?)\s*(?P<break_unit>ms|s)[\"']\s*/?>)",
+    re.MULTILINE,
+)
+
+
+def _seconds(value, unit):
+    if value is None:
+        return DEFAULT_PAUSE
+    seconds = float(value) / (1000 if (unit or "s").lower() == "ms" else 1)
+    return min(seconds, MAX_PAUSE)
+
+
+def _add_text(items, text, voice):
+    text = " ".join(text.split())
+    if text:
+        items.append(Segment(voice, text))
+
+
+def parse_script(message, resolve_voice):
+    """Split a message into Segment and Pause items, or return None without markup.
+
+    A speaker label only counts if resolve_voice(name) returns a voice,
+    so ordinary text such as "Note: ..." is left alone. Text before the
+    first label uses the default voice (None).
+    """
+    items = []
+    voice = None
+    position = 0
+    marked = False
+    for match in _TOKEN_RE.finditer(message):
+        speaker = None
+        if match.group("speaker"):
+            speaker = resolve_voice(match.group("speaker"))
+            if speaker is None:
+                continue
+        _add_text(items, message[position:match.start()], voice)
+        position = match.end()
+        marked = True
+        if speaker is not None:
+            voice = speaker
+        elif match.group("break") is not None:
+            items.append(Pause(_seconds(match.group("break"), match.group("break_unit"))))
+        else:
+            items.append(Pause(_seconds(match.group("pause"), match.group("pause_unit"))))
+    if not marked:
+        return None
+    _add_text(items, message[position:], voice)
+    return items
+
+
+def script_text(items):
+    """Return the plain text of a parsed script."""
+    return " ".join(item.text for item in items if isinstance(item, Segment))
@@ -0,0 +1,43 @@
+"""Exceptions for the Higgs Audio TTS integration."""
+
+
+class HiggsAudioError(Exception):
+    """Base error raised by the Higgs Audio TTS client."""
+
+
+class HiggsAudioConnectionError(HiggsAudioError):
+    """Raised when the server cannot be reached or times out."""
+
+
+class HiggsAudioResponseError(HiggsAudioError):
+    """Raised when the server answers with a non-200 status."""
+
+    def __init__(self, status, text=""):
+        super().__init__(f"HTTP {status}: {text}" if text else f"HTTP {status}")
+        self.status = status
+        self.text = text
+
+
+class HiggsAudioResponseTooLargeError(HiggsAudioError):
+    """Raised when a response body exceeds the size limit."""
+
+    def __init__(self, size, limit):
+        super().__init__(f"Response of {size} bytes exceeds the limit of {limit} bytes")
+        self.size = size
+        self.limit = limit
+
+
+class HiggsAudioDeadlineError(HiggsAudioError):
+    """Raised when a queued request expires before reaching the server."""
+
+
+class HiggsAudioCancelledError(HiggsAudioError):
+    """Raised when a request is cancelled by the interrupt service."""
+
+
+class HiggsAudioCircuitOpenError(HiggsAudioError):
+    """Raised without contacting the server while every server's circuit is open."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"All Higgs Audio TTS servers unavailable, retrying in {retry_after:.0f} s")
+        self.retry_after = retry_after
@@ -0,0 +1,105 @@
+"""Output format negotiation for synthesized audio."""
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from .const import (
+    AUTO_FORMAT_MIN_CHARS,
+    OUTPUT_FORMAT_AUTO,
+    OUTPUT_FORMAT_MP3,
+    OUTPUT_FORMAT_OPUS,
+    OUTPUT_FORMAT_WAV,
+)
+from .wav import async_join_stream, concat_wav
+
+_LOGGER = logging.getLogger(__name__)
+
+# Compressed format to use per media player integration; others get MP3
+PLAYER_FORMATS = {
+    "cast": OUTPUT_FORMAT_OPUS,
+    "browser_mod": OUTPUT_FORMAT_OPUS,
+    "sonos": OUTPUT_FORMAT_MP3,
+    "esphome": OUTPUT_FORMAT_MP3,
+    "squeezebox": OUTPUT_FORMAT_MP3,
+    "dlna_dmr": OUTPUT_FORMAT_MP3,
+    "apple_tv": OUTPUT_FORMAT_MP3,
+    "heos": OUTPUT_FORMAT_MP3,
+}
+
+# File extension Home Assistant should use for each server format
+FORMAT_EXTENSIONS = {
+    OUTPUT_FORMAT_WAV: "wav",
+    OUTPUT_FORMAT_MP3: "mp3",
+    OUTPUT_FORMAT_OPUS: "ogg",
+}
+
+
+def player_platform(hass: HomeAssistant, entity_id):
+    """Return the integration providing a media player, or None."""
+    if not entity_id:
+        return None
+    entry = er.async_get(hass).async_get(entity_id)
+    return entry.platform if entry else None
+
+
+def resolve_format(requested, message, platform=None):
+    """Pick the format the server should return for a message.
+
+    Explicit formats are used as is. In auto mode short messages stay WAV,
+    which needs no decoding and can be joined sample-exactly, while longer
+    ones use the compressed format the target player handles best.
+    """
+    if requested in FORMAT_EXTENSIONS:
+        return requested
+    if requested not in (None, OUTPUT_FORMAT_AUTO):
+        _LOGGER.warning("Unknown Higgs Audio TTS output format %r, using auto", requested)
+    if len(message.strip()) < AUTO_FORMAT_MIN_CHARS:
+        return OUTPUT_FORMAT_WAV
+    return PLAYER_FORMATS.get(platform, OUTPUT_FORMAT_MP3)
+
+
+def _strip_id3(audio):
+    """Return MP3 audio without a leading ID3v2 tag."""
+    if len(audio) < 10 or audio[:3] != b"ID3":
+        return audio
+    # Tag size is a 28-bit syncsafe integer, excluding the header and footer
+    size = (audio[6] << 21) | (audio[7] << 14) | (audio[8] << 7) | audio[9]
+    footer = 10 if audio[5] & 0x10 else 0
+    return audio[10 + size + footer:]
+
+
+def join_audio(output_format, parts):
+    """Join clips of the same format into one.
+
+    MP3 frames are self-delimiting, so MP3 clips are concatenated with
+    only the first keeping its ID3 tag. Ogg allows chained streams, so
+    Opus clips are concatenated whole. Numbers among the parts are pauses
+    in seconds, which only WAV can render.
+    """
+    if output_format == OUTPUT_FORMAT_WAV:
+        return concat_wav(parts)
+    clips = []
+    for part in parts:
+        if isinstance(part, (int, float)):
+            continue
+        if clips and output_format == OUTPUT_FORMAT_MP3:
+            part = _strip_id3(part)
+        clips.append(part)
+    return b"".join(clips)
+
+
+async def async_join_audio_stream(output_format, parts):
+    """Turn an async iterator of clips into one continuous stream."""
+    if output_format == OUTPUT_FORMAT_WAV:
+        async for chunk in async_join_stream(parts):
+            yield chunk
+        return
+    first = True
+    async for part in parts:
+        if isinstance(part, (int, float)):
+            continue
+        if not first and output_format == OUTPUT_FORMAT_MP3:
+            part = _strip_id3(part)
+        first = False
+        yield part
@@ -0,0 +1,308 @@
+"""Latency and throughput instrumentation for synthesis requests."""
+import logging
+import math
+import time
+from collections import Counter, deque
+
+from homeassistant.core import callback
+
+from .const import METRICS_WINDOW
+from .profiling import instrumented
+from .wav import WavFormatError, parse_wav
+
+_LOGGER = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Timings kept per voice, in seconds
+TIMING_FIELDS = ("total", "queue_wait", "connect", "ttfb", "transfer")
+# Derived values kept alongside the timings
+DERIVED_FIELDS = ("realtime_factor", "per_character")
+
+
+def _percentile(sorted_values, quantile):
+    """Return the nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(quantile * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def audio_duration(data, total_size=None):
+    """Return the duration in seconds of WAV audio, or None if unknown.
+
+    When streaming, data is the first chunk and total_size the number of
+    bytes received overall.
+    """
+    try:
+        info = parse_wav(data)
+    except WavFormatError:
+        return None
+    # Byte rate lives at offset 8 of the fmt chunk
+    byte_rate = int.from_bytes(info.fmt[8:12], "little")
+    if not byte_rate:
+        return None
+    data_size = info.data_size if total_size is None else total_size - info.data_offset
+    return data_size / byte_rate
+
+
+class RequestTiming:
+    """Timestamps of one request, filled in as it progresses."""
+
+    def __init__(self, payload):
+        """Start timing a request for payload."""
+        self.voice = (
+            payload.get("predefined_voice_id")
+            or payload.get("reference_audio_filename")
+            or "unknown"
+        )
+        self.characters = len(payload.get("text", ""))
+        self.created = time.monotonic()
+        self.started = None
+        self.connect = 0.0
+        self._connect_start = None
+        self.first_byte = None
+        self.finished = None
+        self.bytes = 0
+        self.audio_seconds = None
+        self.success = False
+
+    def mark_started(self):
+        """Record that the request left the local queue."""
+        self.started = time.monotonic()
+
+    def mark_connect_start(self):
+        """Record the start of a new TCP connection."""
+        self._connect_start = time.monotonic()
+
+    def mark_connect_end(self):
+        """Record the end of a new TCP connection."""
+        if self._connect_start is not None:
+            self.connect += time.monotonic() - self._connect_start
+            self._connect_start = None
+
+    def mark_first_byte(self):
+        """Record the arrival of the response (first chunk when streaming)."""
+        if self.first_byte is None:
+            self.first_byte = time.monotonic()
+
+    def mark_finished(self, size, audio_seconds=None, success=True):
+        """Record the end of the transfer."""
+        self.finished = time.monotonic()
+        self.bytes = size
+        self.audio_seconds = audio_seconds
+        self.success = success
+
+    def as_dict(self):
+        """Return the timings in seconds."""
+        started = self.started if self.started is not None else self.created
+        finished = self.finished if self.finished is not None else time.monotonic()
+        first_byte = self.first_byte if self.first_byte is not None else finished
+        wall = finished - started
+        return {
+            "voice": self.voice,
+            "characters": self.characters,
+            "bytes": self.bytes,
+            "queue_wait": started - self.created,
+            "connect": self.connect,
+            "ttfb": first_byte - started,
+            "transfer": finished - first_byte,
+            "total": finished - self.created,
+            "audio_seconds": self.audio_seconds,
+            "realtime_factor": (
+                self.audio_seconds / wall if self.audio_seconds and wall > 0 else None
+            ),
+            # Server time per character of text, used to size timeouts
+            "per_character": wall / self.characters if self.characters else None,
+        }
+
+
+class SynthesisMetrics:
+    """Counters and rolling per-voice latency windows."""
+
+    def __init__(self, window=METRICS_WINDOW):
+        """Initialize the metrics."""
+        self._window = window
+        self._timings = {}
+        # Running [sum, count] of every timing since startup, per voice
+        self._totals = {}
+        self._listeners = []
+        self.requests = 0
+        self.failures = 0
+        self.bytes = 0
+        self.characters = 0
+        self.audio_seconds = 0.0
+        self.last = None
+        # Degraded mode answers by source: "cache", "engine" or "none"
+        self.fallbacks = Counter()
+
+    @callback
+    def async_add_listener(self, update_callback):
+        """Call update_callback after every recorded request."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener():
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    @instrumented
+    def async_record(self, timing):
+        """Add a finished request to the metrics."""
+        self.requests += 1
+        if not timing.success:
+            self.failures += 1
+        else:
+            sample = timing.as_dict()
+            self.last = sample
+            self.bytes += timing.bytes
+            self.characters += timing.characters
+            if timing.audio_seconds:
+                self.audio_seconds += timing.audio_seconds
+            windows = self._timings.setdefault(timing.voice, {})
+            totals = self._totals.setdefault(timing.voice, {})
+            for field in TIMING_FIELDS + DERIVED_FIELDS:
+                if sample[field] is not None:
+                    windows.setdefault(field, deque(maxlen=self._window)).append(sample[field])
+                    total = totals.setdefault(field, [0.0, 0])
+                    total[0] += sample[field]
+                    total[1] += 1
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    @callback
+    def async_record_fallback(self, source):
+        """Count a message served while the server was unavailable."""
+        self.fallbacks[source] += 1
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def percentiles(self, voice=None, field="total"):
+        """Return {quantile: seconds} for one voice, or across all voices."""
+        values = []
+        for name, windows in self._timings.items():
+            if voice is None or name == voice:
+                values.extend(windows.get(field, ()))
+        values.sort()
+        return {q: _percentile(values, q) for q in QUANTILES}
+
+    def totals(self, voice, field="total"):
+        """Return the (sum, count) of field for a voice since startup."""
+        total = self._totals.get(voice, {}).get(field)
+        return tuple(total) if total else (0.0, 0)
+
+    def count(self, field="total"):
+        """Return the number of samples of field across all voices."""
+        return sum(len(windows.get(field, ())) for windows in self._timings.values())
+
+    @property
+    def voices(self):
+        """Return the voices seen so far."""
+        return list(self._timings)
+
+    @property
+    def summary(self):
+        """Return counters and per-voice percentiles in milliseconds."""
+        per_voice = {}
+        for voice, windows in self._timings.items():
+            per_voice[voice] = {
+                field: {
+                    f"p{int(q * 100)}": round(value * 1000, 1)
+                    for q, value in self.percentiles(voice, field).items()
+                    if value is not None
+                }
+                for field in TIMING_FIELDS
+                if windows.get(field)
+            }
+            rtf = self.percentiles(voice, "realtime_factor")[0.5]
+            if rtf is not None:
+                per_voice[voice]["realtime_factor_p50"] = round(rtf, 2)
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "bytes": self.bytes,
+            "characters": self.characters,
+            "audio_seconds": round(self.audio_seconds, 1),
+            "fallbacks": dict(self.fallbacks),
+            "voices": per_voice,
+        }
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def render_prometheus(entries):
+    """Render the metrics of several (entry_id, client, cache) in text format."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if value is not None:
+                lines.append(f"{name}{{{labels}}} {value}")
+
+    metric(
+        "higgs_audio_tts_requests_total", "counter", "Synthesis requests sent to the server.",
+        [(_labels(entry=entry_id), client.metrics.requests) for entry_id, client, _ in entries],
+    )
+    metric(
+        "higgs_audio_tts_failures_total", "counter", "Failed synthesis requests.",
+        [(_labels(entry=entry_id), client.metrics.failures) for entry_id, client, _ in entries],
+    )
+    metric(
+        "higgs_audio_tts_bytes_total", "counter", "Audio bytes received from the server.",
+        [(_labels(entry=entry_id), client.metrics.bytes) for entry_id, client, _ in entries],
+    )
+    metric(
+        "higgs_audio_tts_audio_seconds_total", "counter", "Seconds of audio synthesized.",
+        [(_labels(entry=entry_id), client.metrics.audio_seconds) for entry_id, client, _ in entries],
+    )
+    metric(
+        "higgs_audio_tts_fallbacks_total", "counter", "Messages served without the server, by source.",
+        [
+            (_labels(entry=entry_id, source=source), count)
+            for entry_id, client, _ in entries
+            for source, count in client.metrics.fallbacks.items()
+        ],
+    )
+    metric(
+        "higgs_audio_tts_coalesced_total", "counter", "Requests served by an identical in-flight call.",
+        [
+            (_labels(entry=entry_id), client.coalescing_stats["saved_calls"])
+            for entry_id, client, _ in entries
+        ],
+    )
+    metric(
+        "higgs_audio_tts_cache_hits_total", "counter", "Audio cache hits.",
+        [(_labels(entry=entry_id), cache.hits) for entry_id, _, cache in entries if cache],
+    )
+    metric(
+        "higgs_audio_tts_cache_misses_total", "counter", "Audio cache misses.",
+        [(_labels(entry=entry_id), cache.misses) for entry_id, _, cache in entries if cache],
+    )
+    for field in TIMING_FIELDS:
+        name = f"higgs_audio_tts_{field}_seconds"
+        samples = []
+        totals = []
+        for entry_id, client, _ in entries:
+            for voice in client.metrics.voices:
+                for q, value in client.metrics.percentiles(voice, field).items():
+                    samples.append((_labels(entry=entry_id, voice=voice, quantile=q), value))
+                totals.append((_labels(entry=entry_id, voice=voice), *client.metrics.totals(voice, field)))
+        metric(
+            name, "summary",
+            f"{field.replace('_', ' ').capitalize()} time of synthesis requests; quantiles are rolling.",
+            samples,
+        )
+        for labels, total, count in totals:
+            lines.append(f"{name}_sum{{{labels}}} {total}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,78 @@
+"""Canonical spelling of message text, so trivially different messages share audio."""
+import re
+import unicodedata
+
+# Typographic quotes are read the same as their ASCII forms
+_QUOTES = str.maketrans({"‘": "'", "’": "'", "‚": "'", "“": '"', "”": '"', "„": '"'})
+
+# Abbreviated units after a number, spelled out as (singular, plural)
+UNITS = {
+    "ms": ("millisecond", "milliseconds"),
+    "s": ("second", "seconds"),
+    "sec": ("second", "seconds"),
+    "secs": ("second", "seconds"),
+    "min": ("minute", "minutes"),
+    "mins": ("minute", "minutes"),
+    "h": ("hour", "hours"),
+    "hr": ("hour", "hours"),
+    "hrs": ("hour", "hours"),
+    "°C": ("degree Celsius", "degrees Celsius"),
+    "°F": ("degree Fahrenheit", "degrees Fahrenheit"),
+    "°": ("degree", "degrees"),
+    "%": ("percent", "percent"),
+    "W": ("watt", "watts"),
+    "kW": ("kilowatt", "kilowatts"),
+    "kWh": ("kilowatt hour", "kilowatt hours"),
+    "V": ("volt", "volts"),
+    "mm": ("millimeter", "millimeters"),
+    "cm": ("centimeter", "centimeters"),
+    "km": ("kilometer", "kilometers"),
+    "km/h": ("kilometer per hour", "kilometers per hour"),
+    "mph": ("mile per hour", "miles per hour"),
+    "kg": ("kilogram", "kilograms"),
+    "lb": ("pound", "pounds"),
+    "lbs": ("pound", "pounds"),
+}
+
+_SPACE_RE = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCTUATION_RE = re.compile(r"\s+([,.!?;:])")
+# 1,234,567 -> 1234567
+_THOUSANDS_RE = re.compile(r"(?<![\d.,])\d{1,3}(?:,\d{3})+(?![\d,])")
+# 12.50 -> 12.5 and 12.0 -> 12, leaving versions and addresses such as 1.10.0 alone
+_TRAILING_ZEROS_RE = re.compile(r"(?<![\d.])(\d+)\.(\d*?)0+(?!\.?\d)")
+# A number followed by a unit, longest units first so "kWh" wins over "kW"
+_UNIT_RE = re.compile(
+    r"(?<![\w.])(\d+(?:\.\d+)?)\s?("
+    + "|".join(re.escape(unit) for unit in sorted(UNITS, key=len, reverse=True))
+    + r")(?![\w/])"
+)
+# Shouted words; shorter all-caps words are usually acronyms read letter by letter
+_SHOUTED_RE = re.compile(r"\b[A-Z]{5,}\b")
+
+
+def _strip_zeros(match):
+    decimals = match.group(2)
+    return f"{match.group(1)}.{decimals}" if decimals else match.group(1)
+
+
+def _spell_unit(match):
+    number = match.group(1)
+    singular, plural = UNITS[match.group(2)]
+    return f"{number} {singular if number == '1' else plural}"
+
+
+def normalize_text(text):
+    """Return text in a canonical form that sounds the same when spoken.
+
+    Unifies Unicode forms, quotes and whitespace, writes numbers without
+    thousands separators or trailing decimal zeros, spells out units
+    after numbers ("12 min" -> "12 minutes") and lowers shouted words.
+    Normalizing twice gives the same result.
+    """
+    text = unicodedata.normalize("NFKC", text).translate(_QUOTES)
+    text = _SPACE_RE.sub(" ", text).strip()
+    text = _SPACE_BEFORE_PUNCTUATION_RE.sub(r"\1", text)
+    text = _THOUSANDS_RE.sub(lambda match: match.group(0).replace(",", ""), text)
+    text = _TRAILING_ZEROS_RE.sub(_strip_zeros, text)
+    text = _UNIT_RE.sub(_spell_unit, text)
+    return _SHOUTED_RE.sub(lambda match: match.group(0).lower(), text)
@@ -0,0 +1,243 @@
+"""Persistence of speak service audio to the www directory."""
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DOMAIN,
+    OUTPUT_MAX_AGE,
+    OUTPUT_MAX_BYTES,
+    OUTPUT_MAX_FILES,
+    OUTPUT_QUEUE_SIZE,
+    OUTPUT_SPOOL_THRESHOLD,
+    OUTPUT_SPOOL_WRITE_SIZE,
+    OUTPUT_SPOOL_WRITERS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+OUTPUT_FILE_PREFIX = "tts_"
+# Files being written, renamed into place when complete
+TEMP_FILE_PREFIX = f".{OUTPUT_FILE_PREFIX}tmp"
+
+
+def _output_filename(digest, extension):
+    return f"{OUTPUT_FILE_PREFIX}{digest.hexdigest()[:32]}.{extension}"
+
+
+def _commit(tmp_path, path):
+    """Move a finished temporary file into place, unless path already exists."""
+    if os.path.exists(path):
+        # Same audio already saved; refresh it for retention
+        os.utime(path)
+        os.unlink(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+
+
+class _SpoolFile:
+    """Temporary file in the output directory, hashed as it is written."""
+
+    def __init__(self, directory):
+        """Create the file (blocking)."""
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+        fd, self._path = tempfile.mkstemp(dir=directory, prefix=TEMP_FILE_PREFIX)
+        self._file = os.fdopen(fd, "wb")
+        self._digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunks):
+        """Append chunks (blocking)."""
+        for chunk in chunks:
+            self._digest.update(chunk)
+            self._file.write(chunk)
+            self.size += len(chunk)
+
+    def commit(self, extension):
+        """Close the file, rename it after its content and return the name."""
+        self._file.close()
+        filename = _output_filename(self._digest, extension)
+        _commit(self._path, os.path.join(self._directory, filename))
+        return filename
+
+    def discard(self):
+        """Close and remove the file."""
+        self._file.close()
+        try:
+            os.unlink(self._path)
+        except FileNotFoundError:
+            pass
+
+
+class AudioWriter:
+    """Write audio files off the event loop and keep the directory bounded.
+
+    Files are named after a hash of their content, so concurrent calls
+    never collide and repeated messages reuse one file. Each file is
+    written to a temporary name and renamed into place by a background
+    task fed from a bounded queue. After every batch the oldest files are
+    removed beyond the retention limits.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        directory,
+        max_files=OUTPUT_MAX_FILES,
+        max_bytes=OUTPUT_MAX_BYTES,
+        max_age=OUTPUT_MAX_AGE,
+        spool_threshold=OUTPUT_SPOOL_THRESHOLD,
+        queue_size=OUTPUT_QUEUE_SIZE,
+        spool_writers=OUTPUT_SPOOL_WRITERS,
+    ):
+        """Initialize the writer."""
+        self.hass = hass
+        self._directory = directory
+        self._max_files = max_files
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._spool_threshold = spool_threshold
+        self._queue = asyncio.Queue(queue_size)
+        self._spool_slots = asyncio.Semaphore(spool_writers)
+        self._task = None
+
+    async def async_enqueue(self, audio, extension):
+        """Queue audio bytes or a finished spool file to be saved.
+
+        Waits while the queue is full, so callers slow down to the pace
+        of the disk instead of piling up audio in memory.
+        """
+        await self._queue.put((audio, extension))
+        if self._task is None or self._task.done():
+            self._task = self.hass.async_create_background_task(
+                self._async_run(), f"{DOMAIN} audio writer"
+            )
+
+    async def async_save_stream(self, chunks, extension):
+        """Download audio from an async iterator of chunks and queue it.
+
+        Up to the spool threshold the audio is kept in memory. Longer audio
+        is written to a temporary file in batches as it arrives, by a
+        bounded number of downloads at a time, so memory use stays bounded
+        whatever its length. If the iterator fails, the partial file is
+        removed and the error raised.
+        """
+        pending = []
+        pending_size = 0
+        size = 0
+        spool = None
+        try:
+            async for chunk in chunks:
+                pending.append(chunk)
+                pending_size += len(chunk)
+                size += len(chunk)
+                if pending_size >= (OUTPUT_SPOOL_WRITE_SIZE if spool else self._spool_threshold):
+                    async with self._spool_slots:
+                        if spool is None:
+                            spool = await self.hass.async_add_executor_job(
+                                _SpoolFile, self._directory
+                            )
+                        await self.hass.async_add_executor_job(spool.write, pending)
+                    pending = []
+                    pending_size = 0
+            if not size:
+                return
+            if spool is None:
+                await self.async_enqueue(b"".join(pending), extension)
+            else:
+                async with self._spool_slots:
+                    await self.hass.async_add_executor_job(spool.write, pending)
+                await self.async_enqueue(spool, extension)
+                spool = None
+        finally:
+            if spool is not None:
+                self.hass.async_add_executor_job(spool.discard)
+
+    async def _async_run(self):
+        # Check the queue again after pruning, since audio may have been
+        # queued while it ran
+        while not self._queue.empty():
+            while not self._queue.empty():
+                audio, extension = self._queue.get_nowait()
+                try:
+                    if isinstance(audio, _SpoolFile):
+                        size = audio.size
+                        filename = await self.hass.async_add_executor_job(
+                            audio.commit, extension
+                        )
+                    else:
+                        size = len(audio)
+                        filename = await self.hass.async_add_executor_job(
+                            self._write, audio, extension
+                        )
+                except OSError as ex:
+                    _LOGGER.error("Failed to save audio file: %s", ex)
+                    continue
+                _LOGGER.info(
+                    "Audio saved: %s (%d bytes), accessible at /local/%s/%s",
+                    filename, size, os.path.basename(self._directory), filename,
+                )
+            try:
+                await self.hass.async_add_executor_job(self._prune)
+            except OSError as ex:
+                _LOGGER.warning("Could not apply retention to %s: %s", self._directory, ex)
+
+    def _write(self, audio, extension):
+        filename = _output_filename(hashlib.sha256(audio), extension)
+        path = os.path.join(self._directory, filename)
+        os.makedirs(self._directory, exist_ok=True)
+        if os.path.exists(path):
+            # Same audio already saved; refresh it for retention
+            os.utime(path)
+            return filename
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, prefix=TEMP_FILE_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return filename
+
+    def _prune(self):
+        """Remove expired files, then the oldest beyond the count and size limits.
+
+        Only files this writer created are touched, so other files kept in
+        the directory, such as chimes, are left alone.
+        """
+        now = time.time()
+        files = []
+        with os.scandir(self._directory) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if entry.name.startswith(TEMP_FILE_PREFIX):
+                    # Leftover from an interrupted write
+                    if now - stat.st_mtime > 3600:
+                        os.unlink(entry.path)
+                    continue
+                if not entry.name.startswith(OUTPUT_FILE_PREFIX):
+                    continue
+                if now - stat.st_mtime > self._max_age:
+                    os.unlink(entry.path)
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in files:
+            if len(files) - removed <= self._max_files and total <= self._max_bytes:
+                break
+            os.unlink(path)
+            total -= size
+            removed += 1
+        if removed:
+            _LOGGER.debug("Removed %d old audio files from %s", removed, self._directory)
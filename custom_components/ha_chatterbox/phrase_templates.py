@@ -0,0 +1,86 @@
+"""Templated messages rendered from cached static phrases and a variable slot."""
+import re
+
+import voluptuous as vol
+
+from .normalize import normalize_text
+
+# A slot is written {name} (or {}); the name only documents the template
+_SLOT_RE = re.compile(r"\{\s*\w*\s*\}")
+# Sentence punctuation ignored at the end of templates and messages
+_END_RE = re.compile(r"[\s.!?]+$")
+# Slots stand in as numbers from here on while a template is normalized
+_SLOT_NUMBER = 987654300
+
+
+class PhraseTemplate:
+    """A message pattern of static phrases with variable slots in between."""
+
+    def __init__(self, text):
+        """Compile a template; raises vol.Invalid if it cannot be matched unambiguously."""
+        self.text = text
+        self._phrases = [part.strip() for part in _SLOT_RE.split(text)]
+        slots = len(self._phrases) - 1
+        if not slots:
+            raise vol.Invalid(f"Template has no {{slot}}: {text}")
+        if any(not phrase for phrase in self._phrases[1:-1]):
+            raise vol.Invalid(f"Template has adjacent slots: {text}")
+        if not any(self._phrases):
+            raise vol.Invalid(f"Template has no static text: {text}")
+        pattern = r"(.+?)".join(
+            r"\s+".join(map(re.escape, _END_RE.sub("", phrase).split())) for phrase in self._phrases
+        )
+        self._pattern = re.compile(rf"\s*{pattern}\s*", re.IGNORECASE)
+
+    def split(self, message):
+        """Return the phrases of message as (text, static) pairs, or None if it does not match.
+
+        Static phrases are taken from the template, so every message using
+        it renders them identically; slots are taken from the message.
+        """
+        match = self._pattern.fullmatch(_END_RE.sub("", message))
+        if match is None:
+            return None
+        parts = []
+        for index, phrase in enumerate(self._phrases):
+            if index:
+                parts.append((match.group(index).strip(), False))
+            if phrase:
+                parts.append((phrase, True))
+        return parts
+
+
+def _normalize_template(text):
+    """Normalize a template like a message, reading slots as numbers.
+
+    That way units after a slot are spelled out as in the messages, e.g.
+    "{minutes} min" becomes "{minutes} minutes".
+    """
+    slots = []
+
+    def number(match):
+        slots.append(match.group(0))
+        return str(_SLOT_NUMBER + len(slots))
+
+    text = normalize_text(_SLOT_RE.sub(number, text))
+    for index, slot in enumerate(slots, 1):
+        text = text.replace(str(_SLOT_NUMBER + index), slot, 1)
+    return text
+
+
+def parse_phrase_templates(text, normalize=False):
+    """Parse templates given one per line; raises vol.Invalid for invalid ones.
+
+    With normalize, templates are normalized like the messages they match.
+    """
+    lines = [line.strip() for line in (text or "").splitlines() if line.strip()]
+    return [PhraseTemplate(_normalize_template(line) if normalize else line) for line in lines]
+
+
+def split_phrases(message, templates):
+    """Return the (text, static) parts of message under the first matching template, or None."""
+    for template in templates:
+        parts = template.split(message)
+        if parts is not None:
+            return parts
+    return None
@@ -0,0 +1,196 @@
+"""Pool of Higgs Audio TTS servers with health tracking and load balancing."""
+import logging
+import time
+
+from .const import (
+    DEFAULT_PORT,
+    LOAD_BALANCING_LEAST_OUTSTANDING,
+    LOAD_BALANCING_QUEUE_SIZE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Consecutive failures before a server's circuit opens
+EJECT_AFTER_FAILURES = 3
+# Open time doubles with every further failure up to the maximum
+EJECT_BASE_SECONDS = 30
+EJECT_MAX_SECONDS = 300
+
+# Circuit breaker states
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+def parse_servers(text):
+    """Parse a comma separated list of host[:port] entries into base URLs."""
+    urls = []
+    for item in (text or "").replace("\n", ",").split(","):
+        item = item.strip().rstrip("/")
+        if not item:
+            continue
+        if "://" not in item:
+            if ":" not in item:
+                item = f"{item}:{DEFAULT_PORT}"
+            item = f"http://{item}"
+        urls.append(item)
+    return urls
+
+
+class ServerNode:
+    """Runtime state of one server in the pool."""
+
+    def __init__(self, base_url):
+        """Initialize the node."""
+        self.base_url = base_url.rstrip("/")
+        self.outstanding = 0
+        self.queue_size = 0
+        self.failures = 0
+        self.ejected_until = None
+        # True while the single trial request of a half-open circuit runs
+        self.probing = False
+        # Clone reference filenames on the server, None until listed
+        self.references = None
+
+    @property
+    def healthy(self):
+        """Return True if the node is in rotation."""
+        return self.ejected_until is None
+
+    @property
+    def state(self):
+        """Return the circuit breaker state of the node."""
+        if self.ejected_until is None:
+            return CIRCUIT_CLOSED
+        if time.monotonic() < self.ejected_until:
+            return CIRCUIT_OPEN
+        return CIRCUIT_HALF_OPEN
+
+    @property
+    def stats(self):
+        """Return node state for diagnostics."""
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "circuit": self.state,
+            "outstanding": self.outstanding,
+            "queue_size": self.queue_size,
+            "failures": self.failures,
+            "references": len(self.references) if self.references is not None else None,
+        }
+
+
+class ServerPool:
+    """Choose which server handles each request.
+
+    Healthy servers are ordered by the configured strategy: fewest
+    outstanding requests from this client, or the server's reported queue
+    size plus our outstanding requests.
+
+    Each server has a circuit breaker. After repeated failures its circuit
+    opens for a growing period during which it gets no requests at all.
+    Once that period ends the circuit is half-open: a single trial request
+    is let through, and its outcome closes the circuit again or reopens it
+    for longer. A successful health check also closes it.
+    """
+
+    def __init__(self, base_urls, strategy=LOAD_BALANCING_LEAST_OUTSTANDING):
+        """Initialize the pool."""
+        self.nodes = [ServerNode(url) for url in base_urls]
+        self._strategy = strategy
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def stats(self):
+        """Return the state of every node."""
+        return [node.stats for node in self.nodes]
+
+    def _score(self, node):
+        if self._strategy == LOAD_BALANCING_QUEUE_SIZE:
+            return node.queue_size + node.outstanding
+        return node.outstanding
+
+    def candidates(self):
+        """Return the nodes that may take a request, in the order to try them.
+
+        Closed circuits come first, then half-open ones whose trial request
+        is not already running.
+        """
+        closed = []
+        half_open = []
+        for node in self.nodes:
+            state = node.state
+            if state == CIRCUIT_CLOSED:
+                closed.append(node)
+            elif state == CIRCUIT_HALF_OPEN and not node.probing:
+                half_open.append(node)
+        # sorted() is stable, so ties keep the configured server order
+        closed.sort(key=self._score)
+        return closed + half_open
+
+    @property
+    def available(self):
+        """Return True if any node may take a request."""
+        return any(
+            node.state == CIRCUIT_CLOSED or (node.state == CIRCUIT_HALF_OPEN and not node.probing)
+            for node in self.nodes
+        )
+
+    def acquire(self, node):
+        """Claim a node for one request.
+
+        Returns None if the node cannot take it now, otherwise whether the
+        request is the trial of a half-open circuit. Pass that flag back
+        to release().
+        """
+        state = node.state
+        if state == CIRCUIT_OPEN:
+            return None
+        probe = False
+        if state == CIRCUIT_HALF_OPEN:
+            if node.probing:
+                return None
+            node.probing = probe = True
+        node.outstanding += 1
+        return probe
+
+    def release(self, node, probe=False):
+        """Release a node claimed with acquire().
+
+        Only the trial request itself frees the half-open slot, so other
+        requests finishing on the node cannot start a second trial.
+        """
+        node.outstanding -= 1
+        if probe:
+            node.probing = False
+
+    def retry_after(self):
+        """Return seconds until the next open circuit becomes half-open."""
+        now = time.monotonic()
+        waits = [node.ejected_until - now for node in self.nodes if node.ejected_until is not None]
+        return max(0.0, min(waits)) if waits else 0.0
+
+    def mark_success(self, node):
+        """Record a successful call, re-admitting the node if needed."""
+        if node.ejected_until is not None:
+            _LOGGER.info("Higgs Audio TTS server %s is back in rotation", node.base_url)
+        node.failures = 0
+        node.ejected_until = None
+
+    def mark_failure(self, node):
+        """Record a failed call and eject the node if it keeps failing."""
+        node.failures += 1
+        if node.failures < EJECT_AFTER_FAILURES:
+            return
+        seconds = min(
+            EJECT_BASE_SECONDS * 2 ** (node.failures - EJECT_AFTER_FAILURES),
+            EJECT_MAX_SECONDS,
+        )
+        if node.ejected_until is None:
+            _LOGGER.warning(
+                "Opening circuit of Higgs Audio TTS server %s for %d s after %d failures",
+                node.base_url, seconds, node.failures,
+            )
+        node.ejected_until = time.monotonic() + seconds
@@ -0,0 +1,132 @@
+"""Optional NumPy post-processing of synthesized WAV audio.
+
+Importing this module requires NumPy; it is only loaded once a
+post-processing option is enabled.
+"""
+import logging
+
+import numpy as np
+
+from .wav import WavFormatError, build_wav, parse_wav, pcm_view
+
+_LOGGER = logging.getLogger(__name__)
+
+# Samples quieter than this (dBFS) count as silence when trimming
+SILENCE_THRESHOLD_DB = -45.0
+# Silence kept at each end of a trimmed clip, in seconds
+SILENCE_PAD = 0.1
+# Loudness target of normalization, as RMS in dBFS
+TARGET_RMS_DB = -20.0
+# Normalization never boosts more than this, so near-silence stays quiet
+MAX_GAIN_DB = 20.0
+# Peaks are kept below this fraction of full scale
+PEAK_CEILING = 0.98
+# Overlap-add frame length used for time-stretching, in seconds
+STRETCH_FRAME = 0.04
+
+_FULL_SCALE = 32768.0
+_WAVE_FORMAT_PCM = 1
+
+
+def _db_to_gain(value):
+    return 10 ** (value / 20)
+
+
+def _samples(data, info):
+    """Return (rate, channels, samples) as a zero-copy int16 view of the PCM."""
+    format_tag = int.from_bytes(info.fmt[0:2], "little")
+    channels = int.from_bytes(info.fmt[2:4], "little")
+    rate = int.from_bytes(info.fmt[4:8], "little")
+    bits = int.from_bytes(info.fmt[14:16], "little")
+    if format_tag != _WAVE_FORMAT_PCM or bits != 16 or not channels:
+        raise WavFormatError("Only 16-bit PCM audio can be post-processed")
+    pcm = pcm_view(data, info)
+    pcm = pcm[: len(pcm) - len(pcm) % (2 * channels)]
+    return rate, channels, np.frombuffer(pcm, dtype="<i2").reshape(-1, channels)
+
+
+def _trim_bounds(samples, rate):
+    """Return the (start, end) frames of samples without surrounding silence."""
+    threshold = int(_FULL_SCALE * _db_to_gain(SILENCE_THRESHOLD_DB))
+    # One boolean per frame; int16 abs() would overflow on -32768
+    loud = ((samples > threshold) | (samples < -threshold)).any(axis=1)
+    indices = np.flatnonzero(loud)
+    if not len(indices):
+        return 0, 0
+    pad = int(rate * SILENCE_PAD)
+    return max(0, indices[0] - pad), min(len(samples), indices[-1] + 1 + pad)
+
+
+def _normalize(work):
+    """Scale float audio in place towards the target RMS without clipping."""
+    flat = work.reshape(-1)
+    rms = np.sqrt(np.dot(flat, flat) / len(flat)) if len(flat) else 0.0
+    peak = float(np.abs(flat).max()) if len(flat) else 0.0
+    if not rms or not peak:
+        return
+    gain = min(
+        _FULL_SCALE * _db_to_gain(TARGET_RMS_DB) / rms,
+        _db_to_gain(MAX_GAIN_DB),
+        _FULL_SCALE * PEAK_CEILING / peak,
+    )
+    work *= gain
+
+
+def _stretch(work, rate, speed):
+    """Return float audio played speed times faster, keeping the pitch.
+
+    Overlap-adds Hann windowed frames read every speed * hop samples and
+    written every hop samples. With a 50% overlap the even and the odd
+    frames each tile the output without overlapping, so both sets are
+    added with one reshape each instead of a loop.
+    """
+    frame = max(2, int(rate * STRETCH_FRAME) & ~1)
+    hop = frame // 2
+    analysis_hop = max(1, round(hop * speed))
+    if len(work) < frame:
+        return work
+    count = (len(work) - frame) // analysis_hop + 1
+    window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame) / frame)).astype(np.float32)
+    index = (np.arange(count) * analysis_hop)[:, None] + np.arange(frame)
+    frames = work[index] * window[None, :, None]
+
+    channels = work.shape[1]
+    out = np.zeros(((count + 1) * hop, channels), dtype=np.float32)
+    even = frames[0::2]
+    out[: len(even) * frame] += even.reshape(-1, channels)
+    odd = frames[1::2]
+    out[hop: hop + len(odd) * frame] += odd.reshape(-1, channels)
+    return out
+
+
+def process_wav(data, trim=False, normalize=False, speed=1.0):
+    """Trim silence, normalize loudness and time-stretch 16-bit PCM WAV audio.
+
+    Returns the processed WAV, or data unchanged if nothing is enabled
+    or the audio is not 16-bit PCM.
+    """
+    stretch = speed and abs(speed - 1.0) > 0.01
+    if not (trim or normalize or stretch):
+        return data
+    try:
+        info = parse_wav(data)
+        rate, channels, samples = _samples(data, info)
+    except WavFormatError as ex:
+        _LOGGER.debug("Skipping post-processing: %s", ex)
+        return data
+
+    if trim:
+        start, end = _trim_bounds(samples, rate)
+        samples = samples[start:end]
+    if not (normalize or stretch):
+        # Trimming alone copies a slice of the original buffer once
+        return build_wav(info.fmt, samples)
+
+    # One float working buffer, modified in place where possible
+    work = samples.astype(np.float32)
+    if normalize:
+        _normalize(work)
+    if stretch:
+        work = _stretch(work, rate, speed)
+    np.clip(work, -_FULL_SCALE, _FULL_SCALE - 1, out=work)
+    return build_wav(info.fmt, work.astype("<i2"))
@@ -0,0 +1,115 @@
+"""Named generation presets compiled into reusable request templates."""
+import hashlib
+import json
+from types import MappingProxyType
+
+import voluptuous as vol
+
+from .cache import cache_material, encode_material
+from .const import (
+    CONF_CFG_WEIGHT,
+    CONF_EXAGGERATION,
+    CONF_SEED,
+    CONF_SPEED_FACTOR,
+    CONF_TEMPERATURE,
+    CONF_VOICE,
+    OUTPUT_FORMAT_MP3,
+    OUTPUT_FORMAT_OPUS,
+    OUTPUT_FORMAT_WAV,
+)
+
+# Bounds of the server's GenerationParams model (server_models.py)
+PARAM_BOUNDS = {
+    CONF_TEMPERATURE: (0.0, 1.5),
+    CONF_EXAGGERATION: (0.25, 2.0),
+    CONF_CFG_WEIGHT: (0.2, 1.0),
+    CONF_SPEED_FACTOR: (0.25, 4.0),
+}
+
+
+def param_validator(name):
+    """Return a validator enforcing the server's bounds for a float parameter."""
+    low, high = PARAM_BOUNDS[name]
+    return vol.All(vol.Coerce(float), vol.Range(min=low, max=high))
+
+
+SEED_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=0))
+
+PRESET_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_VOICE): str,
+        vol.Optional(CONF_TEMPERATURE): param_validator(CONF_TEMPERATURE),
+        vol.Optional(CONF_EXAGGERATION): param_validator(CONF_EXAGGERATION),
+        vol.Optional(CONF_CFG_WEIGHT): param_validator(CONF_CFG_WEIGHT),
+        vol.Optional(CONF_SEED): SEED_VALIDATOR,
+        vol.Optional(CONF_SPEED_FACTOR): param_validator(CONF_SPEED_FACTOR),
+    }
+)
+
+PRESETS_SCHEMA = vol.Schema({vol.All(str, vol.Length(min=1)): PRESET_SCHEMA})
+
+
+def parse_presets(text):
+    """Parse and validate presets given as a JSON object of name -> parameters.
+
+    Raises vol.Invalid if the text is not valid.
+    """
+    try:
+        presets = json.loads(text) if text else {}
+    except ValueError as ex:
+        raise vol.Invalid(f"Invalid JSON: {ex}") from ex
+    return PRESETS_SCHEMA(presets)
+
+
+class PresetPayload(dict):
+    """A /tts payload built from a template, with its JSON body serialized."""
+
+    __slots__ = ("template", "body")
+
+
+class PayloadTemplate:
+    """Immutable, pre-serialized /tts payload for one preset and voice.
+
+    The parameters are serialized once, and the cache key hash is fed with
+    everything but the text up front, so a request only appends its text
+    and output format.
+    """
+
+    __slots__ = ("name", "params", "_body_prefix", "_key_prefixes")
+
+    def __init__(self, name, params):
+        """Compile the template from the full set of request parameters."""
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "params", MappingProxyType(dict(params)))
+        # Body is '{<params>,"text":...,"output_format":...}'
+        object.__setattr__(self, "_body_prefix", json.dumps(dict(params), separators=(",", ":"))[:-1])
+        key_prefixes = {}
+        for output_format in (OUTPUT_FORMAT_WAV, OUTPUT_FORMAT_MP3, OUTPUT_FORMAT_OPUS):
+            encoded = encode_material(
+                cache_material({**params, "text": "", "output_format": output_format})
+            )
+            # "text" is the last key, so everything before its value is fixed
+            prefix = encoded[: -len('""}')]
+            key_prefixes[output_format] = hashlib.sha256(prefix.encode("utf-8"))
+        object.__setattr__(self, "_key_prefixes", key_prefixes)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PayloadTemplate is immutable")
+
+    def payload(self, text, output_format):
+        """Return the payload for text in the given output format."""
+        payload = PresetPayload(self.params)
+        payload["text"] = text
+        payload["output_format"] = output_format
+        payload.template = self
+        payload.body = (
+            f'{self._body_prefix},"text":{json.dumps(text)},'
+            f'"output_format":{json.dumps(output_format)}}}'
+        ).encode("utf-8")
+        return payload
+
+    def cache_key(self, text, output_format):
+        """Return the audio cache key of text rendered with this template."""
+        digest = self._key_prefixes[output_format].copy()
+        digest.update(f"{json.dumps(text)}}}".encode("utf-8"))
+        return digest.hexdigest()
@@ -0,0 +1,343 @@
+"""Debug instrumentation: event loop stall detection, callback timing and profiling."""
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import types
+from collections import Counter
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import LOOP_BLOCK_THRESHOLD, PROFILE_SAMPLE_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+# Frames of a stall's stack sample included in the log
+STACK_DEPTH = 15
+# Functions listed in the instrumentation summary
+SUMMARY_SIZE = 10
+
+PROFILE_FORMAT_CPROFILE = "cprofile"
+PROFILE_FORMAT_FOLDED = "folded"
+PROFILE_FORMATS = [PROFILE_FORMAT_CPROFILE, PROFILE_FORMAT_FOLDED]
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_THIS_FILE = os.path.abspath(__file__)
+
+
+def _in_integration(frame):
+    """Return True for frames of the integration, other than this module's wrappers."""
+    filename = os.path.abspath(frame.f_code.co_filename)
+    return filename.startswith(_PACKAGE_DIR) and filename != _THIS_FILE
+
+
+def _frame_label(frame):
+    """Return a frame as "function (file:line)", the format of py-spy's raw output."""
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{frame.f_lineno})"
+
+
+def _stack(frame):
+    """Return the frames of a stack from the outermost to frame."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+class CallStats:
+    """Calls and event loop hold time of one instrumented function."""
+
+    __slots__ = ("calls", "total", "max")
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Add one synchronous step of seconds."""
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+@types.coroutine
+def _timed_steps(coro, stats):
+    """Drive coro, timing each step it runs on the event loop.
+
+    The time between awaits is the time the coroutine holds the loop;
+    time spent waiting on I/O is not counted.
+    """
+    value = None
+    error = None
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                if error is None:
+                    future = coro.send(value)
+                else:
+                    future = coro.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                stats.record(time.perf_counter() - started)
+            value = error = None
+            try:
+                value = yield future
+            except GeneratorExit:
+                raise
+            except BaseException as ex:  # e.g. task cancellation, passed on to coro
+                error = ex
+    finally:
+        coro.close()
+
+
+class LoopWatchdog:
+    """Detect event loop stalls from a background thread.
+
+    A heartbeat scheduled on the loop records when it last ran. If it is
+    late by more than the threshold, the watchdog samples the loop
+    thread's stack while the stall is still happening and logs it.
+    """
+
+    def __init__(self, loop, threshold=LOOP_BLOCK_THRESHOLD):
+        """Initialize the watchdog."""
+        self._loop = loop
+        self._threshold = threshold
+        self._interval = threshold / 4
+        self._beat = time.monotonic()
+        self._loop_thread_id = None
+        self._handle = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._reported_beat = None
+        self.stalls = 0
+        self.blocked = 0.0
+        self.culprits = Counter()
+
+    @callback
+    def _heartbeat(self):
+        now = time.monotonic()
+        late = now - self._beat - self._interval
+        if late > self._threshold:
+            self.blocked += late
+        self._beat = now
+        self._handle = self._loop.call_later(self._interval, self._heartbeat)
+
+    def _sample(self, late):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        frames = _stack(frame)
+        ours = [f for f in frames if _in_integration(f)]
+        culprit = _frame_label(ours[-1]) if ours else _frame_label(frames[-1])
+        self.stalls += 1
+        self.culprits[culprit] += 1
+        stack = "".join(traceback.format_list(traceback.extract_stack(frame, STACK_DEPTH)))
+        # Stalls outside the integration are still worth knowing about, but not ours to fix
+        _LOGGER.log(
+            logging.WARNING if ours else logging.DEBUG,
+            "Event loop blocked for at least %.0f ms in %s:\n%s",
+            late * 1000, culprit, stack,
+        )
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            beat = self._beat
+            late = time.monotonic() - beat - self._interval
+            if late > self._threshold and beat != self._reported_beat:
+                # Report each stall once, while it is still in progress
+                self._reported_beat = beat
+                self._sample(late)
+
+    @callback
+    def async_start(self):
+        """Start the heartbeat and the watchdog thread (call from the loop)."""
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._handle = self._loop.call_later(self._interval, self._heartbeat)
+        self._thread = threading.Thread(target=self._run, name=f"{__name__}.watchdog", daemon=True)
+        self._thread.start()
+
+    @callback
+    def async_stop(self):
+        """Stop the heartbeat and the watchdog thread."""
+        self._stop.set()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+
+class Instrumentation:
+    """Process-wide switch and results of the debug instrumentation.
+
+    Entries with the debug option enable it; it stays on until the last
+    of them unloads. While off, instrumented functions only pay for one
+    attribute check.
+    """
+
+    def __init__(self):
+        """Initialize the instrumentation."""
+        self.enabled = False
+        self.calls = {}
+        self._users = 0
+        self._watchdog = None
+
+    def stats(self, name):
+        """Return the CallStats of a function, creating them on first use."""
+        stats = self.calls.get(name)
+        if stats is None:
+            stats = self.calls[name] = CallStats()
+        return stats
+
+    @callback
+    def async_enable(self, hass: HomeAssistant, threshold=LOOP_BLOCK_THRESHOLD):
+        """Turn instrumentation on; returns a callback turning it off again."""
+        self._users += 1
+        if not self.enabled:
+            _LOGGER.warning("Higgs Audio TTS debug instrumentation enabled")
+            self.enabled = True
+            self._watchdog = LoopWatchdog(hass.loop, threshold)
+            self._watchdog.async_start()
+
+        @callback
+        def disable():
+            self._users -= 1
+            if self._users <= 0 and self.enabled:
+                self.enabled = False
+                self._watchdog.async_stop()
+                self._watchdog = None
+
+        return disable
+
+    @property
+    def summary(self):
+        """Return stall counters and the functions holding the loop the longest, in ms."""
+        slowest = sorted(self.calls.items(), key=lambda item: item[1].total, reverse=True)
+        summary = {
+            "functions": {
+                name: {
+                    "calls": stats.calls,
+                    "loop_ms": round(stats.total * 1000, 2),
+                    "max_step_ms": round(stats.max * 1000, 2),
+                }
+                for name, stats in slowest[:SUMMARY_SIZE]
+            }
+        }
+        if self._watchdog is not None:
+            summary["stalls"] = self._watchdog.stalls
+            summary["blocked_ms"] = round(self._watchdog.blocked * 1000, 1)
+            summary["stall_sites"] = dict(self._watchdog.culprits.most_common(SUMMARY_SIZE))
+        return summary
+
+
+INSTRUMENTATION = Instrumentation()
+
+
+def instrumented(func):
+    """Time a coroutine function's loop steps, or a plain function's calls, while enabled."""
+    name = func.__qualname__.replace("<locals>.", "")
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not INSTRUMENTATION.enabled:
+                return await func(*args, **kwargs)
+            stats = INSTRUMENTATION.stats(name)
+            stats.calls += 1
+            return await _timed_steps(func(*args, **kwargs), stats)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not INSTRUMENTATION.enabled:
+            return func(*args, **kwargs)
+        stats = INSTRUMENTATION.stats(name)
+        stats.calls += 1
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.record(time.perf_counter() - started)
+
+    return wrapper
+
+
+class StackSampler:
+    """Sample the event loop thread's stack from a background thread.
+
+    The result is in the collapsed ("folded") format written by py-spy
+    with --format raw, which flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        """Initialize the sampler; call start() from the loop thread."""
+        self._interval = interval
+        self._thread_id = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.samples = Counter()
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.samples[";".join(_frame_label(f) for f in _stack(frame))] += 1
+
+    def start(self):
+        """Start sampling the calling thread."""
+        self._thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name=f"{__name__}.sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling."""
+        self._stop.set()
+
+    def dump(self, path):
+        """Write the samples to path (blocking)."""
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.samples.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+async def async_capture_profile(hass: HomeAssistant, duration, profile_format, path):
+    """Profile the event loop for duration seconds and write the result to path.
+
+    Returns the number of samples (folded) or function calls (cProfile)
+    recorded.
+    """
+    if profile_format == PROFILE_FORMAT_FOLDED:
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            sampler.stop()
+        await hass.async_add_executor_job(sampler.dump, path)
+        return sum(sampler.samples.values())
+
+    import cProfile
+
+    # cProfile only follows the thread it is enabled in, which is the loop thread
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        profiler.disable()
+    profiler.create_stats()
+    await hass.async_add_executor_job(profiler.dump_stats, path)
+    return sum(stat[1] for stat in profiler.stats.values())
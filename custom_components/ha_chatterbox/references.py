@@ -0,0 +1,88 @@
+"""Upload of voice clone reference clips with content-hash deduplication."""
+import hashlib
+import logging
+import os
+import re
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .errors import HiggsAudioError
+
+_LOGGER = logging.getLogger(__name__)
+
+REFERENCES_STORAGE_VERSION = 1
+
+# File types the server accepts as clone references
+REFERENCE_EXTENSIONS = (".wav", ".mp3")
+
+
+def _read_clip(path):
+    """Return the bytes of a clip and their SHA-256."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return data, hashlib.sha256(data).hexdigest()
+
+
+def reference_filename(name, digest, extension):
+    """Return the server filename of a reference clip.
+
+    The content hash is part of the name, so a changed clip never
+    overwrites the one a cached clone voice was rendered from.
+    """
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", name).strip("_") or "voice"
+    return f"{slug}-{digest[:12]}{extension}"
+
+
+class ReferenceManager:
+    """Upload reference clips once and remember where they live.
+
+    Clips are identified by the SHA-256 of their content. The mapping from
+    hash to server filename is stored, and the client tracks which
+    servers already hold each file, so uploading the same clip again only
+    sends it to servers that are missing it.
+    """
+
+    def __init__(self, hass: HomeAssistant, client, voices, entry_id):
+        """Initialize the manager."""
+        self.hass = hass
+        self._client = client
+        self._voices = voices
+        self._store = Store(hass, REFERENCES_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.references")
+        # content hash -> server filename
+        self._uploaded = {}
+
+    async def async_load(self):
+        """Load the known uploads from storage."""
+        data = await self._store.async_load()
+        if data:
+            self._uploaded = data.get("uploaded", {})
+
+    def _data_to_save(self):
+        return {"uploaded": self._uploaded}
+
+    async def async_upload(self, path, name=None):
+        """Make the clip at path available as a clone voice and return its filename."""
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in REFERENCE_EXTENSIONS:
+            raise HiggsAudioError(f"Unsupported reference audio type: {extension or path}")
+        data, digest = await self.hass.async_add_executor_job(_read_clip, path)
+
+        filename = self._uploaded.get(digest)
+        if filename is None:
+            filename = reference_filename(
+                name or os.path.splitext(os.path.basename(path))[0], digest, extension
+            )
+
+        uploaded = await self._client.async_upload_reference(filename, data)
+        if uploaded:
+            _LOGGER.info("Uploaded Higgs Audio TTS reference %s to %d servers", filename, uploaded)
+        else:
+            _LOGGER.debug("Higgs Audio TTS reference %s is already on every server", filename)
+
+        if self._uploaded.get(digest) != filename:
+            self._uploaded[digest] = filename
+            self._store.async_delay_save(self._data_to_save)
+        self._voices.async_add_clone(filename, name)
+        return filename
@@ -0,0 +1,134 @@
+"""Priority-aware scheduling of synthesis requests to the server."""
+import asyncio
+import heapq
+import itertools
+import logging
+
+from .const import DEFAULT_MAX_IN_FLIGHT, PRIORITY_NORMAL
+from .errors import HiggsAudioCancelledError, HiggsAudioDeadlineError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SynthesisScheduler:
+    """Limit requests in flight to the server and order the rest by priority.
+
+    Waiting requests are served lowest priority value first, then in
+    arrival order. A request whose deadline passes while it waits is
+    dropped before it reaches the server. cancel_all() fails every waiting
+    request and aborts the ones in flight.
+    """
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        """Initialize the scheduler."""
+        self._max_in_flight = max_in_flight
+        # Heap of (priority, sequence, waiter future, expiry loop time)
+        self._waiting = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._running = set()
+        self._interrupted = set()
+        # Bumped by cancel_all so running streams notice the interrupt
+        self._generation = 0
+        self.expired = 0
+        self.cancelled = 0
+
+    @property
+    def stats(self):
+        """Return scheduler counters."""
+        return {
+            "queued": sum(1 for item in self._waiting if not item[2].done()),
+            "in_flight": self._in_flight,
+            "max_in_flight": self._max_in_flight,
+            "expired": self.expired,
+            "cancelled": self.cancelled,
+        }
+
+    async def _async_acquire(self, priority, deadline):
+        """Wait until a slot is granted to this request."""
+        loop = asyncio.get_running_loop()
+        if self._in_flight < self._max_in_flight and not self._waiting:
+            self._in_flight += 1
+            return
+        generation = self._generation
+        expires = loop.time() + deadline if deadline else None
+        waiter = loop.create_future()
+        heapq.heappush(self._waiting, (priority, next(self._seq), waiter, expires))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # The slot was granted just as the caller went away
+                self._release()
+            raise
+        if generation != self._generation:
+            # Granted a slot, but an interrupt arrived before we resumed
+            self._release()
+            raise HiggsAudioCancelledError("Request cancelled by interrupt")
+
+    def _release(self):
+        self._in_flight -= 1
+        self._grant()
+
+    def _grant(self):
+        """Hand free slots to the highest priority live waiters."""
+        now = asyncio.get_running_loop().time()
+        while self._waiting and self._in_flight < self._max_in_flight:
+            _, _, waiter, expires = heapq.heappop(self._waiting)
+            if waiter.done():
+                continue
+            if expires is not None and now > expires:
+                self.expired += 1
+                waiter.set_exception(
+                    HiggsAudioDeadlineError("Request deadline passed before it reached the server")
+                )
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    async def async_run(self, factory, priority=PRIORITY_NORMAL, deadline=None):
+        """Run factory() once a slot is available and return its result."""
+        await self._async_acquire(priority, deadline)
+        task = asyncio.ensure_future(factory())
+        self._running.add(task)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if task in self._interrupted:
+                raise HiggsAudioCancelledError("Request cancelled by interrupt") from None
+            raise
+        finally:
+            self._running.discard(task)
+            self._interrupted.discard(task)
+            self._release()
+
+    async def async_stream(self, stream_factory, priority=PRIORITY_NORMAL, deadline=None):
+        """Yield from stream_factory() while holding a slot."""
+        await self._async_acquire(priority, deadline)
+        generation = self._generation
+        try:
+            async for chunk in stream_factory():
+                if generation != self._generation:
+                    raise HiggsAudioCancelledError("Stream cancelled by interrupt")
+                yield chunk
+        finally:
+            self._release()
+
+    def cancel_all(self):
+        """Cancel every waiting and running request; return how many."""
+        self._generation += 1
+        count = 0
+        while self._waiting:
+            _, _, waiter, _ = heapq.heappop(self._waiting)
+            if not waiter.done():
+                waiter.set_exception(HiggsAudioCancelledError("Request cancelled by interrupt"))
+                count += 1
+        for task in self._running:
+            if not task.done():
+                self._interrupted.add(task)
+                task.cancel()
+                count += 1
+        self.cancelled += count
+        if count:
+            _LOGGER.debug("Cancelled %d Higgs Audio TTS requests", count)
+        return count
@@ -4,20 +4,24 @@ Higgs Audio TTS Sensor Platform for Home Assistant
 Provides sensors for monitoring Higgs Audio TTS server status and queue.
 """
 import logging
-import requests
 from datetime import timedelta
 
 import voluptuous as vol
 
-from homeassistant.components.sensor import PLATFORM_SCHEMA
+from homeassistant.components.sensor import PLATFORM_SCHEMA, SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL
-from homeassistant.helpers.entity import Entity
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 import homeassistant.helpers.config_validation as cv
 
+from .client import HiggsAudioClient
+from .coordinator import HiggsAudioDataUpdateCoordinator
+from .errors import HiggsAudioConnectionError
 from .const import DOMAIN
+from .profiling import INSTRUMENTATION, instrumented
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,6 +29,12 @@ DEFAULT_HOST = "172.30.3.9"
 DEFAULT_PORT = 8005
 DEFAULT_SCAN_INTERVAL = timedelta(seconds=60)
 
+# Unique IDs the status and queue sensors had before they were per entry
+LEGACY_UNIQUE_IDS = {
+    "higgs_audio_tts_status": "status",
+    "Higgs_Audio_tts_queue": "queue",
+}
+
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
         vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
@@ -33,20 +43,22 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     }
 )
 
-def setup_platform(hass, config, add_entities, discovery_info=None):
+async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up the Higgs Audio TTS sensor platform."""
     host = config.get(CONF_HOST, DEFAULT_HOST)
     port = config.get(CONF_PORT, DEFAULT_PORT)
     scan_interval = config.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
     
-    base_url = f"http://{host}:{port}"
+    client = HiggsAudioClient(hass, f"http://{host}:{port}")
+    coordinator = HiggsAudioDataUpdateCoordinator(hass, client, slow_interval=scan_interval)
+    await coordinator.async_refresh()
     
     sensors = [
-       HiggsAudioTTSQueueSensor(base_url, scan_interval),
-       HiggsAudioTTSStatusSensor(base_url, scan_interval),
+       HiggsAudioTTSQueueSensor(coordinator),
+       HiggsAudioTTSStatusSensor(coordinator),
     ]
     
-    add_entities(sensors, True)
+    async_add_entities(sensors)
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
@@ -54,31 +66,45 @@ async def async_setup_entry(
     """Set up Higgs Audio TTS sensors from a config entry."""
     _LOGGER.debug("Setting up Higgs Audio TTS sensors from config entry")
 
-    # Get the stored configuration from the integration
+    # All sensors of the entry share one coordinator
     data = hass.data[DOMAIN][entry.entry_id]
-    base_url = data["base_url"]
-    
-    # Create sensors with default scan interval
-    scan_interval = DEFAULT_SCAN_INTERVAL
+    coordinator = data["coordinator"]
     
+    _async_migrate_unique_ids(hass, entry)
+
     sensors = [
-       HiggsAudioTTSQueueSensor(base_url, scan_interval),
-       HiggsAudioTTSStatusSensor(base_url, scan_interval),
+       HiggsAudioTTSQueueSensor(coordinator, entry),
+       HiggsAudioTTSStatusSensor(coordinator, entry),
+       HiggsAudioTTSRequestsSensor(entry, data),
+       HiggsAudioTTSLatencySensor(entry, data),
     ]
     
-    async_add_entities(sensors, True)
+    async_add_entities(sensors)
     _LOGGER.debug("Added %d Higgs Audio TTS sensors", len(sensors))
 
-class HiggsAudioTTSStatusSensor(Entity):
+    # Fetch the first data in the background so setup doesn't wait on the server
+    entry.async_create_background_task(
+        hass, coordinator.async_refresh(), f"{DOMAIN} first sensor refresh"
+    )
+
+def _async_migrate_unique_ids(hass, entry):
+    """Move the status and queue sensors to unique IDs prefixed with the entry."""
+    registry = er.async_get(hass)
+    for old, suffix in LEGACY_UNIQUE_IDS.items():
+        entity_id = registry.async_get_entity_id("sensor", DOMAIN, old)
+        if entity_id is None:
+            continue
+        new = f"{entry.entry_id}_{suffix}"
+        if registry.async_get_entity_id("sensor", DOMAIN, new) is None:
+            registry.async_update_entity(entity_id, new_unique_id=new)
+
+class HiggsAudioTTSStatusSensor(CoordinatorEntity):
     """Representation of Higgs Audio TTS server status sensor."""
 
-    def __init__(self, base_url, scan_interval):
+    def __init__(self, coordinator, entry=None):
         """Initialize the sensor."""
-        self._base_url = base_url
-        self._scan_interval = scan_interval
-        self._state = None
-        self._attributes = {}
-        self._available = True
+        super().__init__(coordinator)
+        self._entry = entry
 
     @property
     def name(self):
@@ -88,58 +114,51 @@ class HiggsAudioTTSStatusSensor(Entity):
     @property
     def unique_id(self):
         """Return unique ID for this sensor."""
-        return "higgs_audio_tts_status"
+        if self._entry is None:
+            return "higgs_audio_tts_status"
+        return f"{self._entry.entry_id}_status"
+
+    @property
+    def _health(self):
+        data = self.coordinator.data if self.coordinator.last_update_success else None
+        return data["health"] if data else None
 
     @property
     def state(self):
         """Return the state of the sensor."""
-        return self._state
+        health = self._health
+        if health is not None:
+            return health.get("status", "unknown")
+        data = self.coordinator.data if self.coordinator.last_update_success else None
+        if data and not isinstance(data["health_error"], HiggsAudioConnectionError):
+            return "error"
+        return "unavailable"
 
     @property
     def extra_state_attributes(self):
         """Return the state attributes."""
-        return self._attributes
+        health = self._health
+        if health is None:
+            return {}
+        return {
+            "message": health.get("message", ""),
+            "version": health.get("version", ""),
+            "character": health.get("character", ""),
+            "components": health.get("components", {}),
+        }
 
     @property
     def available(self):
         """Return True if entity is available."""
-        return self._available
-
-    def update(self):
-        """Update the sensor."""
-        try:
-            url = f"{self._base_url}/health"
-            response = requests.get(url, timeout=15)
-            
-            if response.status_code == 200:
-                data = response.json()
-                self._state = data.get("status", "unknown")
-                self._attributes = {
-                    "message": data.get("message", ""),
-                    "version": data.get("version", ""),
-                    "character": data.get("character", ""),
-                    "components": data.get("components", {}),
-                }
-                self._available = True
-            else:
-                self._state = "error"
-                self._available = False
-                
-        except requests.exceptions.RequestException:
-            self._state = "unavailable" 
-            self._available = False
-            _LOGGER.warning("Could not connect to Higgs Audio TTS server")
-
-class HiggsAudioTTSQueueSensor(Entity):
+        return self._health is not None
+
+class HiggsAudioTTSQueueSensor(CoordinatorEntity):
     """Representation of Higgs Audio TTS queue sensor."""
 
-    def __init__(self, base_url, scan_interval):
+    def __init__(self, coordinator, entry=None):
         """Initialize the sensor."""
-        self._base_url = base_url
-        self._scan_interval = scan_interval
-        self._state = None
-        self._attributes = {}
-        self._available = True
+        super().__init__(coordinator)
+        self._entry = entry
 
     @property
     def name(self):
@@ -149,49 +168,144 @@ class HiggsAudioTTSQueueSensor(Entity):
     @property
     def unique_id(self):
         """Return unique ID for this sensor."""
-        return "Higgs_Audio_tts_queue"
+        if self._entry is None:
+            # YAML sensors keep their original ID so registry entries stay valid
+            return "Higgs_Audio_tts_queue"
+        return f"{self._entry.entry_id}_queue"
+
+    @property
+    def _queue(self):
+        data = self.coordinator.data if self.coordinator.last_update_success else None
+        return data["queue"] if data else None
 
     @property
     def state(self):
         """Return the state of the sensor."""
-        return self._state
+        queue = self._queue
+        return queue.get("queue_size", 0) if queue is not None else None
 
     @property
     def extra_state_attributes(self):
         """Return the state attributes."""
-        return self._attributes
+        queue = self._queue
+        if queue is None:
+            return {}
+        return {
+            "queue_enabled": queue.get("queue_enabled", False),
+            "is_playing": queue.get("is_playing", False),
+            "current_item": queue.get("current_item", None),
+            "estimated_wait_seconds": queue.get("estimated_wait_seconds", 0),
+        }
 
     @property
     def available(self):
         """Return True if entity is available."""
-        return self._available
+        return self._queue is not None
 
     @property
     def unit_of_measurement(self):
         """Return the unit of measurement."""
         return "items"
 
-    def update(self):
-        """Update the sensor."""
-        try:
-            url = f"{self._base_url}/queue/status"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                self._state = data.get("queue_size", 0)
-                self._attributes = {
-                    "queue_enabled": data.get("queue_enabled", False),
-                    "is_playing": data.get("is_playing", False),
-                    "current_item": data.get("current_item", None),
-                    "estimated_wait_seconds": data.get("estimated_wait_seconds", 0),
-                }
-                self._available = True
-            else:
-                self._state = None
-                self._available = False
-                
-        except requests.exceptions.RequestException:
-            self._state = None
-            self._available = False
-            _LOGGER.warning("Could not get Higgs Audio TTS queue status")
+class HiggsAudioTTSMetricsSensor(SensorEntity):
+    """Base class for sensors fed by the client's request metrics."""
+
+    _attr_should_poll = False
+
+    def __init__(self, entry, data):
+        """Initialize the sensor."""
+        self._entry = entry
+        self._client = data["client"]
+        self._cache = data.get("cache")
+        self._data = data
+        self._metrics = self._client.metrics
+
+    async def async_added_to_hass(self):
+        """Update whenever a request finishes."""
+        self.async_on_remove(self._metrics.async_add_listener(self.async_write_ha_state))
+
+class HiggsAudioTTSRequestsSensor(HiggsAudioTTSMetricsSensor):
+    """Number of synthesis requests sent to the server."""
+
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = "requests"
+    # Nested stats change with every request; keep them out of the recorder
+    _unrecorded_attributes = frozenset(
+        {"fallbacks", "coalescing", "queue", "buffers", "servers", "cache", "startup", "instrumentation"}
+    )
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return "Higgs Audio TTS Requests"
+
+    @property
+    def unique_id(self):
+        """Return unique ID for this sensor."""
+        return f"{self._entry.entry_id}_requests"
+
+    @property
+    def native_value(self):
+        """Return the number of requests."""
+        return self._metrics.requests
+
+    @property
+    @instrumented
+    def extra_state_attributes(self):
+        """Return throughput counters."""
+        rtf = self._metrics.percentiles(field="realtime_factor")[0.5]
+        attributes = {
+            "failures": self._metrics.failures,
+            "bytes": self._metrics.bytes,
+            "characters": self._metrics.characters,
+            "audio_seconds": round(self._metrics.audio_seconds, 1),
+            "fallbacks": dict(self._metrics.fallbacks),
+            "realtime_factor_p50": round(rtf, 2) if rtf is not None else None,
+            "coalescing": self._client.coalescing_stats,
+            "queue": self._client.scheduler_stats,
+            "buffers": self._client.buffer_stats,
+            "servers": self._client.server_stats,
+        }
+        if self._cache:
+            attributes["cache"] = self._cache.stats
+        if "startup" in self._data:
+            attributes["startup"] = self._data["startup"]
+        if INSTRUMENTATION.enabled:
+            attributes["instrumentation"] = INSTRUMENTATION.summary
+        return attributes
+
+class HiggsAudioTTSLatencySensor(HiggsAudioTTSMetricsSensor):
+    """Rolling p95 end-to-end synthesis latency."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = "ms"
+    _unrecorded_attributes = frozenset({"voices", "last_request"})
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return "Higgs Audio TTS Latency"
+
+    @property
+    def unique_id(self):
+        """Return unique ID for this sensor."""
+        return f"{self._entry.entry_id}_latency"
+
+    @property
+    def native_value(self):
+        """Return the p95 total latency across voices."""
+        p95 = self._metrics.percentiles(field="total")[0.95]
+        return round(p95 * 1000, 1) if p95 is not None else None
+
+    @property
+    @instrumented
+    def extra_state_attributes(self):
+        """Return per-voice percentiles and the last request breakdown."""
+        last = self._metrics.last
+        return {
+            "voices": self._metrics.summary["voices"],
+            "last_request": {
+                key: round(value * 1000, 1) if isinstance(value, float) and key != "realtime_factor" else value
+                for key, value in last.items()
+            } if last else None,
+        }
@@ -2,23 +2,56 @@
 # These services are automatically registered when the component loads
 
 """Services provided by the Higgs Audio TTS custom component."""
+import functools
 import logging
-import requests
-import voluptuous as vol
 import os
-from datetime import datetime
+import time
+import voluptuous as vol
 
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.const import ATTR_ENTITY_ID
 
-from .const import DOMAIN, CONF_VOICE, CONF_TEMPERATURE, CONF_EXAGGERATION, CONF_CFG_WEIGHT, CONF_SEED, CONF_SPEED_FACTOR
+from .errors import (
+    HiggsAudioCancelledError,
+    HiggsAudioCircuitOpenError,
+    HiggsAudioDeadlineError,
+    HiggsAudioError,
+    HiggsAudioResponseError,
+    HiggsAudioResponseTooLargeError,
+)
+from .const import (
+    DOMAIN,
+    CONF_TEMPERATURE,
+    CONF_EXAGGERATION,
+    CONF_CFG_WEIGHT,
+    CONF_SPEED_FACTOR,
+    DEFAULT_DEADLINE,
+    OUTPUT_DIR,
+    OUTPUT_FORMATS,
+    PRIORITIES,
+    PROFILE_DIR,
+    PROFILE_MAX_DURATION,
+)
+from .formats import FORMAT_EXTENSIONS
+from .persist import AudioWriter
+from .presets import SEED_VALIDATOR, param_validator
+from .profiling import (
+    INSTRUMENTATION,
+    PROFILE_FORMAT_CPROFILE,
+    PROFILE_FORMATS,
+    async_capture_profile,
+    instrumented,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 SERVICE_SPEAK = "speak"
 SERVICE_INTERRUPT = "interrupt"
 SERVICE_SET_VOICE = "set_voice"
+SERVICE_UPLOAD_REFERENCE = "upload_reference"
+SERVICE_PROFILE = "profile"
 
 ATTR_MESSAGE = "message"
 ATTR_VOICE = "voice"
@@ -27,37 +60,82 @@ ATTR_EXAGGERATION = "exaggeration"
 ATTR_CFG_WEIGHT = "cfg_weight"
 ATTR_SEED = "seed"
 ATTR_SPEED_FACTOR = "speed_factor"
+ATTR_PRIORITY = "priority"
+ATTR_DEADLINE = "deadline"
+ATTR_OUTPUT_FORMAT = "output_format"
+ATTR_PRESET = "preset"
+ATTR_FILE = "file"
+ATTR_NAME = "name"
+ATTR_DURATION = "duration"
+ATTR_FORMAT = "format"
 
 SPEAK_SCHEMA = vol.Schema(
     {
         vol.Required(ATTR_MESSAGE): cv.string,
-        vol.Optional(ATTR_VOICE, default="Emily"): cv.string,
-        vol.Optional(ATTR_TEMPERATURE, default=0.8): vol.Range(min=0.0, max=1.0),
-        vol.Optional(ATTR_EXAGGERATION, default=1.0): vol.Range(min=0.0, max=2.0),
-        vol.Optional(ATTR_CFG_WEIGHT, default=0.5): vol.Range(min=0.0, max=1.0),
-        vol.Optional(ATTR_SEED, default=0): cv.positive_int,
-        vol.Optional(ATTR_SPEED_FACTOR, default=1.0): vol.Range(min=0.5, max=1.5),
+        vol.Optional(ATTR_VOICE): cv.string,
+        vol.Optional(ATTR_TEMPERATURE): param_validator(CONF_TEMPERATURE),
+        vol.Optional(ATTR_EXAGGERATION): param_validator(CONF_EXAGGERATION),
+        vol.Optional(ATTR_CFG_WEIGHT): param_validator(CONF_CFG_WEIGHT),
+        vol.Optional(ATTR_SEED): SEED_VALIDATOR,
+        vol.Optional(ATTR_SPEED_FACTOR): param_validator(CONF_SPEED_FACTOR),
+        vol.Optional(ATTR_PRESET): cv.string,
+        vol.Optional(ATTR_PRIORITY, default="normal"): vol.In(list(PRIORITIES)),
+        vol.Optional(ATTR_DEADLINE, default=DEFAULT_DEADLINE): vol.All(
+            vol.Coerce(float), vol.Range(min=1)
+        ),
+        vol.Optional(ATTR_OUTPUT_FORMAT): vol.In(OUTPUT_FORMATS),
     }
 )
 
+# Speak fields that override the entry's TTS options when given
+SPEAK_OPTIONS = (
+    ATTR_VOICE,
+    ATTR_TEMPERATURE,
+    ATTR_EXAGGERATION,
+    ATTR_CFG_WEIGHT,
+    ATTR_SEED,
+    ATTR_SPEED_FACTOR,
+    ATTR_PRESET,
+    ATTR_OUTPUT_FORMAT,
+)
+
 VOICE_SCHEMA = vol.Schema(
     {
         vol.Required(ATTR_VOICE): cv.string,
     }
 )
 
+UPLOAD_REFERENCE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_FILE): cv.string,
+        vol.Optional(ATTR_NAME): cv.string,
+    }
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=30): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=PROFILE_MAX_DURATION)
+        ),
+        vol.Optional(ATTR_FORMAT, default=PROFILE_FORMAT_CPROFILE): vol.In(PROFILE_FORMATS),
+    }
+)
+
 def async_setup_services(hass: HomeAssistant) -> None:
     """Set up services for Higgs Audio TTS."""
+    writer = AudioWriter(hass, hass.config.path("www", OUTPUT_DIR))
+    profiling = False
 
     async def handle_speak(call: ServiceCall) -> None:
         """Handle the speak service call."""
         message = call.data.get(ATTR_MESSAGE)
-        voice = call.data.get(ATTR_VOICE, "Emily")
-        temperature = call.data.get(ATTR_TEMPERATURE, 0.8)
-        exaggeration = call.data.get(ATTR_EXAGGERATION, 1.0)
-        cfg_weight = call.data.get(ATTR_CFG_WEIGHT, 0.5)
-        seed = call.data.get(ATTR_SEED, 0)
-        speed_factor = call.data.get(ATTR_SPEED_FACTOR, 1.0)
+        priority = PRIORITIES[call.data.get(ATTR_PRIORITY, "normal")]
+        deadline = call.data.get(ATTR_DEADLINE, DEFAULT_DEADLINE)
+        # Fields left out fall back to the entry's options, as for TTS calls
+        options = {key: call.data[key] for key in SPEAK_OPTIONS if key in call.data}
+        voice = options.get(ATTR_VOICE)
+        if voice and not voice.endswith(".wav"):
+            options[ATTR_VOICE] = f"{voice}.wav"
         
         # Get the first config entry (assuming single instance)
         config_entries = hass.config_entries.async_entries(DOMAIN)
@@ -66,63 +144,44 @@ def async_setup_services(hass: HomeAssistant) -> None:
             return
             
         config = hass.data[DOMAIN][config_entries[0].entry_id]
-        base_url = config["base_url"]
-        
-        # Add .wav extension if not present
-        voice_filename = voice if voice.endswith('.wav') else f"{voice}.wav"
-        
-        data = {
-            "text": message,
-            "voice_mode": "predefined",  # Required parameter
-            "predefined_voice_id": voice_filename,
-            "output_format": "wav",  # Request WAV format to match main entity
-            "format": "wav",  # Try alternate parameter name
-            "temperature": temperature,
-            "exaggeration": exaggeration,
-            "cfg_weight": cfg_weight,
-            "seed": seed,
-            "speed_factor": speed_factor
-        }
+        client = config["client"]
+        provider = hass.data[DOMAIN].get(f"{config_entries[0].entry_id}_provider")
+        if provider is None:
+            _LOGGER.error("Higgs Audio TTS is not set up yet")
+            return
+        preset = options.get(ATTR_PRESET)
+        if preset and preset not in provider.presets:
+            _LOGGER.error("Unknown Higgs Audio TTS preset: %s", preset)
+            return
+        data = provider.speak_payload(message, options)
         
+        # Save the audio file permanently (not cache) as it downloads, so
+        # long audio never has to fit in memory
         try:
-            url = f"{base_url}/tts"
-            response = await hass.async_add_executor_job(
-                requests.post,
-                url,
-                {"json": data, "headers": {"Content-Type": "application/json"}, "timeout": 30}
+            await writer.async_save_stream(
+                client.async_stream_synthesize(data, priority, deadline),
+                FORMAT_EXTENSIONS[data["output_format"]],
             )
-            
-            if response.status_code == 200:
-                _LOGGER.info("Higgs Audio TTS spoke: %s (voice: %s)", message, voice)
-                
-                # Save the audio file permanently (not cache)
-                try:
-                    # Use www directory for permanent web-accessible storage
-                    config_dir = hass.config.config_dir
-                    output_dir = os.path.join(config_dir, "www", "higgs_audio_tts")
-                    os.makedirs(output_dir, exist_ok=True)
-                    
-                    # Generate timestamp-based filename similar to server
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"tts_output_{timestamp}.wav"
-                    filepath = os.path.join(output_dir, filename)
-                    
-                    # Save the audio data to file
-                    with open(filepath, 'wb') as f:
-                        f.write(response.content)
-                    
-                    _LOGGER.info("Audio saved permanently: %s (%d bytes)", filepath, len(response.content))
-                    _LOGGER.info("File accessible at: /local/chatterbox_tts/%s", filename)
-                    
-                except Exception as save_error:
-                    _LOGGER.error("Failed to save audio file: %s", save_error)
-                    # Continue anyway - don't fail service just because saving failed
-                    
-            else:
-                _LOGGER.error("Higgs Audio TTS speak failed: %s", response.status_code)
-                
-        except Exception as ex:
+        except HiggsAudioResponseError as ex:
+            _LOGGER.error("Higgs Audio TTS speak failed: %s", ex.status)
+            return
+        except (HiggsAudioCancelledError, HiggsAudioCircuitOpenError, HiggsAudioDeadlineError) as ex:
+            _LOGGER.warning("Higgs Audio TTS speak dropped: %s", ex)
+            return
+        except HiggsAudioResponseTooLargeError as ex:
+            _LOGGER.error("Higgs Audio TTS speak rejected: %s", ex)
+            return
+        except HiggsAudioError as ex:
             _LOGGER.error("Error calling Higgs Audio TTS speak service: %s", ex)
+            return
+        except OSError as ex:
+            _LOGGER.error("Failed to save audio file: %s", ex)
+            return
+
+        _LOGGER.info(
+            "Higgs Audio TTS spoke: %s (voice: %s)",
+            message, data.get("predefined_voice_id") or data.get("reference_audio_filename"),
+        )
 
     async def handle_interrupt(call: ServiceCall) -> None:
         """Handle the interrupt service call."""
@@ -133,31 +192,52 @@ def async_setup_services(hass: HomeAssistant) -> None:
             return
             
         config = hass.data[DOMAIN][config_entries[0].entry_id]
-        base_url = config["base_url"]
+        client = config["client"]
+
+        # Drop anything still queued locally before it reaches the GPU
+        cancelled = client.cancel_pending()
+        if cancelled:
+            _LOGGER.info("Cancelled %d pending Higgs Audio TTS requests", cancelled)
         
         try:
-            url = f"{base_url}/interrupt"
-            response = await hass.async_add_executor_job(
-                requests.post,
-                url,
-                {"timeout": 10}
-            )
-            
-            if response.status_code == 200:
-                _LOGGER.info("Higgs Audio TTS interrupted")
-            else:
-                _LOGGER.error("Higgs Audio TTS interrupt failed: %s", response.status_code)
-
-        except Exception as ex:
+            await client.async_interrupt()
+        except HiggsAudioResponseError as ex:
+            _LOGGER.error("Higgs Audio TTS interrupt failed: %s", ex.status)
+        except HiggsAudioError as ex:
             _LOGGER.error("Error calling Higgs Audio TTS interrupt service: %s", ex)
+        else:
+            _LOGGER.info("Higgs Audio TTS interrupted")
 
     async def handle_set_voice(call: ServiceCall) -> None:
         """Handle the set voice service call."""
         voice = call.data.get(ATTR_VOICE)
+
+        config_entries = hass.config_entries.async_entries(DOMAIN)
+        catalog = None
+        if config_entries and config_entries[0].entry_id in hass.data[DOMAIN]:
+            catalog = hass.data[DOMAIN][config_entries[0].entry_id]["voices"]
+        if catalog is not None:
+            filename = catalog.resolve(voice)
+            if filename is None:
+                _LOGGER.error("Unknown Higgs Audio TTS voice: %s", voice)
+                return
+            voice = catalog.display_names[filename]
         
         # Update input_select if it exists
         input_select_entity = "input_select.ha_chatterbox_voice"
-        if hass.states.get(input_select_entity):
+        state = hass.states.get(input_select_entity)
+        if state:
+            if catalog is not None and voice not in state.attributes.get("options", []):
+                # Offer every voice the server knows about
+                await hass.services.async_call(
+                    "input_select",
+                    "set_options",
+                    {
+                        ATTR_ENTITY_ID: input_select_entity,
+                        "options": list(catalog.display_names.values()),
+                    },
+                    blocking=True,
+                )
             await hass.services.async_call(
                 "input_select",
                 "select_option",
@@ -166,15 +246,81 @@ def async_setup_services(hass: HomeAssistant) -> None:
 
         _LOGGER.info("Higgs Audio TTS voice set to: %s", voice)
 
+    async def handle_upload_reference(call: ServiceCall):
+        """Handle the upload reference service call."""
+        config_entries = hass.config_entries.async_entries(DOMAIN)
+        if not config_entries or config_entries[0].entry_id not in hass.data[DOMAIN]:
+            raise HomeAssistantError("No Higgs Audio TTS configuration found")
+        references = hass.data[DOMAIN][config_entries[0].entry_id]["references"]
+
+        path = hass.config.path(call.data[ATTR_FILE])
+        if not hass.config.is_allowed_path(path):
+            raise HomeAssistantError(f"Reading {path} is not allowed")
+        try:
+            filename = await references.async_upload(path, call.data.get(ATTR_NAME))
+        except OSError as ex:
+            raise HomeAssistantError(f"Could not read {path}: {ex}") from ex
+        except HiggsAudioError as ex:
+            raise HomeAssistantError(f"Could not upload reference audio: {ex}") from ex
+
+        _LOGGER.info("Higgs Audio TTS clone voice available: %s", filename)
+        return {"voice": filename}
+
+    async def handle_profile(call: ServiceCall):
+        """Handle the profile service call."""
+        nonlocal profiling
+        if profiling:
+            raise HomeAssistantError("A Higgs Audio TTS profile capture is already running")
+        duration = call.data[ATTR_DURATION]
+        profile_format = call.data[ATTR_FORMAT]
+        extension = "prof" if profile_format == PROFILE_FORMAT_CPROFILE else "txt"
+        directory = hass.config.path(PROFILE_DIR)
+        path = os.path.join(directory, f"profile_{time.strftime('%Y%m%d_%H%M%S')}.{extension}")
+
+        profiling = True
+        try:
+            await hass.async_add_executor_job(functools.partial(os.makedirs, directory, exist_ok=True))
+            _LOGGER.info("Profiling the event loop for %.0f s", duration)
+            count = await async_capture_profile(hass, duration, profile_format, path)
+        except ValueError as ex:
+            # Only one profiler can run at a time, e.g. not alongside the profiler integration
+            raise HomeAssistantError(f"Could not start profiling: {ex}") from ex
+        except OSError as ex:
+            raise HomeAssistantError(f"Could not write {path}: {ex}") from ex
+        finally:
+            profiling = False
+
+        _LOGGER.info("Higgs Audio TTS profile written to %s", path)
+        response = {"path": path, "format": profile_format, "samples": count}
+        if INSTRUMENTATION.enabled:
+            response["instrumentation"] = INSTRUMENTATION.summary
+        return response
+
     # Register services
     hass.services.async_register(
-        DOMAIN, SERVICE_SPEAK, handle_speak, schema=SPEAK_SCHEMA
+        DOMAIN, SERVICE_SPEAK, instrumented(handle_speak), schema=SPEAK_SCHEMA
     )
     
     hass.services.async_register(
-        DOMAIN, SERVICE_INTERRUPT, handle_interrupt
+        DOMAIN, SERVICE_INTERRUPT, instrumented(handle_interrupt)
     )
     
     hass.services.async_register(
-        DOMAIN, SERVICE_SET_VOICE, handle_set_voice, schema=VOICE_SCHEMA
+        DOMAIN, SERVICE_SET_VOICE, instrumented(handle_set_voice), schema=VOICE_SCHEMA
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_UPLOAD_REFERENCE,
+        instrumented(handle_upload_reference),
+        schema=UPLOAD_REFERENCE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        handle_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
     )
@@ -1,15 +1,30 @@
 """Higgs Audio TTS Provider Platform for Home Assistant."""
-import logging
-import requests
-import json
-import os
 import functools
+import logging
+from datetime import timedelta
 import voluptuous as vol
 
-from homeassistant.components.tts import Provider, PLATFORM_SCHEMA, TtsAudioType
+from homeassistant.components.tts import (
+    PLATFORM_SCHEMA,
+    Provider,
+    TextToSpeechEntity,
+    TtsAudioType,
+    TTSAudioRequest,
+    TTSAudioResponse,
+    Voice,
+    async_get_text_to_speech_entity,
+)
 from homeassistant.const import CONF_NAME
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.start import async_at_started
 import homeassistant.helpers.config_validation as cv
+from .cache import make_cache_key
+from .chunking import async_pipeline, split_text
+from .client import HiggsAudioClient
+from .dialogue import Segment, parse_script, script_text
 from .const import (
+    AVAILABLE_VOICES,
     DOMAIN,
     DEFAULT_HOST,
     DEFAULT_PORT,
@@ -25,7 +40,56 @@ from .const import (
     CONF_CFG_WEIGHT,
     CONF_SEED,
     CONF_SPEED_FACTOR,
+    CONF_CHUNK_SIZE,
+    CONF_SYNTHESIS_CONCURRENCY,
+    CONF_PRIORITY,
+    CONF_DEADLINE,
+    CONF_OUTPUT_FORMAT,
+    CONF_MEDIA_PLAYER,
+    CONF_FALLBACK_ENGINE,
+    CONF_PRESET,
+    CONF_PRESETS,
+    CONF_TRIM_SILENCE,
+    CONF_NORMALIZE_LOUDNESS,
+    CONF_LOCAL_SPEED,
+    CONF_NORMALIZE_TEXT,
+    CONF_PHRASE_TEMPLATES,
+    CONF_WARMUP_PHRASES,
+    CONF_WARMUP_TOP_N,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_SYNTHESIS_CONCURRENCY,
+    DEFAULT_DEADLINE,
+    DEFAULT_OUTPUT_FORMAT,
+    DEFAULT_PRESETS,
+    DEFAULT_WARMUP_TOP_N,
+    DIALOGUE_CONCURRENCY,
+    OUTPUT_FORMATS,
+    OUTPUT_FORMAT_AUTO,
+    OUTPUT_FORMAT_WAV,
+    PRIORITIES,
+    PRIORITY_NORMAL,
+    WARMUP_INTERVAL,
+)
+from .errors import (
+    HiggsAudioCancelledError,
+    HiggsAudioCircuitOpenError,
+    HiggsAudioDeadlineError,
+    HiggsAudioError,
+    HiggsAudioResponseError,
+    HiggsAudioResponseTooLargeError,
 )
+from .formats import (
+    FORMAT_EXTENSIONS,
+    async_join_audio_stream,
+    join_audio,
+    player_platform,
+    resolve_format,
+)
+from .presets import PayloadTemplate, PresetPayload, parse_presets
+from .profiling import instrumented
+from .voices import display_name
+from .warmup import PhraseWarmer, parse_phrases
+from .wav import WavFormatError
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,49 +98,22 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend({
     vol.Optional(CONF_NAME, default="Higgs Audio TTS"): cv.string,
 })
 
-# Load voices from strings.json, fallback to const.py AVAILABLE_VOICES
-_DEF_VOICES = None
-
-def _load_voices():
-    """Load available voices from strings.json or fallback to constants."""
-    global _DEF_VOICES
-    if _DEF_VOICES is not None:
-        return _DEF_VOICES
-    try:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        strings_path = os.path.join(current_dir, "strings.json")
-        if os.path.exists(strings_path):
-            with open(strings_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                voices_data = data.get("voices", {})
-                if voices_data:
-                    _DEF_VOICES = list(voices_data.keys())
-                    _LOGGER.info("Loaded %d voices from strings.json", len(_DEF_VOICES))
-                    return _DEF_VOICES
-    except Exception as ex:
-        _LOGGER.warning("Could not load voices from strings.json: %s", ex)
-    
-    # Fallback to constants
-    try:
-        from .const import AVAILABLE_VOICES
-        _DEF_VOICES = AVAILABLE_VOICES
-        _LOGGER.info("Using fallback voices from constants (%d voices)", len(_DEF_VOICES))
-        return _DEF_VOICES
-    except Exception:
-        _DEF_VOICES = [DEFAULT_VOICE]
-        _LOGGER.warning("Using default voice only: %s", _DEF_VOICES)
-        return _DEF_VOICES
-
 class HiggsAudioTTSProvider(Provider):
     """Higgs Audio TTS Provider."""
 
-    def __init__(self, hass, host, port, base_url, config_entry):
+    def __init__(
+        self, hass, host, port, base_url, config_entry, client=None, cache=None, history=None, voices=None
+    ):
         """Initialize the TTS provider."""
         self.hass = hass
         self._host = host
         self._port = port
         self._base_url = base_url
         self._config_entry = config_entry
+        self._client = client or HiggsAudioClient(hass, base_url)
+        self._cache = cache
+        self._history = history
+        self._voices = voices
 
         # Get configuration from config entry
         opts = (config_entry.options if config_entry else {})
@@ -88,9 +125,51 @@ class HiggsAudioTTSProvider(Provider):
         self._cfg_weight = opts.get(CONF_CFG_WEIGHT, data.get(CONF_CFG_WEIGHT, DEFAULT_CFG_WEIGHT))
         self._seed = opts.get(CONF_SEED, data.get(CONF_SEED, DEFAULT_SEED))
         self._speed_factor = opts.get(CONF_SPEED_FACTOR, data.get(CONF_SPEED_FACTOR, DEFAULT_SPEED_FACTOR))
-        
-        voices = _load_voices()
-        _LOGGER.info("HiggsAudioTTSProvider initialized with %d voices", len(voices))
+        self._chunk_size = opts.get(CONF_CHUNK_SIZE, data.get(CONF_CHUNK_SIZE, DEFAULT_CHUNK_SIZE))
+        self._synthesis_concurrency = opts.get(
+            CONF_SYNTHESIS_CONCURRENCY, data.get(CONF_SYNTHESIS_CONCURRENCY, DEFAULT_SYNTHESIS_CONCURRENCY)
+        )
+        self._output_format = opts.get(CONF_OUTPUT_FORMAT, data.get(CONF_OUTPUT_FORMAT, DEFAULT_OUTPUT_FORMAT))
+        self._fallback_engine = opts.get(CONF_FALLBACK_ENGINE, data.get(CONF_FALLBACK_ENGINE))
+        self._presets = DEFAULT_PRESETS
+        if opts.get(CONF_PRESETS):
+            try:
+                self._presets = parse_presets(opts[CONF_PRESETS])
+            except vol.Invalid as ex:
+                _LOGGER.error("Ignoring invalid Higgs Audio TTS presets: %s", ex)
+        # (preset, voice, local speed) -> PayloadTemplate, compiled on first use
+        self._templates = {}
+        self._trim_silence = opts.get(CONF_TRIM_SILENCE, False)
+        self._normalize_loudness = opts.get(CONF_NORMALIZE_LOUDNESS, False)
+        self._local_speed = opts.get(CONF_LOCAL_SPEED, False)
+        self._process_wav = None
+        if self._trim_silence or self._normalize_loudness or self._local_speed:
+            try:
+                from .postprocess import process_wav
+            except ImportError:
+                _LOGGER.warning("NumPy is not installed, Higgs Audio TTS post-processing is disabled")
+                self._trim_silence = self._normalize_loudness = self._local_speed = False
+            else:
+                self._process_wav = process_wav
+        self._normalize_text = opts.get(CONF_NORMALIZE_TEXT, False)
+        # Optional text features, loaded only when configured
+        self._normalize = None
+        if self._normalize_text:
+            from .normalize import normalize_text
+
+            self._normalize = normalize_text
+        self._phrase_templates = []
+        self._split_phrases = None
+        if opts.get(CONF_PHRASE_TEMPLATES):
+            from .phrase_templates import parse_phrase_templates, split_phrases
+
+            self._split_phrases = split_phrases
+            try:
+                self._phrase_templates = parse_phrase_templates(
+                    opts[CONF_PHRASE_TEMPLATES], self._normalize_text
+                )
+            except vol.Invalid as ex:
+                _LOGGER.error("Ignoring invalid Higgs Audio TTS phrase templates: %s", ex)
 
     @property
     def default_language(self):
@@ -105,14 +184,25 @@ class HiggsAudioTTSProvider(Provider):
     @property
     def supported_options(self):
         """Return list of supported options."""
-        return [CONF_VOICE, CONF_TEMPERATURE, CONF_EXAGGERATION, CONF_CFG_WEIGHT, CONF_SEED, CONF_SPEED_FACTOR]
+        return [
+            CONF_VOICE,
+            CONF_TEMPERATURE,
+            CONF_EXAGGERATION,
+            CONF_CFG_WEIGHT,
+            CONF_SEED,
+            CONF_SPEED_FACTOR,
+            CONF_PRIORITY,
+            CONF_DEADLINE,
+            CONF_OUTPUT_FORMAT,
+            CONF_MEDIA_PLAYER,
+            CONF_PRESET,
+        ]
 
     @property
     def default_options(self):
         """Return a dict including default options."""
-        voices = _load_voices()
         return {
-            CONF_VOICE: voices[0] if voices else DEFAULT_VOICE,
+            CONF_VOICE: self.default_voice,
             CONF_TEMPERATURE: self._temperature,
             CONF_EXAGGERATION: self._exaggeration,
             CONF_CFG_WEIGHT: self._cfg_weight,
@@ -123,25 +213,167 @@ class HiggsAudioTTSProvider(Provider):
     @property
     def supported_voices(self):
         """Return list of supported voices."""
-        voices = _load_voices()
-        return voices
+        if self._voices is None:
+            return AVAILABLE_VOICES
+        return self._voices.voices
+
+    @callback
+    def async_get_supported_voices(self, language):
+        """Return the voices offered by the server."""
+        if self._voices is None:
+            return [Voice(voice, voice) for voice in AVAILABLE_VOICES]
+        names = self._voices.display_names
+        return [Voice(voice, names.get(voice, voice)) for voice in self._voices.voices]
 
     @property
     def default_voice(self):
-        """Return the default voice."""
-        voices = _load_voices()
-        default = voices[0] if voices else DEFAULT_VOICE
-        return default
+        """Return the configured voice if the server still offers it."""
+        voices = self.supported_voices
+        if self._voice in voices or not voices:
+            return self._voice
+        return voices[0]
     
     @property
     def name(self):
         """Return the name of the TTS provider."""
         return "Higgs Audio TTS"
 
-    async def async_get_tts_audio(self, message, language, options=None) -> TtsAudioType:
-        """Load TTS from Higgs Audio server."""
+    def _resolve_output_format(self, message, options):
+        """Return the server output format for a message and its options.
+
+        Dialogue scripts and templated messages are always rendered as WAV
+        so their parts can be joined. Auto mode also keeps WAV when
+        post-processing is enabled, since it only handles WAV.
+        """
+        if self._script(message) is not None or self._phrases(message, options) is not None:
+            return OUTPUT_FORMAT_WAV
+        options = options or {}
+        requested = options.get(CONF_OUTPUT_FORMAT, self._output_format)
+        if requested == OUTPUT_FORMAT_AUTO and (
+            self._trim_silence or self._normalize_loudness or self._local_speed
+        ):
+            return OUTPUT_FORMAT_WAV
+        platform = player_platform(self.hass, options.get(CONF_MEDIA_PLAYER))
+        return resolve_format(requested, message, platform)
+
+    def audio_extension(self, message, options=None):
+        """Return the file extension of the audio produced for a message.
+
+        Taken from the plan rendering the message, so the format is
+        resolved from the same normalized text as the payloads.
+        """
+        return FORMAT_EXTENSIONS[self._plan(message, options)[0]]
+
+    def _speaker_voice(self, name):
+        """Return the voice a dialogue speaker label refers to, or None."""
+        if self._voices is not None:
+            return self._voices.resolve(name)
+        for voice in AVAILABLE_VOICES:
+            if display_name(voice).lower() == name.lower():
+                return voice
+        return None
+
+    def _script(self, message):
+        """Return the parsed dialogue script of a message, or None for plain text."""
+        return parse_script(message, self._speaker_voice)
+
+    def _phrases(self, message, options):
+        """Return the (text, static) parts of a message matching a phrase template, or None.
+
+        Templates only apply with the audio cache and a fixed seed, since
+        splitting a message pays off only if its static phrases are reused.
+        """
+        if not (self._phrase_templates and self._cache):
+            return None
         options = options or {}
-        selected_voice = options.get(CONF_VOICE, self._voice)
+        params = self._presets.get(options.get(CONF_PRESET), options)
+        if not params.get(CONF_SEED, self._seed):
+            return None
+        if self._normalize:
+            message = self._normalize(message)
+        return self._split_phrases(message, self._phrase_templates)
+
+    def _voice_params(self, voice):
+        """Return the payload fields selecting a predefined or clone voice."""
+        if self._voices is not None:
+            voice = self._voices.resolve(voice) or voice
+            if self._voices.is_clone(voice):
+                return {"voice_mode": "clone", "reference_audio_filename": voice}
+        return {"predefined_voice_id": voice}
+
+    @property
+    def presets(self):
+        """Return the names of the configured presets."""
+        return list(self._presets)
+
+    @callback
+    def async_clear_templates(self):
+        """Forget compiled templates, e.g. after the voice list changed."""
+        self._templates.clear()
+
+    def _template(self, preset, voice=None, local_speed=False):
+        """Return the compiled template of a preset for a voice.
+
+        An explicit voice wins over the preset's own, which in turn
+        replaces the configured default. With local_speed the server
+        renders at normal speed and the preset's speed factor is applied
+        by post-processing.
+        """
+        template = self._templates.get((preset, voice, local_speed))
+        if template is None:
+            params = self._presets[preset]
+            template = PayloadTemplate(
+                preset,
+                {
+                    **self._voice_params(voice or params.get(CONF_VOICE, self._voice)),
+                    "temperature": params.get(CONF_TEMPERATURE, self._temperature),
+                    "exaggeration": params.get(CONF_EXAGGERATION, self._exaggeration),
+                    "cfg_weight": params.get(CONF_CFG_WEIGHT, self._cfg_weight),
+                    "seed": params.get(CONF_SEED, self._seed),
+                    "speed_factor": 1.0 if local_speed else params.get(CONF_SPEED_FACTOR, self._speed_factor),
+                },
+            )
+            self._templates[(preset, voice, local_speed)] = template
+        return template
+
+    def speak_payload(self, message, options=None):
+        """Return the single /tts payload the speak service sends for a message.
+
+        Built like any TTS request, but the server always applies the speed
+        factor since the saved file is not post-processed.
+        """
+        return self._build_payload(message, options, local_speed=False)
+
+    def _explicit_voice(self, options):
+        """Return the voice a request asks for, or None if it is just the default.
+
+        Home Assistant merges default_options into every request, so a
+        voice equal to the default is treated as not chosen.
+        """
+        voice = options.get(CONF_VOICE)
+        return None if voice == self.default_voice else voice
+
+    def _build_payload(self, message, options, voice=None, local_speed=True):
+        """Build the /tts request payload for a message.
+
+        voice, e.g. a dialogue speaker's, overrides the one in options.
+        Without local_speed the speed factor is never left to
+        post-processing.
+        With a preset, the generation parameters come from its compiled
+        template and only the text and output format are filled in.
+        """
+        options = options or {}
+        if self._normalize:
+            message = self._normalize(message)
+        output_format = self._resolve_output_format(message, options)
+        local_speed = local_speed and self._local_speed and output_format == OUTPUT_FORMAT_WAV
+        preset = options.get(CONF_PRESET)
+        if preset:
+            if preset in self._presets:
+                template = self._template(preset, voice or self._explicit_voice(options), local_speed)
+                return template.payload(message, output_format)
+            _LOGGER.warning("Unknown Higgs Audio TTS preset: %s", preset)
+        selected_voice = voice or options.get(CONF_VOICE, self._voice)
         temperature = options.get(CONF_TEMPERATURE, self._temperature)
         exaggeration = options.get(CONF_EXAGGERATION, self._exaggeration)
         cfg_weight = options.get(CONF_CFG_WEIGHT, self._cfg_weight)
@@ -150,36 +382,442 @@ class HiggsAudioTTSProvider(Provider):
 
         data = {
             "text": message,
-            "predefined_voice_id": selected_voice,
+            **self._voice_params(selected_voice),
             "temperature": temperature,
             "exaggeration": exaggeration,
             "cfg_weight": cfg_weight,
             "seed": seed,
-            "speed_factor": speed_factor,
-            "output_format": "wav",
+            # Rendered at normal speed and stretched by post-processing
+            "speed_factor": 1.0 if local_speed else speed_factor,
+            "output_format": output_format,
         }
 
         _LOGGER.debug("Higgs Audio TTS request: %s", data)
+        return data
+
+    def _plan(self, message, options):
+        """Return the output format and the items rendering a message.
+
+        Items are /tts payloads in playback order. For a dialogue script
+        every segment gets its own payloads in the speaker's voice, and
+        pauses appear as numbers of seconds between them. A templated
+        message gets one payload per static phrase, usually cached, and
+        per slot.
+        """
+        script = self._script(message)
+        if script is None:
+            phrases = self._phrases(message, options)
+            if phrases is None:
+                data = self._build_payload(message, options)
+                return data["output_format"], self._split_payload(data)
+            options = {**(options or {}), CONF_OUTPUT_FORMAT: OUTPUT_FORMAT_WAV}
+            _LOGGER.debug(
+                "Rendering templated Higgs Audio TTS message from %d phrases, %d static",
+                len(phrases), sum(1 for _, static in phrases if static),
+            )
+            return OUTPUT_FORMAT_WAV, [
+                payload
+                for text, _ in phrases
+                for payload in self._split_payload(self._build_payload(text, options))
+            ]
+        options = {**(options or {}), CONF_OUTPUT_FORMAT: OUTPUT_FORMAT_WAV}
+        items = []
+        for item in script:
+            if not isinstance(item, Segment):
+                items.append(item.seconds)
+                continue
+            items.extend(self._split_payload(self._build_payload(item.text, options, item.voice)))
+        _LOGGER.debug("Rendering Higgs Audio TTS dialogue as %d items", len(items))
+        return OUTPUT_FORMAT_WAV, items
+
+    def _concurrency(self, message):
+        """Return the look-ahead for synthesizing the chunks of a message."""
+        if self._script(message) is not None:
+            # Dialogue segments are independent, so request them all at once
+            return max(self._synthesis_concurrency, DIALOGUE_CONCURRENCY)
+        return self._synthesis_concurrency
+
+    def _post_processing(self, output_format, options):
+        """Return the process_wav arguments for a request, or None if there is nothing to do."""
+        if output_format != OUTPUT_FORMAT_WAV:
+            return None
+        speed = 1.0
+        if self._local_speed:
+            options = options or {}
+            params = self._presets.get(options.get(CONF_PRESET), options)
+            speed = params.get(CONF_SPEED_FACTOR, self._speed_factor)
+        if not (self._trim_silence or self._normalize_loudness or speed != 1.0):
+            return None
+        return {"trim": self._trim_silence, "normalize": self._normalize_loudness, "speed": speed}
+
+    @staticmethod
+    def _scheduling(options):
+        """Return the (priority, deadline) for a request from its options."""
+        options = options or {}
+        priority = PRIORITIES.get(str(options.get(CONF_PRIORITY, "normal")).lower(), PRIORITY_NORMAL)
+        deadline = options.get(CONF_DEADLINE, DEFAULT_DEADLINE)
+        return priority, deadline
+
+    def _split_payload(self, data):
+        """Split a payload into per-chunk payloads for pipelined synthesis."""
+        chunks = split_text(data["text"], self._chunk_size)
+        if len(chunks) == 1:
+            return [data]
+        _LOGGER.debug("Split Higgs Audio TTS message into %d chunks", len(chunks))
+        if isinstance(data, PresetPayload):
+            return [data.template.payload(chunk, data["output_format"]) for chunk in chunks]
+        return [{**data, "text": chunk} for chunk in chunks]
+
+    def uncached_payloads(self, message, options=None):
+        """Return the chunk payloads of a message that are not cached yet."""
+        if not self._cache:
+            return []
+        _, items = self._plan(message, options)
+        return [
+            payload
+            for payload in items
+            if isinstance(payload, dict) and (key := make_cache_key(payload)) and key not in self._cache
+        ]
 
+    @instrumented
+    async def async_synthesize_payload(
+        self, data, priority=PRIORITY_NORMAL, deadline=None, post_processing=None
+    ) -> bytes:
+        """Synthesize one payload, using the audio cache when possible.
+
+        The cache holds the server's audio; post_processing, if given, is
+        applied to it in the executor on every request.
+        """
+        cache_key = make_cache_key(data) if self._cache else None
+        audio = None
+        if cache_key:
+            audio = await self._cache.async_get(cache_key)
+            if audio is not None:
+                _LOGGER.debug("Higgs Audio TTS cache hit: %s", cache_key)
+
+        if audio is None:
+            audio = await self._client.async_synthesize(data, priority, deadline)
+            if cache_key:
+                self.hass.async_create_task(self._cache.async_put(cache_key, audio))
+        if post_processing:
+            audio = await self.hass.async_add_executor_job(
+                functools.partial(self._process_wav, audio, **post_processing)
+            )
+        return audio
+
+    async def _async_stream_single(self, data, priority=PRIORITY_NORMAL, deadline=None):
+        """Stream one payload, using the audio cache when possible."""
+        cache_key = make_cache_key(data) if self._cache else None
+        if cache_key:
+            audio = await self._cache.async_get(cache_key)
+            if audio is not None:
+                _LOGGER.debug("Higgs Audio TTS cache hit: %s", cache_key)
+                yield audio
+                return
+
+        # Collected in place for the cache instead of joining a list of chunks,
+        # counted against the byte budget until the stream ends
+        audio = bytearray() if cache_key else None
+        budget = self._client.budget
         try:
-            url = f"{self._base_url}/tts"
-            response = await self.hass.async_add_executor_job(
-                functools.partial(
-                    requests.post,
-                    url,
-                    json=data,
-                    headers={"Content-Type": "application/json"},
-                    timeout=30
+            async for chunk in self._client.async_stream_synthesize(data, priority, deadline):
+                if audio is not None:
+                    audio += chunk
+                    budget.grow(len(chunk))
+                yield chunk
+        finally:
+            if audio:
+                budget.release(len(audio))
+
+        if audio:
+            self.hass.async_create_task(self._cache.async_put(cache_key, audio))
+
+    @property
+    def server_available(self):
+        """Return False while every server's circuit is open."""
+        return self._client.available
+
+    async def _async_cached_audio(self, message, options):
+        """Return (extension, audio) of any fully cached rendition of a message.
+
+        Tries the requested options and the defaults used by the phrase
+        warmup, in every output format. Messages are planned as for
+        synthesis, so dialogue and templated messages are found too.
+        """
+        if not self._cache:
+            return None
+        option_sets = [options or {}]
+        if options:
+            option_sets.append(self.default_options)
+        for base in option_sets:
+            for output_format in OUTPUT_FORMATS:
+                if output_format == OUTPUT_FORMAT_AUTO:
+                    candidate = base
+                else:
+                    candidate = {**base, CONF_OUTPUT_FORMAT: output_format}
+                output_format, items = self._plan(message, candidate)
+                keys = [make_cache_key(item) for item in items if isinstance(item, dict)]
+                if not all(key and key in self._cache for key in keys):
+                    continue
+                parts = [await self._cache.async_get(key) for key in keys]
+                if any(part is None for part in parts):
+                    continue
+                post_processing = self._post_processing(output_format, candidate)
+                try:
+                    if post_processing:
+                        parts = [
+                            await self.hass.async_add_executor_job(
+                                functools.partial(self._process_wav, part, **post_processing)
+                            )
+                            for part in parts
+                        ]
+                    audio = join_audio(output_format, _with_pauses(items, parts))
+                except WavFormatError:
+                    continue
+                return FORMAT_EXTENSIONS[output_format], audio
+        return None
+
+    async def _async_fallback(self, message, language, options):
+        """Answer a message the server could not synthesize.
+
+        Serves a cached rendition if one exists, otherwise hands the message
+        to the configured fallback TTS entity. Returns None if neither works.
+        """
+        metrics = self._client.metrics
+        cached = await self._async_cached_audio(message, options)
+        if cached is not None:
+            _LOGGER.info("Higgs Audio TTS unavailable, playing cached audio")
+            metrics.async_record_fallback("cache")
+            return cached
+
+        if self._fallback_engine:
+            script = self._script(message)
+            if script is not None:
+                message = script_text(script)
+            entity = async_get_text_to_speech_entity(self.hass, self._fallback_engine)
+            if entity is None:
+                _LOGGER.warning("Fallback TTS engine %s not found", self._fallback_engine)
+            elif isinstance(entity, HiggsAudioTTSEntity):
+                # It would fall back to itself, or to a server that may be down too
+                _LOGGER.warning(
+                    "Fallback TTS engine %s is a Higgs Audio TTS entity, ignoring it",
+                    self._fallback_engine,
                 )
-            )
-            if response.status_code == 200:
-                return ("wav", response.content)
             else:
-                _LOGGER.error("Higgs Audio TTS request failed: %s %s", response.status_code, response.text)
-                return ("wav", b"")
-        except Exception as ex:
-            _LOGGER.error("Error connecting to Higgs Audio TTS: %s", ex)
-            return ("wav", b"")
+                if language not in entity.supported_languages:
+                    language = entity.default_language
+                try:
+                    extension, audio = await entity.async_get_tts_audio(message, language, {})
+                except Exception as ex:
+                    _LOGGER.error("Fallback TTS engine %s failed: %s", self._fallback_engine, ex)
+                else:
+                    if audio:
+                        _LOGGER.info("Higgs Audio TTS unavailable, using %s", self._fallback_engine)
+                        metrics.async_record_fallback("engine")
+                        return extension, audio
+
+        metrics.async_record_fallback("none")
+        return None
+
+    @instrumented
+    async def async_get_tts_audio(self, message, language, options=None) -> TtsAudioType:
+        """Load TTS from Higgs Audio server."""
+        if self._history:
+            self._history.record(message)
+        output_format, items = self._plan(message, options)
+        extension = FORMAT_EXTENSIONS[output_format]
+        payloads = [item for item in items if isinstance(item, dict)]
+        priority, deadline = self._scheduling(options)
+        synthesize = functools.partial(
+            self.async_synthesize_payload,
+            priority=priority,
+            deadline=deadline,
+            post_processing=self._post_processing(output_format, options),
+        )
+
+        try:
+            if len(items) == 1 and payloads:
+                audio = await synthesize(items[0])
+            else:
+                parts = [
+                    part
+                    async for part in async_pipeline(synthesize, payloads, self._concurrency(message))
+                ]
+                audio = join_audio(output_format, _with_pauses(items, parts))
+            return (extension, audio)
+        except (HiggsAudioError, WavFormatError) as ex:
+            if not _log_failure(ex):
+                return (extension, b"")
+
+        fallback = await self._async_fallback(message, language, options)
+        return fallback or (extension, b"")
+
+    async def async_open_stream(self, message, language, options=None):
+        """Start streaming a message and return (extension, chunks).
+
+        Waits for the first chunk, so a request failing before any audio
+        was produced is answered by _async_fallback instead of silence.
+        Errors after that end the stream early.
+        """
+        extension = self.audio_extension(message, options)
+        chunks = self._async_stream_chunks(message, options)
+        try:
+            first = await anext(chunks)
+        except StopAsyncIteration:
+            return extension, _async_single(b"")
+        except (HiggsAudioError, WavFormatError) as ex:
+            if _log_failure(ex):
+                fallback = await self._async_fallback(message, language, options)
+                if fallback:
+                    return fallback[0], _async_single(fallback[1])
+            return extension, _async_single(b"")
+        return extension, _async_logged(_async_prepend(first, chunks))
+
+    async def async_stream_audio(self, message, options=None):
+        """Yield audio for a message as the server produces it, logging failures."""
+        async for chunk in _async_logged(self._async_stream_chunks(message, options)):
+            yield chunk
+
+    async def _async_stream_chunks(self, message, options):
+        """Yield audio for a message as the server produces it.
+
+        Long messages and dialogue scripts are split into chunks which
+        are synthesized ahead of playback and streamed as one continuous
+        clip. Failures are raised.
+        """
+        if self._history:
+            self._history.record(message)
+        output_format, items = self._plan(message, options)
+        payloads = [item for item in items if isinstance(item, dict)]
+        priority, deadline = self._scheduling(options)
+        post_processing = self._post_processing(output_format, options)
+
+        if len(items) == 1 and payloads and not post_processing:
+            stream = self._async_stream_single(items[0], priority, deadline)
+        else:
+            # Post-processing needs whole segments, so each chunk is
+            # processed as it completes and joined into one stream
+            synthesize = functools.partial(
+                self.async_synthesize_payload,
+                priority=priority,
+                deadline=deadline,
+                post_processing=post_processing,
+            )
+            stream = async_join_audio_stream(
+                output_format,
+                _async_with_pauses(
+                    items, async_pipeline(synthesize, payloads, self._concurrency(message))
+                ),
+            )
+
+        async for chunk in stream:
+            yield chunk
+
+
+def _log_failure(ex):
+    """Log a failed request; return True if the fallback should answer instead."""
+    if isinstance(ex, HiggsAudioCancelledError):
+        # Interrupted on purpose; stay silent
+        _LOGGER.warning("Higgs Audio TTS request dropped: %s", ex)
+        return False
+    if isinstance(ex, WavFormatError):
+        _LOGGER.error("Could not join Higgs Audio TTS chunks: %s", ex)
+        return False
+    if isinstance(ex, HiggsAudioResponseError):
+        _LOGGER.error("Higgs Audio TTS request failed: %s %s", ex.status, ex.text)
+    elif isinstance(ex, (HiggsAudioCircuitOpenError, HiggsAudioDeadlineError)):
+        _LOGGER.warning("Higgs Audio TTS request dropped: %s", ex)
+    elif isinstance(ex, HiggsAudioResponseTooLargeError):
+        _LOGGER.error("Higgs Audio TTS response rejected: %s", ex)
+    else:
+        _LOGGER.error("Error connecting to Higgs Audio TTS: %s", ex)
+    return True
+
+
+async def _async_single(data):
+    """Yield data as a one-chunk stream."""
+    yield data
+
+
+async def _async_prepend(first, chunks):
+    """Yield first, then the rest of chunks."""
+    yield first
+    async for chunk in chunks:
+        yield chunk
+
+
+async def _async_logged(chunks):
+    """Yield chunks, ending the stream with a log entry if it fails."""
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except (HiggsAudioError, WavFormatError) as ex:
+        _log_failure(ex)
+
+
+def _with_pauses(items, parts):
+    """Return parts in the order of items, with pauses kept in between."""
+    parts = iter(parts)
+    return [next(parts) if isinstance(item, dict) else item for item in items]
+
+
+async def _async_with_pauses(items, parts):
+    """Yield streamed parts in the order of items, with pauses in between."""
+    for item in items:
+        yield await anext(parts) if isinstance(item, dict) else item
+
+
+class HiggsAudioTTSEntity(TextToSpeechEntity):
+    """Higgs Audio TTS entity with streaming playback support."""
+
+    def __init__(self, provider, config_entry):
+        """Initialize the TTS entity."""
+        self._provider = provider
+        self._attr_name = config_entry.title
+        self._attr_unique_id = config_entry.entry_id
+
+    @property
+    def default_language(self):
+        """Return the default language."""
+        return self._provider.default_language
+
+    @property
+    def supported_languages(self):
+        """Return list of supported languages."""
+        return self._provider.supported_languages
+
+    @property
+    def supported_options(self):
+        """Return list of supported options."""
+        return self._provider.supported_options
+
+    @property
+    def default_options(self):
+        """Return a dict including default options."""
+        return self._provider.default_options
+
+    @callback
+    def async_get_supported_voices(self, language):
+        """Return the voices offered by the server."""
+        return self._provider.async_get_supported_voices(language)
+
+    async def async_get_tts_audio(self, message, language, options) -> TtsAudioType:
+        """Load TTS audio in one piece."""
+        return await self._provider.async_get_tts_audio(message, language, options)
+
+    async def async_stream_tts_audio(self, request: TTSAudioRequest) -> TTSAudioResponse:
+        """Stream TTS audio so playback can start with the first chunk."""
+        message = "".join([chunk async for chunk in request.message_gen])
+        if not self._provider.server_available:
+            # Degraded mode answers in one piece, possibly in another format
+            extension, audio = await self._provider.async_get_tts_audio(
+                message, request.language, request.options
+            )
+            return TTSAudioResponse(extension=extension, data_gen=_async_single(audio))
+        extension, data_gen = await self._provider.async_open_stream(
+            message, request.language, request.options
+        )
+        return TTSAudioResponse(extension=extension, data_gen=data_gen)
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up TTS platform from config entry."""
@@ -200,12 +838,38 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
         port=entry_data["port"],
         base_url=entry_data["base_url"],
         config_entry=config_entry,
+        client=entry_data["client"],
+        cache=entry_data["cache"],
+        history=entry_data["history"],
+        voices=entry_data["voices"],
     )
     
+    # Clone voices resolve differently once the voice list changes
+    config_entry.async_on_unload(entry_data["voices"].async_add_listener(provider.async_clear_templates))
+
     # Store provider in hass data for async_get_engine to find
     hass.data[DOMAIN][f"{config_entry.entry_id}_provider"] = provider
     _LOGGER.debug("TTS Provider stored in hass.data")
-    
+
+    # Pre-render configured and frequently used phrases at startup and periodically
+    opts = config_entry.options
+    data = config_entry.data
+    warmer = PhraseWarmer(
+        hass,
+        provider,
+        entry_data["client"],
+        entry_data["history"],
+        parse_phrases(opts.get(CONF_WARMUP_PHRASES, data.get(CONF_WARMUP_PHRASES, ""))),
+        opts.get(CONF_WARMUP_TOP_N, data.get(CONF_WARMUP_TOP_N, DEFAULT_WARMUP_TOP_N)),
+    )
+    entry_data["warmer"] = warmer
+    config_entry.async_on_unload(warmer.async_cancel)
+    config_entry.async_on_unload(async_at_started(hass, warmer.async_schedule))
+    config_entry.async_on_unload(
+        async_track_time_interval(hass, warmer.async_schedule, timedelta(seconds=WARMUP_INTERVAL))
+    )
+
+    async_add_entities([HiggsAudioTTSEntity(provider, config_entry)])
     return True
 
 async def async_get_engine(hass, config, discovery_info=None):
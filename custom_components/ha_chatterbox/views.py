@@ -0,0 +1,28 @@
+"""HTTP views of the Higgs Audio TTS integration."""
+from aiohttp import web
+
+from homeassistant.components.http import KEY_HASS, HomeAssistantView
+
+from .const import DOMAIN, METRICS_URL
+from .metrics import render_prometheus
+
+
+class HiggsAudioMetricsView(HomeAssistantView):
+    """Expose synthesis metrics in the Prometheus text format."""
+
+    url = METRICS_URL
+    name = f"api:{DOMAIN}:metrics"
+
+    async def get(self, request):
+        """Return the metrics of every entry that enabled the endpoint."""
+        hass = request.app[KEY_HASS]
+        entries = [
+            (entry_id, data["client"], data.get("cache"))
+            for entry_id, data in hass.data.get(DOMAIN, {}).items()
+            if isinstance(data, dict) and data.get("metrics_endpoint")
+        ]
+        if not entries:
+            return web.Response(status=404)
+        return web.Response(
+            text=render_prometheus(entries), content_type="text/plain", charset="utf-8"
+        )
@@ -0,0 +1,180 @@
+"""Catalog of the voices available on the Higgs Audio TTS server."""
+import logging
+import os
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import AVAILABLE_VOICES, DOMAIN, VOICE_CATALOG_TTL
+from .errors import HiggsAudioError
+from .profiling import instrumented
+
+_LOGGER = logging.getLogger(__name__)
+
+VOICES_STORAGE_VERSION = 1
+
+PREDEFINED_VOICES_PATH = "/get_predefined_voices"
+REFERENCE_FILES_PATH = "/get_reference_files"
+
+
+def display_name(filename):
+    """Return the user facing name of a voice file."""
+    return os.path.splitext(filename)[0]
+
+
+def _parse_voices(document):
+    """Return {filename: display name} from a server voice list.
+
+    Entries are either plain filenames or objects with "filename" and
+    "display_name" keys.
+    """
+    voices = {}
+    for item in document or []:
+        if isinstance(item, str):
+            voices[item] = display_name(item)
+        elif isinstance(item, dict) and item.get("filename"):
+            voices[item["filename"]] = item.get("display_name") or display_name(item["filename"])
+    return voices
+
+
+class VoiceCatalog:
+    """In-memory index of predefined and clone voices.
+
+    The lists are loaded from storage at startup, so they are available
+    before the server answers, and refreshed from the server once the TTL
+    has passed. Refreshes send the ETag and Last-Modified of the previous
+    answer so an unchanged list costs a 304 and no parsing. Until the
+    server has been reached once the built-in voice list is used.
+    """
+
+    def __init__(self, hass: HomeAssistant, client, entry_id, ttl=VOICE_CATALOG_TTL):
+        """Initialize the catalog."""
+        self.hass = hass
+        self._client = client
+        self._store = Store(hass, VOICES_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.voices")
+        self._ttl = ttl
+        self._predefined = {voice: display_name(voice) for voice in AVAILABLE_VOICES}
+        self._clones = {}
+        # path -> {"etag": ..., "last_modified": ...}
+        self._validators = {}
+        self._fetched = None
+        self._listeners = []
+
+    @property
+    def predefined(self):
+        """Return the filenames of the predefined voices."""
+        return list(self._predefined)
+
+    @property
+    def clones(self):
+        """Return the filenames of the uploaded clone references."""
+        return list(self._clones)
+
+    @property
+    def voices(self):
+        """Return every voice usable for synthesis."""
+        return self.predefined + [voice for voice in self._clones if voice not in self._predefined]
+
+    @property
+    def display_names(self):
+        """Return {filename: display name} of every voice."""
+        return {**self._clones, **self._predefined}
+
+    def __contains__(self, voice):
+        """Return True if voice is a known filename."""
+        return voice in self._predefined or voice in self._clones
+
+    def is_clone(self, voice):
+        """Return True if voice is a clone reference rather than a predefined voice."""
+        return voice in self._clones and voice not in self._predefined
+
+    def resolve(self, voice):
+        """Return the filename for a filename or display name, or None."""
+        if voice in self:
+            return voice
+        for filename, name in self.display_names.items():
+            if name.lower() == voice.lower() or display_name(filename).lower() == voice.lower():
+                return filename
+        return None
+
+    @callback
+    def async_add_clone(self, filename, name=None):
+        """Add an uploaded clone reference without waiting for a refresh."""
+        name = name or display_name(filename)
+        if self._clones.get(filename) == name:
+            return
+        self._clones[filename] = name
+        self._store.async_delay_save(self._data_to_save)
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    @callback
+    def async_add_listener(self, update_callback):
+        """Call update_callback whenever the voice lists change."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener():
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    async def async_load(self):
+        """Load the last known voice lists from storage."""
+        data = await self._store.async_load()
+        if not data:
+            return
+        if data.get("predefined"):
+            self._predefined = data["predefined"]
+        self._clones = data.get("clones", {})
+        self._validators = data.get("validators", {})
+        # Stored lists are revalidated on the first refresh
+        self._fetched = None
+
+    def _data_to_save(self):
+        return {
+            "predefined": self._predefined,
+            "clones": self._clones,
+            "validators": self._validators,
+        }
+
+    async def _async_fetch(self, path):
+        """Return the parsed voice list at path, or None if unchanged."""
+        validators = self._validators.get(path, {})
+        document, etag, last_modified = await self._client.async_get_conditional(
+            path, validators.get("etag"), validators.get("last_modified")
+        )
+        if document is None:
+            return None
+        self._validators[path] = {"etag": etag, "last_modified": last_modified}
+        return _parse_voices(document)
+
+    @instrumented
+    async def async_refresh(self, *_, force=False):
+        """Refresh the voice lists from the server if they are stale."""
+        if not force and self._fetched is not None and time.monotonic() - self._fetched < self._ttl:
+            return
+        changed = False
+        try:
+            predefined = await self._async_fetch(PREDEFINED_VOICES_PATH)
+            if predefined and predefined != self._predefined:
+                self._predefined = predefined
+                changed = True
+            clones = await self._async_fetch(REFERENCE_FILES_PATH)
+            if clones is not None and clones != self._clones:
+                self._clones = clones
+                changed = True
+        except HiggsAudioError as ex:
+            _LOGGER.debug("Could not refresh Higgs Audio TTS voices: %s", ex)
+            return
+        self._fetched = time.monotonic()
+        # Validators may have changed even if the lists did not
+        self._store.async_delay_save(self._data_to_save)
+        if changed:
+            _LOGGER.debug(
+                "Higgs Audio TTS voices updated: %d predefined, %d clone",
+                len(self._predefined), len(self._clones),
+            )
+            for update_callback in list(self._listeners):
+                update_callback()
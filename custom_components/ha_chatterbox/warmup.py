@@ -0,0 +1,142 @@
+"""Request history and idle-time pre-rendering of frequent phrases."""
+import asyncio
+import logging
+from collections import Counter
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    PRIORITY_LOW,
+    WARMUP_IDLE_POLL,
+    WARMUP_MAX_IDLE_WAIT,
+    WARMUP_REQUEST_INTERVAL,
+)
+from .errors import HiggsAudioError
+
+_LOGGER = logging.getLogger(__name__)
+
+HISTORY_STORAGE_VERSION = 1
+HISTORY_SAVE_DELAY = 60
+# Phrases kept in the history; the least used ones are pruned beyond this
+HISTORY_MAX_PHRASES = 500
+
+
+def parse_phrases(text):
+    """Split the configured warmup phrases (separated by | or newlines)."""
+    phrases = []
+    for line in (text or "").replace("\n", "|").split("|"):
+        line = line.strip()
+        if line and line not in phrases:
+            phrases.append(line)
+    return phrases
+
+
+class RequestHistory:
+    """Persistent usage counts of synthesized messages."""
+
+    def __init__(self, hass: HomeAssistant, entry_id):
+        """Initialize the history."""
+        self._store = Store(hass, HISTORY_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.history")
+        self._counts = Counter()
+
+    async def async_load(self):
+        """Load the history from storage."""
+        data = await self._store.async_load()
+        if data:
+            self._counts = Counter(data.get("phrases", {}))
+
+    def _data_to_save(self):
+        return {"phrases": dict(self._counts)}
+
+    def record(self, message):
+        """Count one request for message."""
+        message = message.strip()
+        if not message:
+            return
+        self._counts[message] += 1
+        if len(self._counts) > HISTORY_MAX_PHRASES:
+            for phrase, _ in self._counts.most_common()[HISTORY_MAX_PHRASES:]:
+                del self._counts[phrase]
+        self._store.async_delay_save(self._data_to_save, HISTORY_SAVE_DELAY)
+
+    def top(self, count):
+        """Return the count most requested messages."""
+        return [phrase for phrase, _ in self._counts.most_common(count)]
+
+
+class PhraseWarmer:
+    """Pre-render phrases into the audio cache while the server is idle.
+
+    Renders the configured phrases followed by the most requested ones
+    from the history, using the provider's default options so the cache
+    keys match what live requests will ask for. Only one request is sent
+    at a time, at low priority, with a pause between requests, and only
+    when nothing else is queued or in flight.
+    """
+
+    def __init__(self, hass: HomeAssistant, provider, client, history, phrases, top_n):
+        """Initialize the warmer."""
+        self.hass = hass
+        self._provider = provider
+        self._client = client
+        self._history = history
+        self._phrases = phrases
+        self._top_n = top_n
+        self._task = None
+        self.rendered = 0
+
+    def _candidates(self):
+        phrases = list(self._phrases)
+        for phrase in self._history.top(self._top_n):
+            if phrase not in phrases:
+                phrases.append(phrase)
+        return phrases
+
+    async def _async_wait_idle(self):
+        """Wait until no live request is queued or in flight."""
+        waited = 0
+        while True:
+            stats = self._client.scheduler_stats
+            if not stats["queued"] and not stats["in_flight"]:
+                return True
+            if waited >= WARMUP_MAX_IDLE_WAIT:
+                return False
+            await asyncio.sleep(WARMUP_IDLE_POLL)
+            waited += WARMUP_IDLE_POLL
+
+    async def _async_run(self):
+        options = self._provider.default_options
+        rendered = 0
+        for phrase in self._candidates():
+            for payload in self._provider.uncached_payloads(phrase, options):
+                if not await self._async_wait_idle():
+                    _LOGGER.debug("Higgs Audio TTS server busy, postponing warmup")
+                    return
+                try:
+                    await self._provider.async_synthesize_payload(payload, priority=PRIORITY_LOW)
+                except HiggsAudioError as ex:
+                    _LOGGER.debug("Warmup of %r failed: %s", phrase, ex)
+                    return
+                rendered += 1
+                self.rendered += 1
+                await asyncio.sleep(WARMUP_REQUEST_INTERVAL)
+        if rendered:
+            _LOGGER.info("Pre-rendered %d Higgs Audio TTS phrases", rendered)
+
+    @callback
+    def async_schedule(self, *_):
+        """Start a warmup pass in the background unless one is running."""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = self.hass.async_create_background_task(
+            self._async_run(), f"{DOMAIN} phrase warmup"
+        )
+
+    @callback
+    def async_cancel(self):
+        """Stop a running warmup pass."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,185 @@
+"""Helpers for parsing and joining RIFF/WAVE audio.
+
+Joining works on memoryviews of the source buffers and writes every PCM
+payload once into a single preallocated output buffer.
+"""
+import struct
+from collections import namedtuple
+
+# Data size used in headers of WAV streams whose length is not known up front
+STREAM_DATA_SIZE = 0xFFFFFFFF
+# RIFF, WAVE, fmt and data chunk headers around the fmt body
+HEADER_OVERHEAD = 12 + 8 + 8
+
+WavInfo = namedtuple("WavInfo", ["fmt", "data_offset", "data_size"])
+
+
+class WavFormatError(ValueError):
+    """Raised when audio is not a WAV file or formats cannot be joined."""
+
+
+def parse_wav(data) -> WavInfo:
+    """Locate the fmt and data chunks of a WAV file."""
+    if len(data) < 12 or data[0:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise WavFormatError("Not a RIFF/WAVE file")
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = bytes(data[offset:offset + 4])
+        (chunk_size,) = struct.unpack_from("<I", data, offset + 4)
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            fmt = bytes(data[body:body + chunk_size])
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise WavFormatError("data chunk before fmt chunk")
+            # Streamed WAVs may carry a placeholder size; trust the buffer
+            size = min(chunk_size, len(data) - body)
+            return WavInfo(fmt, body, size)
+        # Chunks are word aligned
+        offset = body + chunk_size + (chunk_size & 1)
+    raise WavFormatError("No data chunk found")
+
+
+def write_header(buffer, fmt, data_size, offset=0):
+    """Write a canonical WAV header into buffer and return its length."""
+    if data_size == STREAM_DATA_SIZE:
+        riff_size = STREAM_DATA_SIZE
+    else:
+        riff_size = 4 + 8 + len(fmt) + 8 + data_size
+    struct.pack_into(
+        f"<4sI4s4sI{len(fmt)}s4sI",
+        buffer,
+        offset,
+        b"RIFF",
+        riff_size,
+        b"WAVE",
+        b"fmt ",
+        len(fmt),
+        fmt,
+        b"data",
+        data_size,
+    )
+    return HEADER_OVERHEAD + len(fmt)
+
+
+def build_header(fmt, data_size) -> bytes:
+    """Return a canonical WAV header for the given fmt chunk and data size."""
+    header = bytearray(HEADER_OVERHEAD + len(fmt))
+    write_header(header, fmt, data_size)
+    return bytes(header)
+
+
+def build_wav(fmt, pcm) -> bytearray:
+    """Wrap a PCM buffer (anything supporting the buffer protocol) in a WAV header."""
+    pcm = memoryview(pcm).cast("B")
+    output = bytearray(HEADER_OVERHEAD + len(fmt) + len(pcm))
+    offset = write_header(output, fmt, len(pcm))
+    output[offset:] = pcm
+    return output
+
+
+def _check_format(expected, info):
+    # Compare format tag, channels, sample rate, byte rate, alignment and depth
+    if info.fmt[:16] != expected[:16]:
+        raise WavFormatError("Cannot join WAV segments with different formats")
+
+
+def silence(fmt, seconds) -> bytes:
+    """Return seconds of silent PCM in the format of fmt."""
+    block_align = int.from_bytes(fmt[12:14], "little") or 1
+    byte_rate = int.from_bytes(fmt[8:12], "little")
+    size = max(0, int(seconds * byte_rate) // block_align * block_align)
+    # Unsigned 8-bit PCM is centred on 0x80, signed formats on zero
+    if int.from_bytes(fmt[14:16], "little") == 8:
+        return b"\x80" * size
+    return bytes(size)
+
+
+def pcm_view(data, info=None) -> memoryview:
+    """Return a zero-copy view of the PCM payload of a WAV file."""
+    if info is None:
+        info = parse_wav(data)
+    return memoryview(data)[info.data_offset:info.data_offset + info.data_size]
+
+
+class WavStitcher:
+    """Assemble WAV segments and silences into one WAV file.
+
+    Segments are only parsed and referenced as they are added; build()
+    allocates the output once and copies each PCM payload into place.
+    All segments must share the sample format of the first one.
+    Silences may be added before the format is known.
+    """
+
+    def __init__(self, fmt=None):
+        """Initialize the stitcher, optionally with a known fmt chunk."""
+        self.fmt = fmt
+        self._items = []
+
+    def add(self, data):
+        """Append the PCM of a WAV file."""
+        info = parse_wav(data)
+        if self.fmt is None:
+            self.fmt = info.fmt
+        else:
+            _check_format(self.fmt, info)
+        self._items.append(pcm_view(data, info))
+
+    def add_silence(self, seconds):
+        """Append seconds of silence."""
+        self._items.append(float(seconds))
+
+    def build(self) -> bytearray:
+        """Return the assembled WAV file."""
+        if self.fmt is None:
+            raise WavFormatError("Nothing to join")
+        items = [silence(self.fmt, item) if isinstance(item, float) else item for item in self._items]
+        size = sum(len(item) for item in items)
+        output = bytearray(HEADER_OVERHEAD + len(self.fmt) + size)
+        offset = write_header(output, self.fmt, size)
+        for item in items:
+            output[offset:offset + len(item)] = item
+            offset += len(item)
+        return output
+
+
+def concat_wav(parts) -> bytearray:
+    """Join several WAV files with identical formats into one.
+
+    A number among the parts adds that many seconds of silence.
+    """
+    stitcher = WavStitcher()
+    for part in parts:
+        if isinstance(part, (int, float)):
+            stitcher.add_silence(part)
+        else:
+            stitcher.add(part)
+    return stitcher.build()
+
+
+async def async_join_stream(parts):
+    """Turn an async iterator of WAV files into one continuous WAV stream.
+
+    The first segment's format is emitted with a streaming header and
+    every segment contributes only its PCM payload, so playback is
+    gapless. A number among the parts adds that many seconds of silence.
+    """
+    fmt = None
+    pending_silence = 0.0
+    async for part in parts:
+        if isinstance(part, (int, float)):
+            if fmt is None:
+                pending_silence += part
+            else:
+                yield silence(fmt, part)
+            continue
+        info = parse_wav(part)
+        if fmt is None:
+            fmt = info.fmt
+            yield build_header(fmt, STREAM_DATA_SIZE)
+            if pending_silence:
+                yield silence(fmt, pending_silence)
+        else:
+            _check_format(fmt, info)
+        yield pcm_view(part, info)
@@ -0,0 +1,86 @@
+"""Tests for the response byte budget."""
+import asyncio
+
+from custom_components.ha_chatterbox.buffers import ByteBudget, body_length
+
+
+class FakeResponse:
+    def __init__(self, headers, content_length):
+        self.headers = headers
+        self.content_length = content_length
+
+
+def test_acquire_within_limit_does_not_wait():
+    async def run():
+        budget = ByteBudget(100)
+        await budget.async_acquire(60)
+        await budget.async_acquire(40)
+        return budget.stats
+
+    stats = asyncio.run(run())
+    assert stats["in_use"] == 100
+    assert stats["waits"] == 0
+
+
+def test_waiters_are_admitted_in_order_on_release():
+    async def run():
+        budget = ByteBudget(100)
+        admitted = []
+        await budget.async_acquire(80)
+
+        async def reader(name, size):
+            await budget.async_acquire(size)
+            admitted.append(name)
+
+        big = asyncio.ensure_future(reader("big", 50))
+        await asyncio.sleep(0)
+        # Fits now, but must not overtake the reader waiting ahead of it
+        small = asyncio.ensure_future(reader("small", 10))
+        await asyncio.sleep(0)
+        assert admitted == []
+        budget.release(80)
+        await asyncio.gather(big, small)
+        return budget, admitted
+
+    budget, admitted = asyncio.run(run())
+    assert admitted == ["big", "small"]
+    assert budget.in_use == 60
+    assert budget.waits == 2
+
+
+def test_oversized_body_admitted_when_idle():
+    async def run():
+        budget = ByteBudget(10)
+        await budget.async_acquire(50)
+        return budget.stats
+
+    stats = asyncio.run(run())
+    assert stats["in_use"] == 50
+    assert stats["peak"] == 50
+
+
+def test_cancelled_waiter_lets_next_through():
+    async def run():
+        budget = ByteBudget(100)
+        await budget.async_acquire(90)
+        first = asyncio.ensure_future(budget.async_acquire(50))
+        second = asyncio.ensure_future(budget.async_acquire(5))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        await asyncio.wait_for(second, 1)
+        return budget.in_use
+
+    assert asyncio.run(run()) == 95
+
+
+def test_grow_takes_bytes_without_waiting():
+    budget = ByteBudget(10)
+    budget.grow(25)
+    assert budget.in_use == 25
+    assert budget.peak == 25
+
+
+def test_body_length_ignores_encoded_content_length():
+    assert body_length(FakeResponse({}, 300)) == 300
+    assert body_length(FakeResponse({"Content-Encoding": "gzip"}, 300)) is None
@@ -0,0 +1,199 @@
+"""Tests for coalescing of identical in-flight requests."""
+import asyncio
+
+import pytest
+
+from custom_components.ha_chatterbox.coalesce import RequestCoalescer, make_request_key
+
+
+async def _chunks(items, started=None, gate=None):
+    if started is not None:
+        started.append(True)
+    for item in items:
+        if gate is not None:
+            await gate.wait()
+        await asyncio.sleep(0)
+        yield item
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_request_key_ignores_field_order():
+    assert make_request_key({"a": 1, "b": 2}) == make_request_key({"b": 2, "a": 1})
+
+
+def test_identical_calls_share_one_server_call():
+    async def run():
+        coalescer = RequestCoalescer()
+        calls = []
+
+        async def factory():
+            calls.append(True)
+            await asyncio.sleep(0.01)
+            return b"audio"
+
+        results = await asyncio.gather(*(coalescer.async_call("key", factory) for _ in range(3)))
+        return coalescer, calls, results
+
+    coalescer, calls, results = asyncio.run(run())
+    assert results == [b"audio"] * 3
+    assert len(calls) == 1
+    assert coalescer.stats["saved_calls"] == 2
+    assert coalescer.stats["in_flight"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    async def run():
+        coalescer = RequestCoalescer()
+
+        async def factory():
+            await asyncio.sleep(0.01)
+            return b"audio"
+
+        first = asyncio.ensure_future(coalescer.async_call("key", factory))
+        second = asyncio.ensure_future(coalescer.async_call("key", factory))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == b"audio"
+
+
+def test_join_inflight_counts_request():
+    async def run():
+        coalescer = RequestCoalescer()
+        assert coalescer.join_inflight("key") is None
+
+        async def factory():
+            await asyncio.sleep(0.01)
+            return b"audio"
+
+        call = asyncio.ensure_future(coalescer.async_call("key", factory))
+        await asyncio.sleep(0)
+        joined = coalescer.join_inflight("key")
+        result = await asyncio.shield(joined)
+        await call
+        return coalescer, result
+
+    coalescer, result = asyncio.run(run())
+    assert result == b"audio"
+    assert coalescer.stats == {"requests": 2, "server_calls": 1, "saved_calls": 1, "in_flight": 0}
+
+
+def test_streams_share_one_server_call():
+    async def run():
+        coalescer = RequestCoalescer()
+        started = []
+        streams = [
+            coalescer.async_stream("key", lambda: _chunks([b"a", b"b", b"c"], started))
+            for _ in range(2)
+        ]
+        results = await asyncio.gather(*(_collect(stream) for stream in streams))
+        return coalescer, started, results
+
+    coalescer, started, results = asyncio.run(run())
+    assert results == [[b"a", b"b", b"c"]] * 2
+    assert len(started) == 1
+    assert coalescer.stats["in_flight"] == 0
+
+
+def test_full_request_joins_running_stream():
+    async def run():
+        coalescer = RequestCoalescer()
+        gate = asyncio.Event()
+        stream = asyncio.ensure_future(
+            _collect(coalescer.async_stream("key", lambda: _chunks([b"a", b"b"], gate=gate)))
+        )
+        await asyncio.sleep(0)
+
+        async def factory():
+            raise AssertionError("a second server call was made")
+
+        call = asyncio.ensure_future(coalescer.async_call("key", factory))
+        await asyncio.sleep(0)
+        gate.set()
+        return await stream, await call
+
+    assert asyncio.run(run()) == ([b"a", b"b"], b"ab")
+
+
+def test_stream_not_joinable_past_replay_limit():
+    async def run():
+        coalescer = RequestCoalescer(replay_limit=2)
+        first = coalescer.async_stream("key", lambda: _chunks([b"aaa", b"b"]))
+        # More than the replay limit has arrived, so nobody can join now
+        received = [await anext(first)]
+        starts = []
+        second = await _collect(coalescer.async_stream("key", lambda: _chunks([b"x"], starts)))
+        return received + await _collect(first), second, starts
+
+    first, second, starts = asyncio.run(run())
+    assert first == [b"aaa", b"b"]
+    assert second == [b"x"]
+    assert len(starts) == 1
+
+
+def test_stream_error_reaches_every_caller():
+    async def failing():
+        yield b"a"
+        raise ValueError("boom")
+
+    async def run():
+        coalescer = RequestCoalescer()
+        streams = [coalescer.async_stream("key", failing) for _ in range(2)]
+        return await asyncio.gather(*(_collect(stream) for stream in streams), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_last_caller_leaving_closes_source():
+    async def run():
+        coalescer = RequestCoalescer()
+        closed = []
+
+        async def source():
+            try:
+                while True:
+                    await asyncio.sleep(0)
+                    yield b"a"
+            finally:
+                closed.append(True)
+
+        stream = coalescer.async_stream("key", source)
+        await anext(stream)
+        await stream.aclose()
+        await asyncio.sleep(0.01)
+        return coalescer, closed
+
+    coalescer, closed = asyncio.run(run())
+    assert closed == [True]
+    assert coalescer.stats["in_flight"] == 0
+
+
+@pytest.mark.parametrize("limit", [4, 16])
+def test_slow_caller_bounds_buffered_bytes(limit):
+    async def run():
+        coalescer = RequestCoalescer(replay_limit=limit)
+        produced = []
+
+        async def source():
+            for _ in range(100):
+                produced.append(True)
+                await asyncio.sleep(0)
+                yield b"x"
+
+        stream = coalescer.async_stream("key", source)
+        # Read past the replay limit so the stream stops being joinable
+        for _ in range(limit + 1):
+            await anext(stream)
+        await asyncio.sleep(0.05)
+        ahead = len(produced) - (limit + 1)
+        rest = await _collect(stream)
+        return ahead, len(rest)
+
+    ahead, rest = asyncio.run(run())
+    assert ahead <= limit + 1
+    assert rest == 100 - (limit + 1)
@@ -0,0 +1,48 @@
+"""Tests for dialogue script parsing."""
+from custom_components.ha_chatterbox.dialogue import Pause, Segment, parse_script
+
+VOICES = {"Emily": "Emily.wav", "Thomas": "Thomas.wav"}
+
+
+def resolve(name):
+    return VOICES.get(name)
+
+
+def test_label_mid_sentence_is_plain_text():
+    assert parse_script("Reminder for Thomas: take out the trash", resolve) is None
+
+
+def test_label_at_line_start():
+    assert parse_script("Intro\nThomas: take out the trash", resolve) == [
+        Segment(None, "Intro"),
+        Segment("Thomas.wav", "take out the trash"),
+    ]
+
+
+def test_label_after_sentence_punctuation():
+    assert parse_script("Thomas: Hi.  Emily: Hello! [pause 500ms] Bye", resolve) == [
+        Segment("Thomas.wav", "Hi."),
+        Segment("Emily.wav", "Hello!"),
+        Pause(0.5),
+        Segment("Emily.wav", "Bye"),
+    ]
+
+
+def test_unknown_label_is_plain_text():
+    assert parse_script("Note: the door is open", resolve) is None
+
+
+def test_label_after_pause():
+    assert parse_script("Emily: Hi there. [pause 1s] Thomas: Hello.", resolve) == [
+        Segment("Emily.wav", "Hi there."),
+        Pause(1.0),
+        Segment("Thomas.wav", "Hello."),
+    ]
+
+
+def test_label_after_break():
+    assert parse_script('Emily: Hi <break time="250ms"/> Thomas: Hello', resolve) == [
+        Segment("Emily.wav", "Hi"),
+        Pause(0.25),
+        Segment("Thomas.wav", "Hello"),
+    ]
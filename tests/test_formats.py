@@ -0,0 +1,32 @@
+"""Tests for output format negotiation and joining."""
+from custom_components.ha_chatterbox.const import (
+    DEFAULT_CHUNK_SIZE,
+    OUTPUT_FORMAT_AUTO,
+    OUTPUT_FORMAT_MP3,
+    OUTPUT_FORMAT_OPUS,
+    OUTPUT_FORMAT_WAV,
+)
+from custom_components.ha_chatterbox.formats import join_audio, resolve_format
+
+LONG_MESSAGE = "The washing machine has finished its cycle. " * 6
+
+
+def test_auto_keeps_short_messages_wav():
+    assert resolve_format(OUTPUT_FORMAT_AUTO, "Hello there.") == OUTPUT_FORMAT_WAV
+
+
+def test_auto_compresses_chunked_messages():
+    assert len(LONG_MESSAGE) > DEFAULT_CHUNK_SIZE
+    assert resolve_format(OUTPUT_FORMAT_AUTO, LONG_MESSAGE) == OUTPUT_FORMAT_MP3
+    assert resolve_format(OUTPUT_FORMAT_AUTO, LONG_MESSAGE, "cast") == OUTPUT_FORMAT_OPUS
+
+
+def test_explicit_format_is_kept():
+    assert resolve_format(OUTPUT_FORMAT_WAV, LONG_MESSAGE) == OUTPUT_FORMAT_WAV
+
+
+def test_join_mp3_keeps_only_first_id3_tag():
+    tag = b"ID3\x04\x00\x00\x00\x00\x00\x02ab"
+    frames = b"\xff\xfb\x90\x00"
+    joined = join_audio(OUTPUT_FORMAT_MP3, [tag + frames, 0.5, tag + frames])
+    assert joined == tag + frames + frames
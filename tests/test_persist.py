@@ -0,0 +1,34 @@
+"""Tests for speak service audio retention."""
+import os
+import time
+
+from custom_components.ha_chatterbox.persist import TEMP_FILE_PREFIX, AudioWriter
+
+
+def _touch(directory, name, age):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(b"x")
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def test_prune_only_removes_own_files(tmp_path):
+    directory = str(tmp_path)
+    _touch(directory, "chime.mp3", 10**7)
+    _touch(directory, "tts_expired.wav", 10**7)
+    _touch(directory, f"{TEMP_FILE_PREFIX}leftover", 10**7)
+    _touch(directory, "tts_recent.wav", 0)
+    writer = AudioWriter(None, directory, max_files=10, max_bytes=10**6, max_age=3600)
+    writer._prune()
+    assert sorted(os.listdir(directory)) == ["chime.mp3", "tts_recent.wav"]
+
+
+def test_prune_applies_count_limit_to_own_files(tmp_path):
+    directory = str(tmp_path)
+    _touch(directory, "chime.mp3", 300)
+    for age in (100, 200):
+        _touch(directory, f"tts_{age}.wav", age)
+    writer = AudioWriter(None, directory, max_files=1, max_bytes=10**6, max_age=3600)
+    writer._prune()
+    assert sorted(os.listdir(directory)) == ["chime.mp3", "tts_100.wav"]
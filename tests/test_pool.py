@@ -0,0 +1,96 @@
+"""Tests for the server pool circuit breaker."""
+from custom_components.ha_chatterbox import pool
+from custom_components.ha_chatterbox.pool import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    EJECT_AFTER_FAILURES,
+    EJECT_BASE_SECONDS,
+    ServerPool,
+    parse_servers,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def _pool(monkeypatch, count=1):
+    clock = FakeClock()
+    monkeypatch.setattr(pool.time, "monotonic", clock.monotonic)
+    return ServerPool([f"http://server{i}:8005" for i in range(count)]), clock
+
+
+def _open(server_pool, node):
+    for _ in range(EJECT_AFTER_FAILURES):
+        server_pool.mark_failure(node)
+
+
+def test_parse_servers():
+    assert parse_servers("a, b:9000\nhttp://c:1/") == ["http://a:8005", "http://b:9000", "http://c:1"]
+
+
+def test_circuit_opens_after_repeated_failures(monkeypatch):
+    server_pool, _ = _pool(monkeypatch)
+    node = server_pool.nodes[0]
+    for _ in range(EJECT_AFTER_FAILURES - 1):
+        server_pool.mark_failure(node)
+    assert node.state == CIRCUIT_CLOSED
+    server_pool.mark_failure(node)
+    assert node.state == CIRCUIT_OPEN
+    assert server_pool.acquire(node) is None
+    assert not server_pool.available
+    assert server_pool.retry_after() == EJECT_BASE_SECONDS
+
+
+def test_half_open_lets_one_trial_through(monkeypatch):
+    server_pool, clock = _pool(monkeypatch)
+    node = server_pool.nodes[0]
+    _open(server_pool, node)
+    clock.now += EJECT_BASE_SECONDS
+    assert node.state == CIRCUIT_HALF_OPEN
+    assert server_pool.acquire(node) is True
+    assert server_pool.acquire(node) is None
+    assert server_pool.candidates() == []
+    server_pool.release(node, True)
+    server_pool.mark_success(node)
+    assert node.state == CIRCUIT_CLOSED
+    assert server_pool.acquire(node) is False
+
+
+def test_other_request_does_not_free_trial_slot(monkeypatch):
+    server_pool, clock = _pool(monkeypatch)
+    node = server_pool.nodes[0]
+    # A request started while the circuit was closed
+    slow = server_pool.acquire(node)
+    _open(server_pool, node)
+    clock.now += EJECT_BASE_SECONDS
+    probe = server_pool.acquire(node)
+    assert probe is True
+    server_pool.release(node, slow)
+    assert node.probing
+    assert server_pool.acquire(node) is None
+
+
+def test_failed_trial_reopens_for_longer(monkeypatch):
+    server_pool, clock = _pool(monkeypatch)
+    node = server_pool.nodes[0]
+    _open(server_pool, node)
+    clock.now += EJECT_BASE_SECONDS
+    probe = server_pool.acquire(node)
+    server_pool.mark_failure(node)
+    server_pool.release(node, probe)
+    assert node.state == CIRCUIT_OPEN
+    assert server_pool.retry_after() == 2 * EJECT_BASE_SECONDS
+
+
+def test_candidates_prefer_least_outstanding(monkeypatch):
+    server_pool, _ = _pool(monkeypatch, 3)
+    first, second, third = server_pool.nodes
+    server_pool.acquire(first)
+    _open(server_pool, third)
+    assert server_pool.candidates() == [second, first]
@@ -0,0 +1,116 @@
+"""Tests for priority scheduling of synthesis requests."""
+import asyncio
+
+import pytest
+
+from custom_components.ha_chatterbox.const import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+from custom_components.ha_chatterbox.errors import HiggsAudioCancelledError, HiggsAudioDeadlineError
+from custom_components.ha_chatterbox.scheduler import SynthesisScheduler
+
+
+def test_waiting_requests_run_by_priority_then_arrival():
+    async def run():
+        scheduler = SynthesisScheduler(max_in_flight=1)
+        gate = asyncio.Event()
+        order = []
+
+        def job(name):
+            async def factory():
+                if name == "first":
+                    await gate.wait()
+                order.append(name)
+            return factory
+
+        tasks = [asyncio.ensure_future(scheduler.async_run(job("first")))]
+        await asyncio.sleep(0)
+        for name, priority in (("low", PRIORITY_LOW), ("normal", PRIORITY_NORMAL),
+                               ("high", PRIORITY_HIGH), ("normal2", PRIORITY_NORMAL)):
+            tasks.append(asyncio.ensure_future(scheduler.async_run(job(name), priority)))
+            await asyncio.sleep(0)
+        assert scheduler.stats["queued"] == 4
+        gate.set()
+        await asyncio.gather(*tasks)
+        return scheduler, order
+
+    scheduler, order = asyncio.run(run())
+    assert order == ["first", "high", "normal", "normal2", "low"]
+    assert scheduler.stats["in_flight"] == 0
+
+
+def test_expired_request_never_runs():
+    async def run():
+        scheduler = SynthesisScheduler(max_in_flight=1)
+        ran = []
+
+        async def slow():
+            await asyncio.sleep(0.05)
+
+        async def late():
+            ran.append(True)
+
+        first = asyncio.ensure_future(scheduler.async_run(slow))
+        await asyncio.sleep(0)
+        with pytest.raises(HiggsAudioDeadlineError):
+            await scheduler.async_run(late, deadline=0.01)
+        await first
+        return scheduler, ran
+
+    scheduler, ran = asyncio.run(run())
+    assert ran == []
+    assert scheduler.stats["expired"] == 1
+
+
+def test_cancel_all_fails_waiting_and_running():
+    async def run():
+        scheduler = SynthesisScheduler(max_in_flight=1)
+
+        async def forever():
+            await asyncio.sleep(10)
+
+        running = asyncio.ensure_future(scheduler.async_run(forever))
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(scheduler.async_run(forever))
+        await asyncio.sleep(0)
+        count = scheduler.cancel_all()
+        results = await asyncio.gather(running, waiting, return_exceptions=True)
+        return scheduler, count, results
+
+    scheduler, count, results = asyncio.run(run())
+    assert count == 2
+    assert all(isinstance(result, HiggsAudioCancelledError) for result in results)
+    assert scheduler.stats["in_flight"] == 0
+
+
+def test_stream_holds_slot_until_done():
+    async def run():
+        scheduler = SynthesisScheduler(max_in_flight=1)
+
+        async def chunks():
+            yield b"a"
+            yield b"b"
+
+        stream = scheduler.async_stream(chunks)
+        first = await anext(stream)
+        held = scheduler.stats["in_flight"]
+        rest = [chunk async for chunk in stream]
+        return [first, *rest], held, scheduler.stats["in_flight"]
+
+    assert asyncio.run(run()) == ([b"a", b"b"], 1, 0)
+
+
+def test_interrupt_ends_running_stream():
+    async def run():
+        scheduler = SynthesisScheduler(max_in_flight=1)
+
+        async def chunks():
+            while True:
+                yield b"a"
+
+        stream = scheduler.async_stream(chunks)
+        await anext(stream)
+        scheduler.cancel_all()
+        with pytest.raises(HiggsAudioCancelledError):
+            await anext(stream)
+        return scheduler.stats["in_flight"]
+
+    assert asyncio.run(run()) == 0